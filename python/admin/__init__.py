@@ -0,0 +1,7 @@
+""" Werkzeuge für Administratoren (nur role = 'admin').
+Exportiert nur das Blueprint admin_bp aus routes.py.
+"""
+
+from .routes import admin_bp
+
+__all__ = ["admin_bp"]
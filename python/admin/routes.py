@@ -0,0 +1,94 @@
+""" Werkzeuge für Administratoren (Rolle 'admin' in der Tabelle users)
+
+POST /admin/profile?sekunden=10 startet den statistischen Profiler (profiler.py) im Hintergrund und antwortet
+sofort mit 202 und dem Dateinamen; nach Ablauf liegt das Profil im collapsed-Format für Flammendiagramme unter
+GET /admin/profile/<datei> (vorher 202 „läuft“):
+    curl -b cookies.txt -X POST "http://<pi>:5000/admin/profile?sekunden=30"      → {"datei": "profil-….collapsed", …}
+    curl -b cookies.txt "http://<pi>:5000/admin/profile/profil-….collapsed" -o profil.collapsed
+    flamegraph.pl profil.collapsed > profil.svg      (oder die Datei in speedscope.app öffnen)
+
+Parameter: sekunden (1–120, Standard 10), intervall_ms (1–100, Standard 5),
+threads=0 (alle Threads zusammen statt getrennt), leerlauf=1 (auch wartende Threads).
+Die Anfrage wartet nicht auf das Ende der Messung – ein synchroner gunicorn-Worker würde sonst nach --timeout
+(30 s) abgeschossen. Gemessen wird der Worker-Prozess, der das POST angenommen hat; die Dateien liegen in
+PROFILE_DIR (Standard <repo>/logs/profile), damit jeder Worker sie ausliefern kann.
+"""
+
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from flask import Blueprint, Response, jsonify, request, url_for
+
+from ..auth import admin_required
+from ..profiler import SamplingProfiler, collapsed
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+MAX_SEKUNDEN = 120
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(__file__).resolve().parents[2] / "logs" / "profile")
+_NAME = re.compile(r"profil-\d{8}-\d{6}-\d+\.collapsed")
+
+
+def _int_arg(name: str, default: int, low: int, high: int) -> int:
+    try:
+        return max(low, min(high, int(request.args.get(name, default))))
+    except ValueError:
+        return default
+
+
+def _finish(profiler: SamplingProfiler, path: Path) -> None:
+    """Läuft im Timer-Thread: Profil beenden und die Datei erst vollständig sichtbar machen."""
+    profiler.stop()
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(collapsed(profiler.counts), encoding="utf-8")
+    tmp.replace(path)
+    print(f"• Profil: {path} ({profiler.stichproben} Stichproben in {profiler.dauer:.1f} s, "
+          f"{len(profiler.counts)} Aufrufketten)")
+
+
+@admin_bp.post("/profile")
+@admin_required
+def profile_start():
+    sekunden = _int_arg("sekunden", 10, 1, MAX_SEKUNDEN)
+    intervall_ms = _int_arg("intervall_ms", 5, 1, 100)
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"profil-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}.collapsed"
+
+    profiler = SamplingProfiler(
+        intervall_ms / 1000,
+        nach_thread=request.args.get("threads", "1") != "0",
+        leerlauf=request.args.get("leerlauf", "0") == "1",
+    )
+    try:
+        profiler.start()
+    except RuntimeError as e:                       # schon ein Profil aktiv
+        return jsonify({"fehler": str(e)}), 409
+
+    timer = threading.Timer(sekunden, _finish, args=(profiler, PROFILE_DIR / name))
+    timer.daemon = True
+    timer.start()
+    profiler.ausnehmen.add(timer.ident)             # der wartende Timer soll nicht mitgezählt werden
+
+    return jsonify({
+        "datei": name,
+        "pid": os.getpid(),
+        "fertig_ab": (datetime.now() + timedelta(seconds=sekunden)).isoformat(timespec="seconds"),
+        "abholen": url_for("admin.profile_result", name=name),
+    }), 202
+
+
+@admin_bp.get("/profile/<name>")
+@admin_required
+def profile_result(name: str):
+    if not _NAME.fullmatch(name):
+        return jsonify({"fehler": "Unbekannte Datei"}), 404
+    path = PROFILE_DIR / name
+    if not path.exists():
+        # noch in Arbeit (oder der Prozess wurde vorher beendet – dann bleibt es dabei)
+        return jsonify({"status": "läuft", "datei": name}), 202
+    return Response(path.read_text(encoding="utf-8"), mimetype="text/plain", headers={
+        "Content-Disposition": f'attachment; filename="{name}"',
+    })
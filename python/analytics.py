@@ -0,0 +1,466 @@
+"""
+Analyse-Daten für lange Berichtszeiträume: Verkaufspositionen als Parquet-Dateien (ein Ordner pro Monat),
+abgefragt mit DuckDB statt MySQL. Die Berichte laufen dann nicht mehr auf der Datenbank, die
+gleichzeitig Verkäufe schreibt.
+
+Ablage (ANALYTICS_DIR, Standard: analytics/ im Hauptordner):
+    verkauf_positionen/monat=2025-10/daten.parquet   Verkaufspositionen (ohne Namen und Kosten)
+    stamm/artikel.parquet, kunden.parquet, kundentyp.parquet
+    stand.json                                       was wann exportiert wurde
+
+Kosten (durchschnittskosten), Namen und Kundentypen stehen nur in den Stammdaten und werden bei
+jedem Export neu geschrieben; v_sales verbindet sie in DuckDB genau wie die MySQL-Sicht.
+
+Export (z. B. stündlich per cron): neue Monate + alle Monate, die beim letzten Export noch nicht
+abgeschlossen waren (also mindestens der laufende). Nachträglich geänderte alte Monate
+(Kassen-Import mit altem Datum, generate_history) → check findet sie, --monat/--alles exportiert neu.
+
+Welche Berichte DuckDB benutzen: ANALYTICS_REPORTS=daily,customers,articles,pareto (oder „alle“).
+Ohne Eintrag, ohne duckdb-Paket oder ohne Export → wie bisher MySQL.
+
+Start:
+    python -m python.analytics export [--monat 2025-09 …] [--alles]
+    python -m python.analytics check [--reparieren]
+    python -m python.analytics status
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from pymysql.cursors import SSCursor
+
+from .db import get_conn, report_timing
+from .dialect import group_expr
+
+try:
+    import duckdb      # optional: ohne duckdb laufen alle Berichte auf MySQL
+except ImportError:
+    duckdb = None
+
+REPORTS = ("daily", "customers", "articles", "pareto")
+MEMORY_LIMIT = os.getenv("ANALYTICS_MEMORY_LIMIT", "512MB")   # der Pi teilt sich den Speicher mit MySQL
+TOLERANZ = 0.005                                              # check: Rundungsrest bei Summen in €
+
+# Spalten und DuckDB-Typen der Parquet-Dateien (Reihenfolge = SELECT beim Export)
+FACT_COLUMNS = {
+    "verkaufID": "INTEGER", "verkaufsdatum": "TIMESTAMP", "kundenID": "INTEGER", "artikelID": "INTEGER",
+    "verkaufsmenge": "INTEGER", "verkaufspreis": "DECIMAL(10,2)", "rabatt": "DECIMAL(5,2)",
+}
+STAMM = {
+    "artikel": ("SELECT artikelID, produktname, durchschnittskosten FROM artikel",
+                {"artikelID": "INTEGER", "produktname": "VARCHAR", "durchschnittskosten": "DECIMAL(10,4)"}),
+    "kunden": ("SELECT kundenID, vorname, nachname, kundentypID FROM kunden",
+               {"kundenID": "INTEGER", "vorname": "VARCHAR", "nachname": "VARCHAR", "kundentypID": "INTEGER"}),
+    "kundentyp": ("SELECT kundentypID, bezeichnung, kundenrabatt FROM kundentyp",
+                  {"kundentypID": "INTEGER", "bezeichnung": "VARCHAR", "kundenrabatt": "DECIMAL(5,2)"}),
+}
+
+# wie sql/v_sales.sql; rabatt * 0.01 statt / 100, damit DuckDB mit DECIMAL rechnet (gleiche Rundung wie MySQL)
+V_SALES = """
+    CREATE OR REPLACE VIEW v_sales AS
+    SELECT
+        v.verkaufsdatum, k.kundenID, CONCAT(k.vorname, ' ', k.nachname) AS kunde,
+        kt.kundentypID, kt.bezeichnung AS kundentyp, a.artikelID, a.produktname AS artikel,
+        v.verkaufsmenge AS menge, v.verkaufspreis AS vk_preis,
+        COALESCE(v.rabatt, 0) AS rabatt_prozent, COALESCE(a.durchschnittskosten, 0) AS ek_preis,
+        ROUND(v.verkaufsmenge * v.verkaufspreis * COALESCE(v.rabatt, 0) * 0.01, 2)       AS rabatt_eur,
+        ROUND(v.verkaufsmenge * v.verkaufspreis * (1 - COALESCE(v.rabatt, 0) * 0.01), 2) AS umsatz,
+        ROUND(v.verkaufsmenge * v.verkaufspreis, 2)                                      AS umsatz_brutto,
+        ROUND(v.verkaufsmenge * COALESCE(a.durchschnittskosten, 0), 2)                   AS kosten,
+        ROUND(v.verkaufsmenge * v.verkaufspreis * (1 - COALESCE(v.rabatt, 0) * 0.01)
+              - v.verkaufsmenge * COALESCE(a.durchschnittskosten, 0), 2)                 AS marge,
+        ROUND(v.verkaufsmenge * v.verkaufspreis
+              - v.verkaufsmenge * COALESCE(a.durchschnittskosten, 0), 2)                 AS marge_brutto
+    FROM verkauf_positionen v
+    JOIN artikel   a  ON a.artikelID    = v.artikelID
+    JOIN kunden    k  ON k.kundenID     = v.kundenID
+    JOIN kundentyp kt ON kt.kundentypID = k.kundentypID
+"""
+
+_PLACEHOLDER = re.compile(r"%(s|%)")
+_lock = threading.Lock()
+_database = None
+
+
+def analytics_dir() -> Path:
+    path = Path(os.getenv("ANALYTICS_DIR") or "analytics")
+    return path if path.is_absolute() else Path(__file__).resolve().parents[1] / path
+
+
+def configured_reports() -> frozenset:
+    """Berichte aus ANALYTICS_REPORTS (Komma-Liste oder „alle“)."""
+    value = (os.getenv("ANALYTICS_REPORTS") or "").strip().lower()
+    if value in ("alle", "all", "*"):
+        return frozenset(REPORTS)
+    return frozenset(r.strip() for r in value.split(",") if r.strip() in REPORTS)
+
+
+# ── Stand der Exporte ────────────────────────────────────────────────────────
+
+def load_state(base: Optional[Path] = None) -> dict:
+    path = (base or analytics_dir()) / "stand.json"
+    if not path.exists():
+        return {"monate": {}, "stammdaten_am": None}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_state(base: Path, state: dict) -> None:
+    tmp = base / "stand.json.tmp"
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, base / "stand.json")
+
+
+def _month_start(month: str) -> date:
+    return date.fromisoformat(month + "-01")
+
+
+def _next_month(month: str) -> str:
+    d = _month_start(month)
+    return f"{d.year + d.month // 12}-{d.month % 12 + 1:02d}"
+
+
+def _months_between(first: str, last: str) -> List[str]:
+    months = [first]
+    while months[-1] < last:
+        months.append(_next_month(months[-1]))
+    return months
+
+
+def months_to_export(db_months: List[str], state: dict, force: Iterable[str] = ()) -> List[str]:
+    """
+    Fehlende Monate + Monate, deren letzter Export vor dem Monatsende lag (damals noch offen).
+    force = zusätzlich diese Monate.
+    """
+    todo = set(force)
+    for month in db_months:
+        info = state["monate"].get(month)
+        ende = datetime.combine(_month_start(_next_month(month)), datetime.min.time())
+        if info is None or datetime.fromisoformat(info["exportiert_am"]) < ende:
+            todo.add(month)
+    return sorted(todo)
+
+
+# ── Export MySQL → Parquet ───────────────────────────────────────────────────
+
+def _copy_to_parquet(rows, columns: Dict[str, str], target: Path, tmp_dir: Path) -> int:
+    """
+    Zeilen über eine CSV-Zwischendatei (wenig Speicher, auch bei Millionen Zeilen) als Parquet schreiben.
+    Die fertige Datei ersetzt die alte erst ganz am Ende (Berichte sehen nie eine halbe Datei).
+    Keine Zeilen (Monat ohne Verkäufe): leere Datei mit denselben Spalten – read_csv erkennt in einer
+    leeren CSV kein Format und bricht ab.
+    """
+    csv_path = tmp_dir / (target.stem + ".csv")
+    count = 0
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(["" if v is None else v for v in row])
+            count += 1
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_target = target.with_suffix(".parquet.tmp")
+    col_spec = "{" + ", ".join(f"'{name}': '{typ}'" for name, typ in columns.items()) + "}"
+    if count:
+        source = (f"SELECT * FROM read_csv('{csv_path}', header = false, columns = {col_spec}, "
+                  f"nullstr = '', quote = '\"', escape = '\"')")
+    else:
+        source = "SELECT " + ", ".join(f"CAST(NULL AS {typ}) AS {name}" for name, typ in columns.items()) + " LIMIT 0"
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+        con.execute(f"COPY ({source}) TO '{tmp_target}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+    finally:
+        con.close()
+    os.replace(tmp_target, target)
+    csv_path.unlink()
+    return count
+
+
+def export(conn, months: Iterable[str] = (), everything: bool = False, base: Optional[Path] = None) -> dict:
+    """
+    Stammdaten + fällige Monate exportieren (months = zusätzlich erzwingen, everything = alle Monate).
+    Monate ohne Verkäufe in der Datenbank werden aus dem Export gelöscht. Gibt den neuen Stand zurück.
+    """
+    if duckdb is None:
+        raise RuntimeError("Paket duckdb fehlt (pip install duckdb)")
+    base = base or analytics_dir()
+    base.mkdir(parents=True, exist_ok=True)
+    state = load_state(base)
+    with conn.cursor() as cur:
+        cur.execute("SELECT MIN(verkaufsdatum), MAX(verkaufsdatum) FROM verkauf")
+        first, last = cur.fetchone()
+    db_months = _months_between(f"{first:%Y-%m}", f"{last:%Y-%m}") if first else []
+    todo = db_months if everything else [m for m in months_to_export(db_months, state, months) if m in db_months]
+
+    with tempfile.TemporaryDirectory(dir=base) as tmp:
+        tmp_dir = Path(tmp)
+        for name, (sql, columns) in STAMM.items():
+            with conn.cursor(SSCursor) as cur:
+                cur.execute(sql)
+                count = _copy_to_parquet(cur, columns, base / "stamm" / f"{name}.parquet", tmp_dir)
+            print(f"  • stamm/{name}: {count} Zeilen")
+        state["stammdaten_am"] = datetime.now().isoformat(" ", "seconds")
+
+        for month in todo:
+            started = datetime.now()       # Zeitpunkt VOR dem Lesen → später committete Zeilen gelten als offen
+            von, bis = _month_start(month), _month_start(_next_month(month))
+            with conn.cursor(SSCursor) as cur:
+                cur.execute("""
+                    SELECT va.verkaufID, v.verkaufsdatum, v.kundenID, va.artikelID,
+                           va.verkaufsmenge, va.verkaufspreis, va.rabatt
+                    FROM verkauf v
+                    JOIN verkaufartikel va ON va.verkaufID = v.verkaufID
+                    WHERE v.verkaufsdatum >= %s AND v.verkaufsdatum < %s
+                    ORDER BY v.verkaufsdatum, va.verkaufID
+                """, (von, bis))
+                target = base / "verkauf_positionen" / f"monat={month}" / "daten.parquet"
+                count = _copy_to_parquet(cur, FACT_COLUMNS, target, tmp_dir)
+            state["monate"][month] = {"zeilen": count, "exportiert_am": started.isoformat(" ", "seconds")}
+            _save_state(base, state)
+            print(f"  • {month}: {count} Positionen")
+
+    for month in sorted(set(state["monate"]) - set(db_months)):
+        shutil.rmtree(base / "verkauf_positionen" / f"monat={month}", ignore_errors=True)
+        del state["monate"][month]
+        print(f"  • {month}: keine Verkäufe mehr → gelöscht")
+    _save_state(base, state)
+    conn.commit()                          # Lese-Schnappschuss beenden
+    return state
+
+
+# ── Abfragen mit DuckDB ──────────────────────────────────────────────────────
+
+def available(base: Optional[Path] = None) -> bool:
+    """duckdb installiert und mindestens ein Monat + Stammdaten exportiert."""
+    base = base or analytics_dir()
+    return (duckdb is not None and (base / "stand.json").exists()
+            and all((base / "stamm" / f"{name}.parquet").exists() for name in STAMM)
+            and any((base / "verkauf_positionen").glob("monat=*/daten.parquet")))
+
+
+def _open_database(base: Path):
+    """In-Memory-DuckDB mit Sichten auf die Parquet-Dateien (Dateiliste wird bei jeder Abfrage neu gelesen)."""
+    db = duckdb.connect()
+    db.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+    db.execute(f"""
+        CREATE VIEW verkauf_positionen AS
+        SELECT * FROM read_parquet('{base / "verkauf_positionen" / "*" / "daten.parquet"}', hive_partitioning = true)
+    """)
+    for name in STAMM:
+        db.execute(f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{base / 'stamm' / (name + '.parquet')}')")
+    db.execute(V_SALES)
+    # MySQL-Funktion aus dialect.group_expr (DuckDB: strftime mit denselben %-Codes)
+    db.execute("CREATE MACRO date_format(d, f) AS strftime(d, f)")
+    return db
+
+
+class DuckCursor:
+    """Cursor mit pymysql-Verhalten (%s-Platzhalter, Tupel, Kontextmanager) – nur lesen."""
+
+    def __init__(self, con):
+        self._con = con
+
+    def execute(self, sql, params=None):
+        t0 = time.perf_counter()
+        if params is not None:
+            sql = _PLACEHOLDER.sub(lambda m: "?" if m.group(1) == "s" else "%", sql)
+        try:
+            self._con.execute(sql, list(params) if params is not None else None)
+        finally:
+            report_timing("sql", t0, sql)
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        try:
+            return self._con.fetchone()
+        finally:
+            report_timing("sql", t0)
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        try:
+            return self._con.fetchall()
+        finally:
+            report_timing("sql", t0)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DuckConnection:
+    """Eigene DuckDB-Verbindung pro Anfrage (threadsicher), alle auf derselben In-Memory-Datenbank."""
+
+    source = "duckdb"
+
+    def __init__(self, con):
+        self._con = con
+
+    def cursor(self, *args):
+        return DuckCursor(self._con)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self._con.close()
+
+
+def duck_conn(base: Optional[Path] = None) -> DuckConnection:
+    global _database
+    if _database is None:
+        with _lock:
+            if _database is None:
+                _database = _open_database(base or analytics_dir())
+    return DuckConnection(_database.cursor())
+
+
+def close_database() -> None:
+    """Gemeinsame DuckDB schließen (z. B. vor fork); die nächste Anfrage öffnet sie neu."""
+    global _database
+    with _lock:
+        if _database is not None:
+            _database.close()
+            _database = None
+
+
+def get_report_conn(report: str, **extra):
+    """Verbindung für einen Bericht: DuckDB, wenn in ANALYTICS_REPORTS eingetragen und exportiert – sonst MySQL."""
+    if report in configured_reports() and available():
+        t0 = time.perf_counter()
+        conn = duck_conn()
+        report_timing("connect", t0)
+        return conn
+    return get_conn(**extra)
+
+
+def source_note(conn) -> str:
+    """Hinweis für die Filterzeile, wenn die Daten aus dem Export stammen (Stand = letzter Export)."""
+    if getattr(conn, "source", None) != "duckdb":
+        return ""
+    months = load_state()["monate"]
+    stand = max((m["exportiert_am"] for m in months.values()), default="?")
+    return f"Quelle: Analyse-Export (Stand {stand})"
+
+
+# ── Abgleich DuckDB ↔ MySQL ──────────────────────────────────────────────────
+
+CHECK_SQL = """
+    SELECT {month} AS monat, COUNT(*), SUM(menge), ROUND(SUM(umsatz), 2), ROUND(SUM(kosten), 2), ROUND(SUM(marge), 2)
+    FROM v_sales
+    WHERE verkaufsdatum >= %s AND verkaufsdatum < %s
+    GROUP BY 1
+"""
+CHECK_COLUMNS = ("positionen", "menge", "umsatz", "kosten", "marge")
+
+
+def _monthly(conn, von: date, bis: date) -> Dict[str, tuple]:
+    with conn.cursor() as cur:
+        cur.execute(CHECK_SQL.format(month=group_expr("month", "verkaufsdatum")), (von, bis))
+        return {str(r[0]): tuple(float(v or 0) for v in r[1:]) for r in cur.fetchall()}
+
+
+def check(conn, base: Optional[Path] = None) -> List[Tuple[str, Optional[tuple], Optional[tuple]]]:
+    """
+    Monatssummen (Positionen, Menge, Umsatz, Kosten, Marge) aus v_sales in MySQL und DuckDB vergleichen.
+    Gibt die abweichenden Monate zurück: [(monat, mysql_werte, duckdb_werte), …] (None = fehlt dort).
+    """
+    base = base or analytics_dir()
+    months = sorted(load_state(base)["monate"])
+    if not months:
+        return []
+    von, bis = _month_start(months[0]), _month_start(_next_month(months[-1]))
+    soll = _monthly(conn, von, bis)
+    conn.commit()
+    duck = DuckConnection(_open_database(base))
+    try:
+        ist = _monthly(duck, von, bis)
+    finally:
+        duck.close()
+
+    diffs = []
+    for month in sorted(set(soll) | set(ist)):
+        a, b = soll.get(month), ist.get(month)
+        if a is None or b is None or any(abs(x - y) > TOLERANZ for x, y in zip(a, b)):
+            diffs.append((month, a, b))
+    return diffs
+
+
+def print_status(base: Optional[Path] = None) -> None:
+    base = base or analytics_dir()
+    state = load_state(base)
+    print(f"Analyse-Export: {base}")
+    print(f"  duckdb: {'installiert' if duckdb is not None else 'fehlt'}"
+          f" · Berichte über DuckDB: {', '.join(sorted(configured_reports())) or '(keine)'}")
+    print(f"  Stammdaten: {state['stammdaten_am'] or '(noch nie)'}")
+    for month, info in sorted(state["monate"].items()):
+        path = base / "verkauf_positionen" / f"monat={month}" / "daten.parquet"
+        size = path.stat().st_size / 1024 if path.exists() else 0
+        print(f"  {month}  {info['zeilen']:>9} Positionen  {size:>8.0f} KB  exportiert {info['exportiert_am']}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Analyse-Export (Parquet) für Berichte über DuckDB.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("export", help="Stammdaten + neue/offene Monate exportieren")
+    s.add_argument("--monat", action="append", default=[], help="diesen Monat (JJJJ-MM) neu exportieren")
+    s.add_argument("--alles", action="store_true", help="alle Monate neu exportieren")
+    s = sub.add_parser("check", help="Monatssummen mit der Datenbank vergleichen")
+    s.add_argument("--reparieren", action="store_true", help="abweichende Monate neu exportieren")
+    sub.add_parser("status", help="exportierte Monate anzeigen")
+    args = p.parse_args(argv)
+
+    if args.cmd == "status":
+        print_status()
+        return
+    if duckdb is None:
+        print("Paket duckdb fehlt (pip install duckdb)")
+        sys.exit(1)
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        sys.exit(1)
+    try:
+        if args.cmd == "export":
+            print("• Export …")
+            export(conn, args.monat, args.alles)
+            return
+
+        diffs = check(conn)
+        for month, soll, ist in diffs:
+            print(f"  ✗ {month}")
+            for i, name in enumerate(CHECK_COLUMNS):
+                a = soll[i] if soll else None
+                b = ist[i] if ist else None
+                if a != b:
+                    print(f"      {name:<10} MySQL {a}  DuckDB {b}")
+        if diffs and args.reparieren:
+            print("• Neu exportieren …")
+            export(conn, [m for m, _, _ in diffs])
+            diffs = check(conn)
+        print(f"• {len(diffs)} Monate mit Abweichungen" if diffs else "• Export stimmt mit der Datenbank überein")
+        sys.exit(1 if diffs else 0)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
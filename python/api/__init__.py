@@ -0,0 +1,13 @@
+""" Schnittstellen-Modul (JSON-API für Kassen).
+Exportiert nur das Blueprint api_bp aus routes.py – erst beim Zugriff geladen, damit
+`python -m python.api.pos_import` weder routes.py (Flask) noch sich selbst doppelt importiert.
+"""
+
+__all__ = ["api_bp"]
+
+
+def __getattr__(name):
+    if name == "api_bp":
+        from .routes import api_bp
+        return api_bp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
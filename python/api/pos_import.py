@@ -0,0 +1,283 @@
+"""
+Tagesabschluss der Kassen importieren (CSV oder NDJSON), gestreamt – die Datei wird nie ganz geladen.
+
+CSV: eine Zeile pro Position, Zeilen eines Belegs stehen hintereinander.
+    beleg,zeit,kunde,artikel,menge[,preis][,rabatt]
+    F03-K2-000123,2025-10-31T14:05:00,anna@example.com,Kaffee 500g,2,6.49,
+NDJSON: ein Beleg pro Zeile.
+    {"beleg": "F03-K2-000123", "zeit": "…", "kunde": 12, "positionen": [{"artikel": "Kaffee 500g", "menge": 2}]}
+
+kunde  = kundenID oder E-Mail, artikel = artikelID oder Produktname (Index im Speicher, einmal geladen).
+preis / rabatt fehlen → heutiger Listenpreis / Rabatt des Kundentyps (wie /api/sales).
+
+Blöcke zu BATCH Belegen, eine Transaktion pro Block:
+  bekannte beleg-Schlüssel (verkauf_import) überspringen → Schreiben wie /api/sales (writer.write_receipts)
+  → Schlüssel in verkauf_import eintragen → commit.
+Lädt jemand parallel dieselbe Datei hoch, schlägt der Primärschlüssel an; der Block wird dann wiederholt
+und die inzwischen gebuchten Belege übersprungen.
+
+Start:
+    python -m python.api.pos_import kasse_F03_2025-10-31.csv
+    python -m python.api.pos_import kasse_F03_2025-10-31.ndjson --quelle F03
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..db import get_conn
+from ..masterdata import MasterData, load_masterdata
+from .writer import RETRY_CODES, Receipt, _error_code, check_amounts, write_receipts
+
+BATCH = 1_000               # Belege pro Transaktion
+PROGRESS_EVERY_S = 2.0      # Fortschritt höchstens so oft melden
+MAX_ERRORS_SHOWN = 20       # so viele abgelehnte Belege mit Grund merken
+ER_DUP_ENTRY = 1062
+
+CSV_COLUMNS = ("beleg", "zeit", "kunde", "artikel", "menge", "preis", "rabatt")
+CSV_REQUIRED = ("beleg", "kunde", "artikel", "menge")
+
+
+class KeyIndex:
+    """Kunden- und Artikel-Schlüssel aus der Datei → IDs (+ Stammdaten für Preis/Rabatt)."""
+
+    def __init__(self, md: MasterData, kunden_by_email: Dict[str, int], artikel_by_name: Dict[str, int]):
+        self.md = md
+        self.kunden_by_email = kunden_by_email
+        self.artikel_by_name = artikel_by_name
+
+    @staticmethod
+    def _lookup(key, ids, by_name, what: str) -> int:
+        text = str(key).strip()
+        if text.isdigit() and int(text) in ids:
+            return int(text)
+        found = by_name.get(text.lower())
+        if found is None:
+            raise ValueError(f"unbekannter {what} {text!r}")
+        return found
+
+    def kunde(self, key) -> int:
+        return self._lookup(key, self.md.kunden, self.kunden_by_email, "Kunde")
+
+    def artikel(self, key) -> int:
+        return self._lookup(key, self.md.artikel, self.artikel_by_name, "Artikel")
+
+
+def load_index(cur) -> KeyIndex:
+    md = load_masterdata(cur)
+    cur.execute("SELECT LOWER(email), kundenID FROM kunden WHERE email IS NOT NULL")
+    kunden = {e: int(k) for e, k in cur.fetchall()}
+    cur.execute("SELECT LOWER(produktname), artikelID FROM artikel")
+    artikel = {n: int(a) for n, a in cur.fetchall()}
+    return KeyIndex(md, kunden, artikel)
+
+
+# ── Lesen ────────────────────────────────────────────────────────────────────
+
+def read_csv(lines: Iterable[str]) -> Iterator[dict]:
+    """CSV-Zeilen → Belege {"beleg", "zeit", "kunde", "positionen": [...]} (Positionen aufeinanderfolgend)."""
+    reader = csv.DictReader(lines)
+    missing = [c for c in CSV_REQUIRED if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV-Kopfzeile: Spalten fehlen {missing} (erwartet: {', '.join(CSV_COLUMNS)})")
+    current = None
+    for row in reader:
+        if current is None or row["beleg"] != current["beleg"]:
+            if current is not None:
+                yield current
+            current = {"beleg": row["beleg"], "zeit": row.get("zeit"), "kunde": row["kunde"], "positionen": []}
+        current["positionen"].append({
+            "artikel": row["artikel"], "menge": row["menge"],
+            "preis": row.get("preis") or None, "rabatt": row.get("rabatt") or None,
+        })
+    if current is not None:
+        yield current
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[dict]:
+    """Eine JSON-Zeile pro Beleg; kaputte Zeilen kommen als {"_fehler": …} zurück."""
+    for nr, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield {"_fehler": f"Zeile {nr}: kein gültiges JSON ({e})"}
+
+
+def resolve(raw: dict, index: KeyIndex) -> Tuple[str, Receipt]:
+    """
+    Rohbeleg → (beleg_key, (kundenID, Zeitpunkt, Positionen)). Fehler → ValueError.
+    Gleicher Artikel mehrfach: getrennte Positionen (Preis/Rabatt je Zeile bleiben erhalten).
+    """
+    if not isinstance(raw, dict):               # NDJSON-Zeile wie [1, 2] oder "text"
+        raise ValueError(f"Beleg muss ein JSON-Objekt sein, nicht {type(raw).__name__}")
+    if raw.get("_fehler"):
+        raise ValueError(raw["_fehler"])
+    key = str(raw.get("beleg") or "").strip()
+    if not key or len(key) > 100:
+        raise ValueError("beleg-Schlüssel fehlt oder ist länger als 100 Zeichen")
+    kunden_id = index.kunde(raw.get("kunde", ""))
+    when = datetime.fromisoformat(str(raw["zeit"])) if raw.get("zeit") else datetime.now()
+
+    positionen = raw.get("positionen") or []
+    if not isinstance(positionen, list):
+        raise ValueError("positionen muss eine Liste sein")
+    lines: List[Tuple[int, int, float, float]] = []
+    for p in positionen:
+        if not isinstance(p, dict):
+            raise ValueError(f"Position muss ein JSON-Objekt sein, nicht {type(p).__name__}")
+        artikel_id = index.artikel(p.get("artikel", ""))
+        try:
+            menge = int(p.get("menge"))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Artikel {artikel_id}: menge muss eine ganze Zahl sein")
+        if menge <= 0:
+            raise ValueError(f"Artikel {artikel_id}: menge muss > 0 sein")
+        preis = float(p["preis"]) if p.get("preis") not in (None, "") else index.md.artikel[artikel_id]
+        if preis is None:
+            raise ValueError(f"Artikel {artikel_id}: kein Preis in der Datei und kein Listenpreis")
+        rabatt = float(p["rabatt"]) if p.get("rabatt") not in (None, "") else index.md.kunden[kunden_id]
+        check_amounts(artikel_id, preis, rabatt)          # "inf"/"nan" → nur dieser Beleg abgelehnt
+        lines.append((artikel_id, menge, round(preis, 2), rabatt))
+    if not lines:
+        raise ValueError("Beleg ohne Positionen")
+    return key, (kunden_id, when, sorted(lines, key=lambda line: line[0]))
+
+
+# ── Schreiben ────────────────────────────────────────────────────────────────
+
+def _write_batch(conn, batch: List[Tuple[str, Receipt]], quelle: Optional[str], hot) -> Tuple[int, int, list]:
+    """Einen Block schreiben + commit. Gibt (gebucht, übersprungen, [(key, fehler), ...]) zurück."""
+    for attempt in range(4):
+        try:
+            with conn.cursor() as cur:
+                keys = [k for k, _ in batch]
+                cur.execute(f"SELECT beleg_key FROM verkauf_import WHERE beleg_key IN ({', '.join(['%s'] * len(keys))})",
+                            keys)
+                known = {r[0] for r in cur.fetchall()}
+                todo = [(k, r) for k, r in batch if k not in known]
+
+                results = write_receipts(cur, [r for _, r in todo], hot) if todo else []
+                now = datetime.now()
+                done = [(k, res["verkaufID"], quelle, now) for (k, _), res in zip(todo, results) if "verkaufID" in res]
+                if done:
+                    cur.executemany("INSERT INTO verkauf_import (beleg_key, verkaufID, quelle, importiert_am) "
+                                    "VALUES (%s, %s, %s, %s)", done)
+            conn.commit()
+            errors = [(k, res["fehler"]) for (k, _), res in zip(todo, results) if "fehler" in res]
+            return len(done), len(batch) - len(todo), errors
+        except Exception as e:
+            conn.rollback()
+            if _error_code(e) not in RETRY_CODES + (ER_DUP_ENTRY,) or attempt == 3:
+                raise
+            time.sleep(0.05 * (2 ** attempt))
+
+
+def import_stream(conn, raw_receipts: Iterable[dict], quelle: Optional[str] = None,
+                  batch_size: int = BATCH) -> Iterator[dict]:
+    """
+    Belege importieren; liefert unterwegs Fortschritts-Stände (höchstens alle PROGRESS_EVERY_S Sekunden)
+    und am Ende einen Stand mit "fertig": True.
+    """
+    with conn.cursor() as cur:
+        index = load_index(cur)
+    hot = index.md.hot
+    t0 = last = time.monotonic()
+    stats = {"gelesen": 0, "gebucht": 0, "uebersprungen": 0, "abgelehnt": 0, "fehler": [], "fertig": False}
+    batch: List[Tuple[str, Receipt]] = []
+    in_batch = set()
+
+    def snapshot():
+        elapsed = time.monotonic() - t0
+        return dict(stats, sekunden=round(elapsed, 1),
+                    belege_pro_s=round(stats["gebucht"] / elapsed, 1) if elapsed > 0 else 0.0)
+
+    def reject(key, reason):
+        stats["abgelehnt"] += 1
+        if len(stats["fehler"]) < MAX_ERRORS_SHOWN:
+            stats["fehler"].append({"beleg": key, "fehler": reason})
+
+    def flush():
+        gebucht, skipped, errors = _write_batch(conn, batch, quelle, hot)
+        stats["gebucht"] += gebucht
+        stats["uebersprungen"] += skipped
+        for key, reason in errors:
+            reject(key, reason)
+        batch.clear()
+        in_batch.clear()
+
+    for raw in raw_receipts:
+        stats["gelesen"] += 1
+        try:
+            key, receipt = resolve(raw, index)
+        except (ValueError, TypeError, KeyError) as e:
+            reject(raw.get("beleg") if isinstance(raw, dict) else None, str(e))
+            continue
+        if key in in_batch:
+            stats["uebersprungen"] += 1         # gleicher Beleg zweimal im selben Block
+            continue
+        batch.append((key, receipt))
+        in_batch.add(key)
+        if len(batch) >= batch_size:
+            flush()
+        if time.monotonic() - last >= PROGRESS_EVERY_S:
+            last = time.monotonic()
+            yield snapshot()
+
+    if batch:
+        flush()
+    stats["fertig"] = True
+    yield snapshot()
+
+
+def format_progress(p: dict) -> str:
+    text = (f"[{p['sekunden']:6.1f}s] gelesen={p['gelesen']}  gebucht={p['gebucht']}  "
+            f"übersprungen={p['uebersprungen']}  abgelehnt={p['abgelehnt']}  {p['belege_pro_s']:.0f} Belege/s")
+    if p["fertig"]:
+        text += "  fertig"
+        for e in p["fehler"]:
+            text += f"\n  ✗ {e['beleg']}: {e['fehler']}"
+    return text
+
+
+def detect_format(name: str, fmt: Optional[str] = None) -> str:
+    if fmt:
+        return fmt
+    return "ndjson" if name.lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Tagesabschluss-Datei der Kasse importieren (CSV oder NDJSON).")
+    p.add_argument("datei")
+    p.add_argument("--format", choices=("csv", "ndjson"), default=None, help="Standard: nach Dateiendung")
+    p.add_argument("--quelle", default=None, help="Filiale/Kasse (Standard: Dateiname)")
+    p.add_argument("--batch", type=int, default=BATCH, help="Belege pro Transaktion")
+    args = p.parse_args(argv)
+
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        sys.exit(1)
+
+    fmt = detect_format(args.datei, args.format)
+    try:
+        with open(args.datei, newline="", encoding="utf-8") as f:
+            rows = read_ndjson(f) if fmt == "ndjson" else read_csv(f)
+            for progress in import_stream(conn, rows, args.quelle or args.datei, args.batch):
+                print(format_progress(progress))
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Import abgebrochen (bereits gebuchte Blöcke bleiben, erneuter Start überspringt sie): {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+""" Schnittstelle für Kassen (JSON statt HTML-Seiten)
+POST /api/sales nimmt einen Beleg oder eine Liste von Belegen an.
+Anmeldung per Header X-API-Key (Wert aus der Umgebungsvariable POS_API_KEY);
+ohne POS_API_KEY ist die Schnittstelle abgeschaltet.
+
+Beleg:
+    {"kundenID": 12,
+     "zeit": "2025-10-31T14:05:00",                       (optional, Standard: jetzt)
+     "positionen": [{"artikelID": 5, "menge": 2,
+                     "preis": 3.49,                        (optional, Standard: Listenpreis)
+                     "rabatt": 5}]}                        (optional, Standard: Rabatt des Kundentyps)
+
+Kunden, Artikel und Preise werden gegen den Stammdaten-Cache (masterdata.py) geprüft.
+Geschrieben wird im Hintergrund mit Gruppen-Commit (writer.py); die Antwort enthält die verkaufIDs.
+Einstellungen: SALES_API_MAX_WAIT_MS (Standard 5), SALES_API_MAX_BATCH (Standard 200).
+
+POST /api/sales/import?format=csv|ndjson&quelle=F03 nimmt eine ganze Tagesabschluss-Datei als
+Anfrage-Body (gestreamt, siehe pos_import.py) und antwortet mit Fortschritts-Zeilen (NDJSON).
+"""
+
+import hmac
+import json
+import os
+import threading
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from ..db import get_conn
+from ..masterdata import masterdata
+from .pos_import import import_stream, read_csv, read_ndjson
+from .writer import GroupCommitWriter, check_amounts
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+MAX_WAIT_MS = float(os.getenv("SALES_API_MAX_WAIT_MS", "5"))
+MAX_BATCH = int(os.getenv("SALES_API_MAX_BATCH", "200"))
+MAX_RECEIPTS = 1000         # Belege pro Anfrage
+MAX_LINES = 500             # Positionen pro Beleg
+WRITE_TIMEOUT_S = 10.0
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> GroupCommitWriter:
+    """Schreib-Thread beim ersten Aufruf starten (einer pro Prozess)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = GroupCommitWriter(MAX_WAIT_MS, MAX_BATCH, hot=lambda: masterdata.get().hot)
+    return _writer
+
+
+def _check_api_key():
+    """None, wenn der Schlüssel passt – sonst eine Fehler-Antwort."""
+    expected = os.getenv("POS_API_KEY")
+    if not expected:
+        return jsonify({"fehler": "API nicht aktiviert (POS_API_KEY fehlt)"}), 503
+    given = request.headers.get("X-API-Key", "")
+    if not hmac.compare_digest(given.encode(), expected.encode()):
+        return jsonify({"fehler": "ungültiger API-Schlüssel"}), 401
+    return None
+
+
+def parse_receipt(raw, md):
+    """
+    Einen Beleg prüfen → (kundenID, Zeitpunkt, [(artikelID, menge, preis, rabatt), ...]).
+    Gleicher Artikel mehrfach → getrennte Positionen (eigener Preis/Rabatt). Fehler → ValueError mit Text.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Beleg muss ein JSON-Objekt sein")
+    try:
+        kunden_id = int(raw.get("kundenID"))
+    except (TypeError, ValueError):
+        raise ValueError("kundenID fehlt oder ist keine Zahl")
+    if kunden_id not in md.kunden:
+        raise ValueError(f"unbekannter Kunde {kunden_id}")
+
+    when = datetime.now()
+    if raw.get("zeit"):
+        try:
+            when = datetime.fromisoformat(str(raw["zeit"]))
+        except ValueError:
+            raise ValueError("zeit muss ISO-Format haben, z. B. 2025-10-31T14:05:00")
+
+    positionen = raw.get("positionen")
+    if not isinstance(positionen, list) or not positionen:
+        raise ValueError("positionen fehlt oder ist leer")
+    if len(positionen) > MAX_LINES:
+        raise ValueError(f"höchstens {MAX_LINES} Positionen pro Beleg")
+
+    lines = []
+    for p in positionen:
+        try:
+            artikel_id = int(p["artikelID"])
+            menge = int(p["menge"])
+        except (TypeError, KeyError, ValueError, OverflowError):
+            raise ValueError("Position braucht artikelID und menge (ganze Zahlen)")
+        if artikel_id not in md.artikel:
+            raise ValueError(f"unbekannter Artikel {artikel_id}")
+        if menge <= 0:
+            raise ValueError(f"Artikel {artikel_id}: menge muss > 0 sein")
+        try:
+            preis = float(p["preis"]) if p.get("preis") is not None else md.artikel[artikel_id]
+            rabatt = float(p["rabatt"]) if p.get("rabatt") is not None else md.kunden[kunden_id]
+        except (TypeError, ValueError):
+            raise ValueError(f"Artikel {artikel_id}: preis/rabatt müssen Zahlen sein")
+        if preis is None:
+            raise ValueError(f"Artikel {artikel_id}: kein gültiger Listenpreis")
+        check_amounts(artikel_id, preis, rabatt)          # auch "inf"/"nan"/1e999
+        lines.append((artikel_id, menge, round(preis, 2), rabatt))
+
+    return kunden_id, when, sorted(lines, key=lambda line: line[0])
+
+
+@api_bp.post("/sales")
+def post_sales():
+    denied = _check_api_key()
+    if denied:
+        return denied
+
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({"fehler": "JSON erwartet"}), 400
+    single = not isinstance(data, list)
+    raw_receipts = [data] if single else data
+    if not raw_receipts:
+        return jsonify({"fehler": "keine Belege"}), 400
+    if len(raw_receipts) > MAX_RECEIPTS:
+        return jsonify({"fehler": f"höchstens {MAX_RECEIPTS} Belege pro Anfrage"}), 413
+
+    # Prüfen gegen den Stammdaten-Cache – ein fehlerhafter Beleg → ganze Anfrage abgelehnt
+    md = masterdata.get()
+    receipts, errors = [], []
+    for i, raw in enumerate(raw_receipts):
+        try:
+            receipts.append(parse_receipt(raw, md))
+        except ValueError as e:
+            errors.append({"index": i, "fehler": str(e)})
+    if errors:
+        return jsonify({"fehler": "ungültige Belege", "details": errors}), 400
+
+    try:
+        results = get_writer().submit(receipts, timeout=WRITE_TIMEOUT_S)
+    except TimeoutError as e:
+        return jsonify({"fehler": str(e)}), 503     # nichts gebucht → Client darf dieselben Belege erneut senden
+
+    if single:
+        result = results[0]
+        return jsonify(result), (201 if "verkaufID" in result else 409)
+    ok = sum(1 for r in results if "verkaufID" in r)
+    return jsonify({"gespeichert": ok, "abgelehnt": len(results) - ok, "ergebnisse": results}), 200
+
+
+@api_bp.post("/sales/import")
+def post_sales_import():
+    denied = _check_api_key()
+    if denied:
+        return denied
+
+    fmt = request.args.get("format") or ("ndjson" if "json" in (request.content_type or "") else "csv")
+    if fmt not in ("csv", "ndjson"):
+        return jsonify({"fehler": "format muss csv oder ndjson sein"}), 400
+    conn = get_conn()
+    if not conn:
+        return jsonify({"fehler": "Keine Verbindung zur Datenbank"}), 503
+
+    # Body wird zeilenweise gelesen, während die Antwort schon läuft
+    text = (line.decode("utf-8-sig") for line in request.stream)
+    rows = read_ndjson(text) if fmt == "ndjson" else read_csv(text)
+
+    def generate():
+        try:
+            for progress in import_stream(conn, rows, request.args.get("quelle")):
+                yield json.dumps(progress, ensure_ascii=False) + "\n"
+        except Exception as e:
+            conn.rollback()
+            yield json.dumps({"fehler": str(e), "fertig": True}, ensure_ascii=False) + "\n"
+        finally:
+            conn.close()
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
@@ -0,0 +1,247 @@
+"""
+Hintergrund-Schreiber für /api/sales mit Gruppen-Commit.
+
+Jede Anfrage legt ihre Belege in eine Warteschlange und wartet auf das Ergebnis.
+Ein Thread mit eigener DB-Verbindung sammelt Belege, bis entweder max_batch Belege
+beisammen sind oder max_wait_ms seit dem ersten Beleg vergangen sind, und schreibt sie
+in EINER Transaktion (ein Commit = ein Log-Flush für viele Belege statt einer pro Anfrage):
+
+  1) alle Nicht-Hot-Artikel der Gruppe mit EINEM SELECT … FOR UPDATE in artikelID-Reihenfolge sperren
+  2) Bestand Beleg für Beleg in Python abziehen → Belege ohne genug Bestand werden abgelehnt,
+     die anderen trotzdem geschrieben
+  3) pro Beleg: SAVEPOINT, Kopf einfügen, alle Positionen mit einem mehrzeiligen INSERT
+     (scheitert ein Beleg im Trigger oder an seinen Daten, z. B. Hot-Artikel leer oder Wert außerhalb
+     der Spalte → nur dieser Beleg wird zurückgerollt)
+  4) commit → verkaufIDs an die wartenden Anfragen
+Bei Deadlock/Lock-Timeout (1213/1205) wird die ganze Gruppe wiederholt, bei Verbindungsfehlern abgebrochen.
+
+Zeitüberschreitung: Eine Anfrage, die aufgibt, bevor der Schreiber ihre Belege übernommen hat, wird
+als abgebrochen markiert und nie geschrieben → 503 heißt „nichts gebucht“, der Client darf wiederholen.
+Hat der Schreiber sie schon übernommen, wartet die Anfrage auf das Ergebnis (Commit läuft bereits).
+"""
+
+import math
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import pymysql
+
+from ..db import get_conn
+from ..dialect import for_update
+
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+RETRY_CODES = (ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK)
+MAX_RETRIES = 3
+# Server beendet/unterbricht die Verbindung (Client-Fehler 2000–2999 kommen dazu) → ganze Gruppe
+CONNECTION_CODES = (1053, 1317, 1927, 4031)
+MAX_PREIS = 99_999_999.99   # verkaufspreis DECIMAL(10,2)
+
+# Geprüfter Beleg: (kundenID, Zeitpunkt, [(artikelID, menge, preis, rabatt), ...])
+Receipt = Tuple[int, datetime, List[Tuple[int, int, float, float]]]
+
+
+def _error_code(e: Exception) -> Optional[int]:
+    args = getattr(e, "args", ())
+    return args[0] if args and isinstance(args[0], int) else None
+
+
+def _group_error(e: Exception) -> bool:
+    """True: Fehler betrifft die ganze Transaktion (Sperre, Verbindung, kein DB-Fehler) statt eines Belegs."""
+    code = _error_code(e)
+    if not isinstance(e, pymysql.err.Error) or isinstance(e, pymysql.err.InterfaceError):
+        return True
+    return code in RETRY_CODES or code in CONNECTION_CODES or (code is not None and 2000 <= code < 3000)
+
+
+def check_amounts(artikel_id: int, preis: float, rabatt: float) -> None:
+    """Preis und Rabatt einer Position: endlich und im Bereich der Spalten (inf/nan → ValueError)."""
+    if not math.isfinite(preis) or not 0 <= preis <= MAX_PREIS:
+        raise ValueError(f"Artikel {artikel_id}: preis muss zwischen 0 und {MAX_PREIS:.2f} liegen")
+    if not math.isfinite(rabatt) or not 0 <= rabatt <= 100:
+        raise ValueError(f"Artikel {artikel_id}: rabatt muss zwischen 0 und 100 liegen")
+
+
+def write_receipts(cur, receipts: List[Receipt], hot: FrozenSet[int] = frozenset()) -> List[dict]:
+    """
+    Belege in der laufenden Transaktion schreiben (ohne commit), Schritte 1–3 oben.
+    Gibt pro Beleg {"verkaufID": …, "positionen": …, "summe": …} oder {"fehler": …} zurück.
+    Wird auch vom Tagesabschluss-Import (pos_import.py) benutzt.
+    """
+    ids = sorted({a for _, _, lines in receipts for a, _, _, _ in lines if a not in hot})
+    stock: Dict[int, int] = {}
+    if ids:
+        cur.execute(f"""
+            SELECT artikelID, COALESCE(lagerbestand, 0)
+            FROM artikel
+            WHERE artikelID IN ({', '.join(['%s'] * len(ids))})
+            ORDER BY artikelID{for_update()}
+        """, ids)
+        stock = {int(a): int(b) for a, b in cur.fetchall()}
+
+    results: List[dict] = []
+    for kunden_id, when, lines in receipts:
+        wanted: Dict[int, int] = {}                     # Summe je Artikel (Artikel kann mehrfach vorkommen)
+        for a, menge, _, _ in lines:
+            if a not in hot:
+                wanted[a] = wanted.get(a, 0) + menge
+        short = [a for a, menge in wanted.items() if stock.get(a, 0) < menge]
+        if short:
+            results.append({"fehler": "Nicht genug Lagerbestand", "artikel": short})
+            continue
+
+        cur.execute("SAVEPOINT beleg")
+        try:
+            cur.execute("INSERT INTO verkauf (kundenID, verkaufsdatum) VALUES (%s, %s)", (kunden_id, when))
+            verkauf_id = cur.lastrowid
+            cur.executemany("""
+                INSERT INTO verkaufartikel (verkaufID, artikelID, verkaufsmenge, verkaufspreis, rabatt)
+                VALUES (%s, %s, %s, %s, %s)
+            """, [(verkauf_id, a, m, p, r) for a, m, p, r in lines])
+        except Exception as e:
+            if _group_error(e):
+                raise                   # Deadlock, Verbindung usw. → ganze Gruppe
+            cur.execute("ROLLBACK TO SAVEPOINT beleg")  # Trigger (1644), Daten-/Schlüsselfehler → nur dieser Beleg
+            results.append({"fehler": str(e.args[1]) if len(e.args) > 1 else str(e)})
+            continue
+
+        for a, menge, _, _ in lines:
+            if a not in hot:
+                stock[a] -= menge
+        results.append({
+            "verkaufID": verkauf_id,
+            "positionen": len(lines),
+            "summe": round(sum(m * p for _, m, p, _ in lines), 2),
+        })
+    return results
+
+
+class _Job:
+    """Belege einer Anfrage + Ergebnis, auf das die Anfrage wartet."""
+
+    __slots__ = ("receipts", "results", "done", "_lock", "_state")
+
+    def __init__(self, receipts: List[Receipt]):
+        self.receipts = receipts
+        self.results: List[dict] = []
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._state = "wartet"          # → "schreibt" (Schreiber) oder "abgebrochen" (Anfrage)
+
+    def claim(self) -> bool:
+        """Vom Schreib-Thread vor dem Schreiben: False, wenn die Anfrage schon aufgegeben hat."""
+        with self._lock:
+            if self._state == "abgebrochen":
+                return False
+            self._state = "schreibt"
+            return True
+
+    def abandon(self) -> bool:
+        """Von der Anfrage nach Zeitüberschreitung: False, wenn der Schreiber die Belege schon hat."""
+        with self._lock:
+            if self._state != "wartet":
+                return False
+            self._state = "abgebrochen"
+            return True
+
+
+class GroupCommitWriter:
+    """
+    writer = GroupCommitWriter(max_wait_ms=5, max_batch=200, hot=lambda: frozenset())
+    results = writer.submit([receipt, ...])   # [{"verkaufID": …} | {"fehler": …}, ...]
+    hot = Funktion, die die aktuellen Hot-Artikel liefert (werden nicht vorab gesperrt).
+    """
+
+    def __init__(self, max_wait_ms: float = 5.0, max_batch: int = 200, hot=frozenset):
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self.hot = hot
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._conn = None
+        self._thread = threading.Thread(target=self._run, name="sales-writer", daemon=True)
+        self._thread.start()
+        # Kennzahlen (nur vom Schreib-Thread geändert)
+        self.groups = 0
+        self.receipts = 0
+
+    def submit(self, receipts: List[Receipt], timeout: float = 10.0) -> List[dict]:
+        """
+        Belege einreihen und auf das Ergebnis warten.
+        TimeoutError, wenn der Schreiber nicht nachkommt – dann ist garantiert nichts gebucht.
+        """
+        job = _Job(receipts)
+        self._queue.put(job)
+        if not job.done.wait(timeout):
+            if job.abandon():
+                raise TimeoutError("Schreibvorgang nicht rechtzeitig begonnen – nichts gebucht")
+            job.done.wait()             # schon übernommen → Ergebnis der laufenden Transaktion abwarten
+        return job.results
+
+    # ── Schreib-Thread ────────────────────────────────────────────────────────
+
+    def _collect(self) -> List[_Job]:
+        """Erste Anfrage abwarten, dann bis max_wait / max_batch weitere dazunehmen."""
+        jobs = [self._queue.get()]
+        count = len(jobs[0].receipts)
+        deadline = time.monotonic() + self.max_wait
+        while count < self.max_batch:
+            rest = deadline - time.monotonic()
+            if rest <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=rest)
+            except queue.Empty:
+                break
+            jobs.append(job)
+            count += len(job.receipts)
+        return jobs
+
+    def _connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.ping(reconnect=True)
+                return self._conn
+            except Exception:
+                self._conn = None
+        self._conn = get_conn()
+        if self._conn is None:
+            raise RuntimeError("Keine Verbindung zur Datenbank")
+        return self._conn
+
+    def _run(self) -> None:
+        while True:
+            jobs = [job for job in self._collect() if job.claim()]     # aufgegebene Anfragen auslassen
+            if not jobs:
+                continue
+            receipts = [r for job in jobs for r in job.receipts]
+            try:
+                results = self._write_with_retry(receipts)
+            except Exception as e:
+                results = [{"fehler": f"Schreibfehler: {e}"}] * len(receipts)
+            i = 0
+            for job in jobs:
+                job.results = results[i:i + len(job.receipts)]
+                i += len(job.receipts)
+                job.done.set()
+
+    def _write_with_retry(self, receipts: List[Receipt]) -> List[dict]:
+        for attempt in range(MAX_RETRIES + 1):
+            conn = self._connection()
+            try:
+                with conn.cursor() as cur:
+                    results = write_receipts(cur, receipts, self.hot())
+                conn.commit()
+                self.groups += 1
+                self.receipts += sum(1 for r in results if "verkaufID" in r)
+                return results
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    self._conn = None       # Verbindung kaputt → beim nächsten Mal neu
+                if _error_code(e) not in RETRY_CODES or attempt == MAX_RETRIES:
+                    raise
+                time.sleep(0.01 * (2 ** attempt))
@@ -7,9 +7,10 @@ sollen nur auth_bp und init_auth sichtbar sein.“
 # Importiert aus der Datei routes.py:
 # - auth_bp: das "Blueprint"-Objekt (enthält alle Routen für Login usw.)
 # - init_auth: eine Funktion, um das Authentifizierungssystem zu initialisieren
-from .routes import auth_bp, init_auth
+# - admin_required: Decorator für Seiten, die nur Administratoren sehen dürfen
+from .routes import admin_required, auth_bp, init_auth
 
 # __all__ gibt an, welche Namen exportiert werden dürfen,
 # wenn man "from auth import *" benutzt.
-# Nur diese beiden Elemente sind dann sichtbar.
-__all__ = ["auth_bp", "init_auth"]
+# Nur diese Elemente sind dann sichtbar.
+__all__ = ["auth_bp", "init_auth", "admin_required"]
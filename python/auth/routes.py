@@ -9,9 +9,10 @@ Beim Logout wird diese Session beendet.
 
 # Hilfsfunktionen für URLs (z. B. um sichere Weiterleitungen zu prüfen)
 from urllib.parse import urlparse, urljoin
+from functools import wraps
 
 # Flask-Basismodule für Webseiten, Weiterleitungen und Formulare
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort
 
 # Flask-Login – Modul für Benutzer-Anmeldung (Session-Verwaltung)
 from flask_login import (
@@ -158,3 +159,15 @@ def logout():
     logout_user()  # beendet die Session
     flash("Abgemeldet.", "info")
     return redirect(url_for("auth.login"))   # zurück zur Login-Seite
+
+
+#  7) Nur für Administratoren (users.role = 'admin')
+# Nicht eingeloggt → Login-Seite (wie login_required); eingeloggt ohne Admin-Rolle → 403.
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if getattr(current_user, "role", None) != "admin":
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,3 @@
+# python/bench/__init__.py
+# Benchmarks (Messungen gegen eine lokale Testdatenbank, nicht für den Betrieb)
+__all__ = []
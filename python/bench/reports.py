@@ -0,0 +1,427 @@
+"""
+Benchmark der Berichtsseiten (/reports/daily, /customers, /articles, /pareto, /turnover, /stock_low).
+
+Ablauf pro Datenmenge (--scale 1,10,…):
+  1) optional Testdaten erzeugen (--seed-db: generate_history --scale N, LÖSCHT alle Bewegungen!)
+  2) Testbenutzer anlegen/aktualisieren und über /login anmelden (Flask-Testclient, kein Server nötig);
+     nach dem Lauf wird er wieder gesperrt (is_active = 0)
+  3) jede Seite mit einer Parameter-Matrix aufrufen (grp, Filter, top, kurze und lange Zeiträume):
+     erst --warmup Aufrufe, dann --repeat gemessene Aufrufe, zuletzt einer mit tracemalloc (Spitzen-Speicher;
+     eigener Aufruf, weil tracemalloc die Laufzeit verfälscht)
+  4) Ergebnis als JSON (--out), optional Vergleich mit einer gespeicherten Basis (--baseline)
+
+Gemessen pro Fall: Latenz p50/p90/p99/Mittel, davon Zeit in der DB (execute + fetch),
+Zeit im Template (render_template) und der Rest (Python im View, Flask).
+
+Start:
+    python -m python.bench.reports --out bench_ist.json
+    python -m python.bench.reports --seed-db --scale 1,10 --out bench_neu.json --baseline bench_basis.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import secrets
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import before_render_template, template_rendered
+from werkzeug.security import generate_password_hash
+
+from ..db import get_conn
+from ..dialect import upsert
+from ..reports import routes as report_routes
+
+BENCH_EMAIL = "bench@example.com"
+REPEAT = 10                 # gemessene Aufrufe pro Fall
+WARMUP = 2                  # ungemessene Aufrufe vorher (Caches, Query-Plan)
+REGRESSION = 0.20           # --baseline: p50 mehr als 20 % langsamer → Regression
+MIN_DIFF_MS = 2.0           # kleinere Unterschiede sind Rauschen
+PYTHON_DIR = Path(__file__).resolve().parents[1]
+
+
+# ── Zeitmessung DB / Template ────────────────────────────────────────────────
+
+class Timer:
+    """Summiert DB- und Template-Zeit des laufenden Aufrufs (Testclient → alles im selben Thread)."""
+
+    def __init__(self):
+        self.db = 0.0
+        self.render = 0.0
+        self._render_start: Optional[float] = None
+
+    def reset(self) -> None:
+        self.db = self.render = 0.0
+
+    def on_before_render(self, *_args, **_kw) -> None:
+        self._render_start = time.perf_counter()
+
+    def on_rendered(self, *_args, **_kw) -> None:
+        if self._render_start is not None:
+            self.render += time.perf_counter() - self._render_start
+            self._render_start = None
+
+
+class _TimedCursor:
+    def __init__(self, cur, timer: Timer):
+        self._cur = cur
+        self._timer = timer
+
+    def _timed(self, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._timer.db += time.perf_counter() - t0
+
+    def execute(self, *args):
+        return self._timed(self._cur.execute, *args)
+
+    def fetchone(self):
+        return self._timed(self._cur.fetchone)
+
+    def fetchall(self):
+        return self._timed(self._cur.fetchall)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cur.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
+
+
+class _TimedConnection:
+    def __init__(self, conn, timer: Timer):
+        self._conn = conn
+        self._timer = timer
+
+    def cursor(self, *args):
+        return _TimedCursor(self._conn.cursor(*args), self._timer)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def install_timer(app) -> Timer:
+    """get_conn der Berichts-Routen durch eine messende Variante ersetzen + Template-Signale verbinden."""
+    timer = Timer()
+
+    def timed(original):
+        def timed_get_conn(*args, **extra):
+            t0 = time.perf_counter()
+            conn = original(*args, **extra)
+            timer.db += time.perf_counter() - t0
+            return _TimedConnection(conn, timer) if conn else conn
+        return timed_get_conn
+
+    report_routes.get_conn = timed(report_routes.get_conn)
+    report_routes.get_report_conn = timed(report_routes.get_report_conn)   # MySQL oder DuckDB (analytics.py)
+    before_render_template.connect(timer.on_before_render, app, weak=False)
+    template_rendered.connect(timer.on_rendered, app, weak=False)
+    return timer
+
+
+# ── Testdaten und Anmeldung ──────────────────────────────────────────────────
+
+def seed_database(scale: int, seed: int) -> None:
+    """generate_history mit --scale in einem eigenen Prozess (löscht alle Bewegungsdaten)."""
+    cmd = [sys.executable, "-m", "generators.generate_history", "--scale", str(scale), "--seed", str(seed)]
+    print(f"• Testdaten erzeugen: {' '.join(cmd[2:])}")
+    subprocess.run(cmd, cwd=PYTHON_DIR, check=True)
+
+
+def ensure_bench_user(conn) -> str:
+    """Testbenutzer (viewer) mit neuem Zufallspasswort anlegen bzw. aktualisieren. Gibt das Passwort zurück."""
+    password = secrets.token_urlsafe(16)
+    with conn.cursor() as cur:
+        cur.execute(upsert("users", ("email", "name", "password_hash", "role", "is_active"), ("email",),
+                           ("password_hash", "is_active")),
+                    (BENCH_EMAIL, "Benchmark", generate_password_hash(password), "viewer", 1))
+    conn.commit()
+    return password
+
+
+def disable_bench_user() -> None:
+    """Testbenutzer nach dem Lauf sperren – kein aktives Konto mit bekanntem Namen, das liegen bleibt."""
+    conn = get_conn()
+    if not conn:
+        return
+    try:
+        with conn.cursor() as cur:
+            cur.execute("UPDATE users SET is_active = 0 WHERE email = %s", (BENCH_EMAIL,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def data_profile(conn) -> dict:
+    """Größe der Daten (zum Einordnen der Zahlen) + Zeitraum der Verkäufe."""
+    profile = {}
+    with conn.cursor() as cur:
+        for table in ("kunden", "artikel", "verkauf", "verkaufartikel", "einkaufartikel"):
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            profile[table] = int(cur.fetchone()[0])
+        cur.execute("SELECT MIN(verkaufsdatum), MAX(verkaufsdatum) FROM verkauf")
+        first, last = cur.fetchone()
+    profile["von"] = (first or datetime.now()).date().isoformat()
+    profile["bis"] = (last or datetime.now()).date().isoformat()
+    return profile
+
+
+def sample_ids(conn) -> dict:
+    """Ein paar IDs für Filter-Fälle: Top-Artikel, ein Kundentyp, einige Kunden."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT artikelID FROM verkaufartikel
+            GROUP BY artikelID ORDER BY SUM(verkaufsmenge) DESC LIMIT 5
+        """)
+        artikel = [str(r[0]) for r in cur.fetchall()]
+        cur.execute("SELECT MIN(kundentypID) FROM kundentyp")
+        kundentyp = cur.fetchone()[0]
+        cur.execute("SELECT kundenID FROM kunden ORDER BY kundenID LIMIT 10")
+        kunden = [str(r[0]) for r in cur.fetchall()]
+    return {"artikel": artikel, "kundentyp": str(kundentyp) if kundentyp is not None else None, "kunden": kunden}
+
+
+# ── Parameter-Matrix ─────────────────────────────────────────────────────────
+
+def periods(profile: dict) -> Dict[str, Tuple[str, str]]:
+    """Kurzer, mittlerer und ganzer Zeitraum – gemessen vom letzten Verkaufstag aus."""
+    bis = date.fromisoformat(profile["bis"])
+    return {
+        "30t": ((bis - timedelta(days=30)).isoformat(), bis.isoformat()),
+        "365t": ((bis - timedelta(days=365)).isoformat(), bis.isoformat()),
+        "alles": (profile["von"], bis.isoformat()),
+    }
+
+
+def build_cases(profile: dict, ids: dict) -> List[Tuple[str, dict]]:
+    """(Pfad, Parameter) für alle Fälle; Listenwerte werden als mehrfacher Parameter geschickt."""
+    cases: List[Tuple[str, dict]] = []
+    per = periods(profile)
+    top_artikel = ids["artikel"][:1]
+
+    for von, bis in per.values():
+        for grp in ("day", "month", "quarter", "year"):      # day + alles = längste Tabelle/Grafik
+            cases.append(("/reports/daily", {"von": von, "bis": bis, "grp": grp}))
+        if ids["kundentyp"]:
+            cases.append(("/reports/daily", {"von": von, "bis": bis, "grp": "month", "kundentypen": [ids["kundentyp"]]}))
+        if ids["artikel"]:
+            cases.append(("/reports/daily", {"von": von, "bis": bis, "grp": "day", "artikel": ids["artikel"]}))
+
+        for top in (20, 100):
+            cases.append(("/reports/customers", {"von": von, "bis": bis, "top": top}))
+            cases.append(("/reports/articles", {"von": von, "bis": bis, "grp": "items", "top": top}))
+        if ids["kunden"]:
+            cases.append(("/reports/customers", {"von": von, "bis": bis, "kunden": ids["kunden"]}))
+        if top_artikel:
+            for grp in ("day", "month"):
+                cases.append(("/reports/articles", {"von": von, "bis": bis, "grp": grp, "artikel": top_artikel}))
+
+        for by in ("artikel", "kunde", "kundentyp"):
+            for k in ("umsatz", "marge"):
+                cases.append(("/reports/pareto", {"von": von, "bis": bis, "by": by, "k": k}))
+
+    cases.append(("/reports/turnover", {}))
+    cases.append(("/reports/stock_low", {}))
+    cases.append(("/reports/stock_low", {"limit": 3000}))
+    return cases
+
+
+def case_key(path: str, params: dict) -> str:
+    """Stabiler Schlüssel für den Vergleich mit der Basis (ohne konkrete Daten → über Läufe vergleichbar)."""
+    parts = []
+    for k in sorted(params):
+        v = params[k]
+        if k in ("von", "bis"):
+            continue
+        parts.append(f"{k}={len(v)}x" if isinstance(v, list) else f"{k}={v}")
+    return f"{path}?{'&'.join(parts)}"
+
+
+def period_label(profile: dict, params: dict) -> Optional[str]:
+    for name, (von, bis) in periods(profile).items():
+        if params.get("von") == von and params.get("bis") == bis:
+            return name
+    return None
+
+
+# ── Messen ───────────────────────────────────────────────────────────────────
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """q-Quantil (0..1) einer sortierten Liste (nächster Rang)."""
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+def measure(client, timer: Timer, path: str, params: dict, repeat: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        client.get(path, query_string=params)
+
+    total, db, render = [], [], []
+    status, size = None, 0
+    for _ in range(repeat):
+        timer.reset()
+        t0 = time.perf_counter()
+        resp = client.get(path, query_string=params)
+        total.append(time.perf_counter() - t0)
+        db.append(timer.db)
+        render.append(timer.render)
+        status, size = resp.status_code, len(resp.get_data())
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        client.get(path, query_string=params)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    total_sorted = sorted(total)
+    ms = lambda values: round(1000 * sum(values) / len(values), 2)
+    return {
+        "status": status,
+        "bytes": size,
+        "n": repeat,
+        "p50_ms": round(1000 * percentile(total_sorted, 0.50), 2),
+        "p90_ms": round(1000 * percentile(total_sorted, 0.90), 2),
+        "p99_ms": round(1000 * percentile(total_sorted, 0.99), 2),
+        "mittel_ms": ms(total),
+        "db_ms": ms(db),
+        "render_ms": ms(render),
+        "rest_ms": round(ms(total) - ms(db) - ms(render), 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_scale(app, timer: Timer, label: str, repeat: int, warmup: int, only: Optional[List[str]]) -> dict:
+    conn = get_conn()
+    if not conn:
+        raise RuntimeError("Keine Verbindung zur Datenbank")
+    try:
+        password = ensure_bench_user(conn)
+        profile = data_profile(conn)
+        ids = sample_ids(conn)
+    finally:
+        conn.close()
+    print(f"• Daten [{label}]: " + ", ".join(f"{k}={v}" for k, v in profile.items()))
+
+    results = []
+    try:
+        with app.test_client() as client:
+            resp = client.post("/login", data={"email": BENCH_EMAIL, "password": password})
+            if resp.status_code != 302:
+                raise RuntimeError(f"Anmeldung als {BENCH_EMAIL} fehlgeschlagen (Status {resp.status_code})")
+
+            for path, params in build_cases(profile, ids):
+                if only and not any(path.endswith("/" + o) for o in only):
+                    continue
+                r = measure(client, timer, path, params, repeat, warmup)
+                r.update(route=path, key=case_key(path, params), zeitraum=period_label(profile, params),
+                         params=params)
+                results.append(r)
+                print(f"  {r['key']:<58} {r['zeitraum'] or '':>6}  p50 {r['p50_ms']:8.1f} ms  "
+                      f"db {r['db_ms']:8.1f}  render {r['render_ms']:7.1f}  peak {r['peak_kb']:8.0f} KB"
+                      + ("" if r["status"] == 200 else f"  Status {r['status']}"))
+    finally:
+        disable_bench_user()
+    return {"scale": label, "daten": profile, "ergebnisse": results}
+
+
+# ── Vergleich mit Basis ──────────────────────────────────────────────────────
+
+def compare(current: dict, baseline: dict, threshold: float = REGRESSION) -> List[dict]:
+    """Fälle, deren p50 gegenüber der Basis um mehr als threshold (und MIN_DIFF_MS) gestiegen ist."""
+    base = {(s["scale"], r["key"], r["zeitraum"]): r for s in baseline["laeufe"] for r in s["ergebnisse"]}
+    regressions = []
+    print(f"\n{'Fall':<58} {'Zeitraum':>8} {'Basis p50':>10} {'jetzt p50':>10} {'Faktor':>7}")
+    for s in current["laeufe"]:
+        for r in s["ergebnisse"]:
+            old = base.get((s["scale"], r["key"], r["zeitraum"]))
+            if not old:
+                continue
+            factor = r["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+            flag = factor > 1 + threshold and r["p50_ms"] - old["p50_ms"] > MIN_DIFF_MS
+            print(f"{r['key']:<58} {r['zeitraum'] or '':>8} {old['p50_ms']:10.1f} {r['p50_ms']:10.1f} "
+                  f"{factor:6.2f}x" + ("  ⚠️" if flag else ""))
+            if flag:
+                regressions.append({"scale": s["scale"], "key": r["key"], "zeitraum": r["zeitraum"],
+                                    "basis_ms": old["p50_ms"], "jetzt_ms": r["p50_ms"]})
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PYTHON_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Berichtsseiten bei verschiedenen Datenmengen messen.")
+    p.add_argument("--scale", default=None,
+                   help="Datenmengen, z. B. 1,10 (nur mit --seed-db; sonst werden die vorhandenen Daten gemessen)")
+    p.add_argument("--seed-db", action="store_true",
+                   help="vor jeder Datenmenge generate_history --scale N ausführen (löscht alle Bewegungsdaten!)")
+    p.add_argument("--seed", type=int, default=42, help="Zufalls-Seed für --seed-db")
+    p.add_argument("--repeat", type=int, default=REPEAT)
+    p.add_argument("--warmup", type=int, default=WARMUP)
+    p.add_argument("--only", default=None, help="nur diese Seiten, z. B. daily,pareto")
+    p.add_argument("--out", default=None, help="Ergebnis als JSON speichern")
+    p.add_argument("--baseline", default=None, help="mit diesem JSON vergleichen (Exit-Code 1 bei Regression)")
+    p.add_argument("--threshold", type=float, default=REGRESSION, help="erlaubte Verlangsamung (0.2 = 20 %%)")
+    args = p.parse_args(argv)
+
+    if args.scale and not args.seed_db:
+        p.error("--scale braucht --seed-db (die Datenbank wird dafür neu befüllt)")
+    scales = [int(s) for s in args.scale.split(",")] if args.scale else [None]
+    only = args.only.split(",") if args.only else None
+
+    from ..dashboard import create_app      # erst hier: baut die ganze App mit allen Blueprints
+    app = create_app(warmup="off")          # eigenes Aufwärmen (--warmup), kein Hintergrund-Thread
+    app.config.update(TESTING=True)
+    timer = install_timer(app)
+
+    result = {
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "db": os.getenv("DB_NAME"),
+        "repeat": args.repeat,
+        "laeufe": [],
+    }
+    for scale in scales:
+        if scale is not None:
+            seed_database(scale, args.seed)
+        label = f"{scale}x" if scale is not None else "ist"
+        result["laeufe"].append(run_scale(app, timer, label, args.repeat, args.warmup, only))
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n• Ergebnis gespeichert: {args.out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.threshold)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} Fälle langsamer als Basis (> {args.threshold:.0%})")
+            sys.exit(1)
+        print("\n• Keine Regression gegenüber der Basis")
+
+
+if __name__ == "__main__":
+    main()
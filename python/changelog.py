@@ -0,0 +1,225 @@
+"""
+Änderungsprotokoll lesen (sql/changelog.sql): Konsumenten mit dauerhaftem Stand pro Name.
+
+Die Trigger schreiben jede Änderung an verkauf, verkaufartikel, einkauf, einkaufartikel, artikel
+und artikelpreis in derselben Transaktion nach changelog. Ein Konsument liest ab seinem Stand
+(changelog_offset) weiter, verarbeitet nur die neuen Änderungen und speichert danach den Stand:
+
+    consumer = ChangeConsumer(conn, "umsatz_tag", tables=["verkauf", "verkaufartikel"])
+    changes = consumer.poll()
+    for c in changes:
+        if c.op == "R":
+            ...                     # Bulk-Lauf: Tabelle c.tabelle komplett neu lesen
+        else:
+            ...                     # nur c.pk / c.artikelID / c.belegID nacharbeiten
+    consumer.ack()                  # Stand speichern + commit
+
+Schreibt der Konsument sein Ergebnis in dieselbe Datenbank, mit ack(commit=False) den Stand in
+derselben Transaktion speichern und selbst committen → jede Änderung wird genau einmal verarbeitet.
+Sonst gilt „mindestens einmal“: Absturz zwischen Verarbeiten und ack → dieselben Änderungen kommen noch einmal.
+
+Lücken: changeID wird beim INSERT vergeben, sichtbar wird die Zeile erst beim Commit. Eine fehlende ID
+kann also noch offen sein (lange Transaktion) oder zurückgerollt. poll() liest nur bis zur ersten Lücke;
+ist die Zeile nach der Lücke älter als GAP_TIMEOUT_S Sekunden, gilt die Lücke als zurückgerollt.
+
+Start:
+    python -m python.changelog status
+    python -m python.changelog prune
+    python -m python.changelog reset umsatz_tag [--ende]
+"""
+
+import argparse
+import sys
+import time
+from collections import namedtuple
+from typing import Callable, Iterable, List, Optional
+
+from .db import get_conn
+
+BATCH = 1_000               # Änderungen pro poll()
+GAP_TIMEOUT_S = 30.0        # so lange auf eine fehlende changeID warten
+IDLE_S = 1.0                # run(): Pause, wenn nichts Neues da ist
+PRUNE_CHUNK = 10_000        # prune(): so viele Zeilen pro DELETE
+KEEP_DAYS = 30              # prune() ohne Konsumenten: so lange aufheben
+
+Change = namedtuple("Change", "changeID tabelle op pk artikelID belegID geaendert_am")
+
+
+class ChangeConsumer:
+    """Ein benannter Leser des Änderungsprotokolls; der Stand liegt in changelog_offset."""
+
+    def __init__(self, conn, name: str, tables: Optional[Iterable[str]] = None,
+                 gap_timeout: float = GAP_TIMEOUT_S):
+        self.conn = conn
+        self.name = name
+        self.tables = frozenset(tables) if tables else None
+        self.gap_timeout = gap_timeout
+        self._position: Optional[int] = None
+        self._seen: Optional[int] = None     # gelesen bis hier (noch nicht bestätigt)
+
+    def position(self) -> int:
+        """Gespeicherter Stand (neuer Konsument → 0 = ab Beginn des Protokolls)."""
+        if self._position is None:
+            with self.conn.cursor() as cur:
+                cur.execute("SELECT letzte_id FROM changelog_offset WHERE consumer = %s", (self.name,))
+                row = cur.fetchone()
+            self._position = int(row[0]) if row else 0
+        return self._position
+
+    def poll(self, limit: int = BATCH) -> List[Change]:
+        """
+        Nächste Änderungen ab dem Stand (höchstens limit, in changeID-Reihenfolge, bis zur ersten
+        offenen Lücke). Bei tables=… nur diese Tabellen; ack() überspringt die anderen trotzdem.
+        """
+        start = self._seen if self._seen is not None else self.position()
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT changeID, tabelle, op, pk, artikelID, belegID, geaendert_am,
+                       TIMESTAMPDIFF(MICROSECOND, geaendert_am, NOW(6)) / 1e6 AS alter_s
+                FROM changelog
+                WHERE changeID > %s
+                ORDER BY changeID
+                LIMIT %s
+            """, (start, limit))
+            rows = cur.fetchall()
+
+        changes: List[Change] = []
+        expected = start + 1
+        for row in rows:
+            change_id, alter_s = int(row[0]), float(row[7] or 0)
+            if change_id != expected and alter_s < self.gap_timeout:
+                break                       # davor fehlt eine ID, die evtl. noch committet wird
+            expected = change_id + 1
+            if self.tables is None or row[1] in self.tables:
+                changes.append(Change(change_id, *row[1:7]))
+        self._seen = expected - 1
+        return changes
+
+    def ack(self, upto: Optional[int] = None, commit: bool = True) -> None:
+        """
+        Stand speichern: alles bis upto (Standard: bis zum letzten poll()) ist verarbeitet.
+        commit=False → nur in der laufenden Transaktion (zusammen mit der eigenen Arbeit committen).
+        """
+        upto = self._seen if upto is None else upto
+        if upto is None or upto <= self.position():
+            if commit:
+                self.conn.commit()          # neuer Schnappschuss für das nächste poll()
+            return
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO changelog_offset (consumer, letzte_id, aktualisiert_am)
+                VALUES (%s, %s, NOW())
+                ON DUPLICATE KEY UPDATE letzte_id = GREATEST(letzte_id, VALUES(letzte_id)),
+                                        aktualisiert_am = VALUES(aktualisiert_am)
+            """, (self.name, upto))
+        if commit:
+            self.conn.commit()
+        self._position = upto
+
+    def rewind(self) -> None:
+        """Ungespeicherte poll()-Ergebnisse verwerfen (z. B. nach einem Fehler beim Verarbeiten)."""
+        self._seen = None
+
+    def run(self, handler: Callable[[List[Change]], None], batch: int = BATCH,
+            idle: float = IDLE_S, stop: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Dauerschleife: poll → handler(changes) → ack (Stand + commit in einer Transaktion).
+        handler wirft → rollback, Stand bleibt, Ausnahme wird weitergereicht.
+        """
+        while not (stop and stop()):
+            changes = self.poll(batch)
+            try:
+                if changes:
+                    handler(changes)
+                self.ack()
+            except BaseException:
+                self.conn.rollback()
+                self.rewind()
+                raise
+            if not changes:
+                time.sleep(idle)
+
+
+def reset(conn, name: str, to_end: bool = False) -> int:
+    """Stand eines Konsumenten auf den Anfang (0) oder das aktuelle Ende setzen. Gibt den neuen Stand zurück."""
+    with conn.cursor() as cur:
+        position = 0
+        if to_end:
+            cur.execute("SELECT COALESCE(MAX(changeID), 0) FROM changelog")
+            position = int(cur.fetchone()[0])
+        cur.execute("""
+            INSERT INTO changelog_offset (consumer, letzte_id, aktualisiert_am)
+            VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE letzte_id = VALUES(letzte_id), aktualisiert_am = VALUES(aktualisiert_am)
+        """, (name, position))
+    conn.commit()
+    return position
+
+
+def prune(conn, keep_days: int = KEEP_DAYS) -> int:
+    """
+    Verarbeitete Änderungen löschen: alles bis zum kleinsten Stand aller Konsumenten.
+    Ohne Konsumenten: Einträge älter als keep_days. Gibt die Anzahl gelöschter Zeilen zurück.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT MIN(letzte_id) FROM changelog_offset")
+        low = cur.fetchone()[0]
+        if low is None:
+            where, params = "geaendert_am < NOW() - INTERVAL %s DAY", (keep_days,)
+        else:
+            where, params = "changeID <= %s", (int(low),)
+        total = 0
+        while True:
+            cur.execute(f"DELETE FROM changelog WHERE {where} ORDER BY changeID LIMIT {PRUNE_CHUNK}", params)
+            conn.commit()
+            total += cur.rowcount
+            if cur.rowcount < PRUNE_CHUNK:
+                return total
+
+
+def print_status(conn) -> None:
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MIN(changeID), 0), COALESCE(MAX(changeID), 0), COUNT(*) FROM changelog")
+        low, high, count = cur.fetchone()
+        print(f"changelog: {count} Einträge (changeID {low}–{high})")
+        cur.execute("""
+            SELECT o.consumer, o.letzte_id, o.aktualisiert_am,
+                   (SELECT COUNT(*) FROM changelog c WHERE c.changeID > o.letzte_id) AS offen
+            FROM changelog_offset o
+            ORDER BY o.consumer
+        """)
+        rows = cur.fetchall()
+    if not rows:
+        print("  (keine Konsumenten)")
+    for consumer, letzte_id, aktualisiert_am, offen in rows:
+        print(f"  {consumer:<24} Stand {letzte_id:>10}  offen {offen:>8}  aktualisiert {aktualisiert_am}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Änderungsprotokoll (changelog) verwalten.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("status", help="Konsumenten und offene Änderungen anzeigen")
+    s = sub.add_parser("prune", help="von allen Konsumenten verarbeitete Einträge löschen")
+    s.add_argument("--keep-days", type=int, default=KEEP_DAYS, help="ohne Konsumenten: so viele Tage aufheben")
+    s = sub.add_parser("reset", help="Stand eines Konsumenten zurücksetzen")
+    s.add_argument("consumer")
+    s.add_argument("--ende", action="store_true", help="auf das aktuelle Ende statt auf den Anfang")
+    args = p.parse_args(argv)
+
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        sys.exit(1)
+    try:
+        if args.cmd == "status":
+            print_status(conn)
+        elif args.cmd == "prune":
+            print(f"• {prune(conn, args.keep_days)} Einträge gelöscht")
+        else:
+            print(f"• {args.consumer}: Stand = {reset(conn, args.consumer, args.ende)}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,13 @@ In dieser Datei starte ich meine Flask-Anwendung.
 Ich habe mehrere Blueprints: auth für Login, reports für Berichte und dashboard für die Hauptseite.
 Das Dashboard zeigt die letzten Verkäufe und berechnet Umsatz, Kosten und Marge.
 Die App läuft auf Port 5000 und hat einen kleinen Healthcheck
+
+Die App wird in create_app() gebaut (App-Factory), nicht schon beim Import:
+    python -m python.dashboard                                      (Entwicklung, debug)
+    gunicorn -w 4 "python.dashboard:create_app()"                   (jeder Worker wärmt sich selbst auf)
+    WARMUP=preload gunicorn --preload -w 4 "python.dashboard:app"   (einmal im Master aufwärmen)
+    waitress-serve --call python.dashboard:create_app
+Aufwärmen und GET /ready: siehe warmup.py.
 """
 
 import os
@@ -13,16 +20,13 @@ from flask_login import LoginManager, login_required, current_user
 from .db import get_conn
 from .auth import auth_bp, init_auth
 from .reports.routes import reports_bp
+from .api import api_bp
+from .admin import admin_bp
+from .metrics import init_metrics
+from .timing import init_timing
+from .warmup import init_warmup
 from flask import Blueprint
 
-#  Flask-App erstellen
-app = Flask(__name__)
-app.secret_key = os.getenv("FLASK_SECRET", "dev")# Geheimschlüssel (wichtig für Sitzungen und Login)
-
-# Login-System initialisieren
-login_manager = LoginManager(app)
-init_auth(login_manager)
-
 # ==========Dashboard-Blueprint definieren==========
 dashboard_bp = Blueprint("dashboard", __name__)
 
@@ -60,24 +64,17 @@ def table():
 
 
 #  Healthcheck – zeigt, dass der Server läuft
-@app.get("/health")
 def health():
     return {"status": "ok"}  # JSON-Antwort
 
-# Blueprints registrieren
-app.register_blueprint(dashboard_bp)
-app.register_blueprint(auth_bp)
-app.register_blueprint(reports_bp)
 
 # Benutzer-Information global für Templates
-@app.context_processor
 def inject_user():
     # current_user steht dann automatisch in allen HTML-Templates zur Verfügung
     return dict(current_user=current_user)
 
 
 # Eigener Template-Filter für Zahlenformat
-@app.template_filter("thousands")
 def format_thousands (value, decimals=2):
     try:
         formatted = f"{value:,.{decimals}f}".replace(",", "X").replace(".", ",").replace("X", " ")
@@ -86,6 +83,47 @@ def format_thousands (value, decimals=2):
         return "k. A."   # keine Angabe → немає даних
 
 
+def create_app(warmup=None) -> Flask:
+    """
+    Flask-App mit allen Blueprints bauen.
+    warmup = background | preload | off bzw. False (Standard: Umgebungsvariable WARMUP, sonst background).
+    """
+    app = Flask(__name__)
+    app.secret_key = os.getenv("FLASK_SECRET", "dev")# Geheimschlüssel (wichtig für Sitzungen und Login)
+
+    # Zeitmessung pro Anfrage (Server-Timing-Header + Log langsamer Anfragen) – möglichst früh einbinden
+    init_timing(app)
+    init_metrics(app)     # GET /metrics für Prometheus
+
+    # Login-System initialisieren
+    login_manager = LoginManager(app)
+    init_auth(login_manager)
+
+    app.add_url_rule("/health", "health", health, methods=["GET"])
+
+    # Blueprints registrieren
+    app.register_blueprint(dashboard_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(reports_bp)
+    app.register_blueprint(api_bp)      # /api/sales für Kassen (API-Schlüssel statt Login)
+    app.register_blueprint(admin_bp)    # /admin/profile – nur für Administratoren
+
+    app.context_processor(inject_user)
+    app.add_template_filter(format_thousands, "thousands")
+
+    init_warmup(app, warmup)            # zuletzt: braucht alle Routen; GET /ready
+    return app
+
+
+def __getattr__(name):
+    # „from python.dashboard import app“ bzw. gunicorn "python.dashboard:app" baut die App erst beim Zugriff
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 #  App starten
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    create_app().run(host="0.0.0.0", port=5000, debug=True)
@@ -5,28 +5,101 @@ werden aus der .env-Datei geladen.
 Die Funktion get_conn() probiert mehrere Host-Port-Kombinationen,
 bis eine Verbindung erfolgreich ist.
 Mit fetch_one und fetch_all kann man einfach SQL-Abfragen ausführen.
+
+Ohne MySQL-Server (Tests, Benchmarks): DB_BACKEND=sqlite → get_conn() öffnet die Datei
+DB_SQLITE_PATH (Standard: newshop.sqlite im Hauptordner). Die Verbindung verhält sich wie
+eine pymysql-Verbindung (%s-Platzhalter, DictCursor, MySQL-Fehlernummern).
+Datenbank anlegen: python -m python.db --init-sqlite
 """
 
+import argparse
 import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import ROUND_HALF_UP, Decimal
 import pymysql
-from pymysql.cursors import Cursor
+from pymysql.cursors import Cursor, DictCursorMixin
 from dotenv import load_dotenv
 from pathlib import Path
 
-# 🔹 .env-Datei laden (liegt im Hauptordner newshop)
+# 🔹 .env-Datei laden (liegt im Hauptordner newshop) – billig, andere Module lesen ihre Einstellungen beim Import
 env_path = Path(__file__).resolve().parents[1] / ".env"
 load_dotenv(dotenv_path=env_path)
-for var in ["DB_HOSTS", "DB_PORTS", "DB_USER", "DB_PASSWORD", "DB_NAME"]:
-    if not os.getenv(var):
-        print(f"⚠️  Warnung: {var} ist nicht gesetzt!")
+_env_checked = False
+_last_ok = None             # (host, port) der letzten erfolgreichen Verbindung → beim nächsten Mal zuerst
+
+
+def check_env() -> None:
+    """Fehlende Zugangsdaten einmal pro Prozess melden (beim ersten Verbindungsaufbau, nicht beim Import)."""
+    global _env_checked
+    if _env_checked:
+        return
+    _env_checked = True
+    if (os.getenv("DB_BACKEND") or "mysql").strip().lower() != "sqlite":
+        for var in ["DB_HOSTS", "DB_PORTS", "DB_USER", "DB_PASSWORD", "DB_NAME"]:
+            if not os.getenv(var):
+                print(f"⚠️  Warnung: {var} ist nicht gesetzt!")
+
+
+# Messung (timing.py, metrics.py): hook(phase, sekunden, sql) nach jedem Verbindungsaufbau
+# ("connect", fehlgeschlagen: "connect_error") und jeder Abfrage ("sql"; sql=None = Zeilen abholen).
+# Ohne Hooks kostet die Messung nichts.
+_timing_hooks = ()
+
 
+def add_timing_hook(hook) -> None:
+    global _timing_hooks
+    if hook not in _timing_hooks:
+        _timing_hooks = _timing_hooks + (hook,)     # neues Tupel → Leser brauchen kein Lock
 
 
-def get_conn():
+def report_timing(phase: str, t0: float, sql=None) -> None:
+    hooks = _timing_hooks
+    if hooks:
+        seconds = time.perf_counter() - t0
+        for hook in hooks:
+            hook(phase, seconds, sql)
+
+
+class TimedConnection(pymysql.connections.Connection):
+    """pymysql-Verbindung, die jede Abfrage (alle Cursor-Arten laufen über query) an den Hook meldet."""
+
+    def query(self, sql, unbuffered=False):
+        if not _timing_hooks:
+            return super().query(sql, unbuffered)
+        t0 = time.perf_counter()
+        try:
+            return super().query(sql, unbuffered)
+        finally:
+            report_timing("sql", t0, sql)
+
+
+def get_conn(**extra):
     """
     Verbindung zur Datenbank herstellen.
     Mehrere Hosts und Ports werden ausprobiert.
+    extra = zusätzliche Optionen für pymysql.connect (z. B. local_infile=True)
+    DB_BACKEND=sqlite → SQLite-Datei statt MySQL (extra wird ignoriert).
     """
+    t0 = time.perf_counter()
+    conn = None
+    try:
+        conn = _connect(**extra)
+        return conn
+    finally:
+        report_timing("connect" if conn is not None else "connect_error", t0)
+
+
+def _connect(**extra):
+    global _last_ok
+    if (os.getenv("DB_BACKEND") or "mysql").strip().lower() == "sqlite":
+        return SqliteConnection(sqlite_path())
+    check_env()
 
     # Hosts und Ports aus .env lesen (mit Standardwerten)
     hosts = [h.strip() for h in os.getenv("DB_HOSTS").split(",")]
@@ -42,28 +115,33 @@ def get_conn():
 
     last_err = None
 
-    # Jede Kombination aus Host und Port testen
-    for host in hosts:
-        for port in ports:
-            try:
-                # Verbindung aufbauen
-                conn = pymysql.connect(
-                    host=host,
-                    port=port,
-                    user=user,
-                    password=pwd,
-                    database=db,
-                    charset="utf8mb4",
-                    autocommit=False,
-                    cursorclass=Cursor,
-                    connect_timeout=4
-                )
-                print(f"Verbindung erfolgreich: {host}:{port}")
-                return conn
-            except Exception as e:
-                # Fehler merken und weiter versuchen
-                print(f"Verbindung fehlgeschlagen {host}:{port} → {e}")
-                last_err = e
+    # Jede Kombination aus Host und Port testen (die zuletzt erfolgreiche zuerst, spart Timeouts)
+    candidates = [(host, port) for host in hosts for port in ports]
+    if _last_ok in candidates:
+        candidates.remove(_last_ok)
+        candidates.insert(0, _last_ok)
+    for host, port in candidates:
+        try:
+            # Verbindung aufbauen
+            conn = TimedConnection(
+                host=host,
+                port=port,
+                user=user,
+                password=pwd,
+                database=db,
+                charset="utf8mb4",
+                autocommit=False,
+                cursorclass=Cursor,
+                connect_timeout=4,
+                **extra
+            )
+            print(f"Verbindung erfolgreich: {host}:{port}")
+            _last_ok = (host, port)
+            return conn
+        except Exception as e:
+            # Fehler merken und weiter versuchen
+            print(f"Verbindung fehlgeschlagen {host}:{port} → {e}")
+            last_err = e
 
     # Keine Verbindung möglich
     print("Keine Verbindung zum Server.")
@@ -72,6 +150,369 @@ def get_conn():
     return None
 
 
+class ConnectionPool:
+    """
+    Einfacher Pool mit fester Größe (für mehrere Threads, z. B. pos_load.py).
+    Verbindungen werden einmal aufgebaut und wiederverwendet statt pro Vorgang neu verbunden.
+
+        pool = ConnectionPool(8)
+        with pool.connection() as conn:
+            ...
+    """
+
+    def __init__(self, size, **extra):
+        self.size = size
+        self.extra = extra
+        self._free = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+
+    def acquire(self, timeout=None):
+        """Freie Verbindung holen; neue aufbauen, solange die Größe nicht erreicht ist."""
+        try:
+            conn = self._free.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if not can_create:
+                conn = self._free.get(timeout=timeout)
+            else:
+                try:
+                    conn = get_conn(**self.extra)
+                except Exception:
+                    conn = None              # z. B. SQLite-Datei fehlt → Platz wieder freigeben
+                    raise
+                finally:
+                    if conn is None:
+                        with self._lock:
+                            self._created -= 1
+                if conn is None:
+                    raise RuntimeError("Keine Verbindung zur Datenbank")
+                return conn
+        try:
+            conn.ping(reconnect=True)          # Verbindung evtl. vom Server getrennt
+        except Exception:
+            self.release(conn, broken=True)
+            return self.acquire(timeout)
+        return conn
+
+    def release(self, conn, broken=False):
+        """Verbindung zurückgeben (broken=True → schließen, Platz wird frei)."""
+        if broken:
+            try:
+                conn.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._created -= 1
+            return
+        self._free.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Kontextmanager: Verbindung holen und danach zurückgeben (bei Fehler vorher rollback)."""
+        conn = self.acquire()
+        try:
+            yield conn
+        except BaseException:
+            try:
+                conn.rollback()
+            except Exception:
+                self.release(conn, broken=True)
+                raise
+            self.release(conn)
+            raise
+        self.release(conn)
+
+    def close(self):
+        """Alle freien Verbindungen schließen."""
+        while True:
+            try:
+                conn = self._free.get_nowait()
+            except queue.Empty:
+                break
+            self.release(conn, broken=True)
+
+
+# ── SQLite statt MySQL (DB_BACKEND=sqlite) ───────────────────────────────────
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "sql"
+SQLITE_BUSY_TIMEOUT_S = 10.0
+
+# MySQL-Fehlernummern für SQLite-Fehler → Wiederholungs- und Fehlerlogik bleibt gleich
+_UDF_FAILED = "user-defined function raised exception"
+_SQLITE_ERRORS = (
+    ("UNIQUE constraint failed", 1062),
+    ("FOREIGN KEY constraint failed", 1452),
+    ("NOT NULL constraint failed", 1048),
+    ("CHECK constraint failed", 3819),
+    ("database is locked", 1205),
+    ("interrupted", 1317),                          # sqlite3.Connection.interrupt() = KILL QUERY
+    (_UDF_FAILED, 1105),
+)
+_SQLITE_OPERATIONAL = (1205, 1317, 1105)
+ER_SIGNAL_EXCEPTION = 1644          # RAISE(ABORT, …) im Trigger = SIGNAL in MySQL
+ER_PARSE_ERROR = 1064
+
+_PLACEHOLDER = re.compile(r"%(s|%)")
+_MYSQL_INTERVAL = re.compile(r"NOW\(\)\s*-\s*INTERVAL\s+(\d+)\s+(DAY|HOUR)", re.IGNORECASE)
+_ISO_DATE = re.compile(r"\d{4}-\d\d-\d\d(?:[ T]\d\d:\d\d:\d\d(?:\.\d+)?)?")
+_sqlite_ready = False
+
+
+def sqlite_path() -> str:
+    path = os.getenv("DB_SQLITE_PATH") or "newshop.sqlite"
+    if path.startswith("file:") or path == ":memory:":
+        return path
+    return str(Path(path) if Path(path).is_absolute() else Path(__file__).resolve().parents[1] / path)
+
+
+def _setup_sqlite() -> None:
+    """Typ-Umwandlungen einmal pro Prozess registrieren (Python ↔ SQLite-Text)."""
+    global _sqlite_ready
+    if _sqlite_ready:
+        return
+    sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+    sqlite3.register_adapter(date, lambda d: d.isoformat())
+    sqlite3.register_adapter(Decimal, float)
+    sqlite3.register_converter("DATETIME", lambda b: datetime.fromisoformat(b.decode()))
+    sqlite3.register_converter("TIMESTAMP", lambda b: datetime.fromisoformat(b.decode()))
+    sqlite3.register_converter("DATE", lambda b: date.fromisoformat(b.decode()[:10]))
+    _sqlite_ready = True
+
+
+def _sqlite_error(e: sqlite3.Error, conn: "SqliteConnection" = None) -> BaseException:
+    """
+    SQLite-Fehler → pymysql-Fehler mit MySQL-Nummer (args = (nummer, text) wie bei pymysql).
+    Ist der Fehler in einer der Funktionen aus _register_functions entstanden, kommt deren Ausnahme
+    zum Vorschein: Strg+C (KeyboardInterrupt) unverändert, sonst OperationalError mit dem Grund.
+    """
+    msg = str(e)
+    if conn is not None and _UDF_FAILED in msg:
+        pending, conn.udf_error = conn.udf_error, None
+        if pending is None:
+            # Strg+C schon beim Eintritt in die Funktion, vor deren try → nirgends gemerkt
+            pending = KeyboardInterrupt()
+        if not isinstance(pending, Exception):
+            return pending
+        msg = f"{msg}: {pending!r}"
+    for text, code in _SQLITE_ERRORS:
+        if text in msg:
+            cls = pymysql.err.OperationalError if code in _SQLITE_OPERATIONAL else pymysql.err.IntegrityError
+            return cls(code, msg)
+    if isinstance(e, sqlite3.IntegrityError):
+        return pymysql.err.OperationalError(ER_SIGNAL_EXCEPTION, msg)
+    return pymysql.err.ProgrammingError(ER_PARSE_ERROR, msg)
+
+
+def _from_sqlite(value):
+    """
+    Datumstext aus Ausdrücken (MIN(datum), date(…)) wie bei MySQL als date/datetime zurückgeben –
+    der Typ der Spalte geht bei Ausdrücken verloren, die Converter oben greifen dann nicht.
+    """
+    if isinstance(value, str) and _ISO_DATE.fullmatch(value):
+        return datetime.fromisoformat(value) if len(value) > 10 else date.fromisoformat(value)
+    return value
+
+
+def _to_date(value):
+    return date.fromisoformat(str(value)[:10]) if value is not None else None
+
+
+def _round_decimal(value, digits=0):
+    """
+    ROUND wie MySQL mit DECIMAL-Spalten: exakt dezimal, halbe Einheiten weg von 0.
+    SQLite rechnet mit REAL – 3 × 0.95 ergibt binär 2.8499999…, das eingebaute ROUND macht daraus 2.84
+    (MySQL: 2.85). Nahe an einer halben Einheit deshalb zuerst auf 9 Stellen glätten (Preise/Rabatte/Kosten
+    haben höchstens 4 Stellen, Produkte höchstens 8) und dann dezimal runden; sonst genügt round().
+    """
+    if value is None or digits is None:
+        return None
+    value, digits = float(value), int(digits)
+    if abs(abs(value * 10.0 ** digits) % 1.0 - 0.5) > 1e-6:
+        return round(value, digits)
+    exact = Decimal(repr(round(value, 9)))
+    return float(exact.quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def _register_functions(conn: sqlite3.Connection, owner) -> None:
+    """MySQL-Funktionen, die in Sichten und Abfragen vorkommen (Syntax-Unterschiede → dialect.py)."""
+    def register(name, nargs, fn, **kw):
+        # sqlite3 verschluckt Ausnahmen aus Funktionen ("user-defined function raised exception"),
+        # auch KeyboardInterrupt – merken, _sqlite_error gibt sie nach dem Abbruch weiter
+        def call(*args):
+            try:
+                return fn(*args)
+            except BaseException as exc:
+                owner.udf_error = exc
+                raise
+        conn.create_function(name, nargs, call, **kw)
+
+    register("CONCAT", -1, lambda *a: None if None in a else "".join(str(x) for x in a),
+             deterministic=True)
+    register("GREATEST", -1, lambda *a: None if None in a else max(a), deterministic=True)
+    register("LEAST", -1, lambda *a: None if None in a else min(a), deterministic=True)
+    # ersetzt das eingebaute ROUND (Sichten, Trigger, Berichte) → gleiche Cent-Beträge wie MySQL/DuckDB
+    register("ROUND", 1, _round_decimal, deterministic=True)
+    register("ROUND", 2, _round_decimal, deterministic=True)
+    register("NOW", 0, lambda: datetime.now().isoformat(" ", "seconds"))
+    register("CURDATE", 0, lambda: date.today().isoformat())
+    register("DATEDIFF", 2, lambda a, b: None if a is None or b is None
+             else (_to_date(a) - _to_date(b)).days, deterministic=True)
+    # Ersatz für die Session-Variable @newshop_bulk (Trigger in sql/sqlite/trigger.sql)
+    register("newshop_bulk", 0, lambda: 1 if owner.bulk else 0)
+
+
+class SqliteCursor:
+    """Cursor mit pymysql-Verhalten: %s-Platzhalter, Tupel oder Dicts, MySQL-Fehlernummern."""
+
+    def __init__(self, conn: "SqliteConnection", as_dict: bool = False):
+        self.connection = conn
+        self._cur = conn._conn.cursor()
+        self._as_dict = as_dict
+
+    @staticmethod
+    def _sql(sql: str, params) -> str:
+        # wie pymysql: %% nur dann zu %, wenn Parameter übergeben werden
+        if params is None:
+            return sql
+        return _PLACEHOLDER.sub(lambda m: "?" if m.group(1) == "s" else "%", sql)
+
+    def execute(self, sql, params=None):
+        t0 = time.perf_counter()
+        try:
+            self._cur.execute(self._sql(sql, params), tuple(params) if params is not None else ())
+        except sqlite3.Error as e:
+            raise _sqlite_error(e, self.connection) from e
+        finally:
+            report_timing("sql", t0, sql)
+        return max(self._cur.rowcount, 0)
+
+    def executemany(self, sql, rows):
+        rows = [tuple(r) for r in rows]
+        if not rows:
+            return 0
+        t0 = time.perf_counter()
+        try:
+            self._cur.executemany(self._sql(sql, rows[0]), rows)
+        except sqlite3.Error as e:
+            raise _sqlite_error(e, self.connection) from e
+        finally:
+            report_timing("sql", t0, sql)
+        return max(self._cur.rowcount, 0)
+
+    def _row(self, row):
+        if row is None:
+            return row
+        row = tuple(_from_sqlite(v) for v in row)
+        if not self._as_dict:
+            return row
+        return {d[0]: v for d, v in zip(self._cur.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cur.fetchone())
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = self._cur.fetchmany(size or self._cur.arraysize)
+        report_timing("sql", t0)                # SQLite rechnet erst beim Abholen weiter
+        return [self._row(r) for r in rows]
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = self._cur.fetchall()
+        report_timing("sql", t0)
+        return [self._row(r) for r in rows]
+
+    def __iter__(self):
+        return (self._row(r) for r in self._cur)
+
+    @property
+    def lastrowid(self):
+        return self._cur.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    @property
+    def description(self):
+        return self._cur.description
+
+    def close(self):
+        self._cur.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SqliteConnection:
+    """
+    SQLite-Verbindung mit der Schnittstelle, die der Code von pymysql benutzt
+    (cursor, commit, rollback, ping, close). Kein autocommit – wie get_conn() für MySQL.
+    """
+
+    def __init__(self, path: str):
+        _setup_sqlite()
+        self.path = path
+        self.bulk = False               # = SET @newshop_bulk = 1 (siehe generators/bulk_load.set_bulk_mode)
+        self.udf_error = None           # Ausnahme aus einer SQL-Funktion (_register_functions)
+        self._conn = sqlite3.connect(path, timeout=SQLITE_BUSY_TIMEOUT_S, check_same_thread=False,
+                                     detect_types=sqlite3.PARSE_DECLTYPES, uri=path.startswith("file:"))
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if not path.startswith("file:") and path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+        _register_functions(self._conn, self)
+
+    def cursor(self, cursor_class=None):
+        as_dict = isinstance(cursor_class, type) and issubclass(cursor_class, DictCursorMixin)
+        return SqliteCursor(self, as_dict)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=True):
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+def init_sqlite(path: str = None, with_data: bool = True) -> str:
+    """
+    SQLite-Datenbank anlegen: sql/sqlite/schema.sql, trigger.sql, views.sql
+    und optional die Beispieldaten aus sql/data.sql. Eine vorhandene Datei wird ersetzt.
+    Gibt den Pfad zurück.
+    """
+    path = path or sqlite_path()
+    if not path.startswith("file:") and path != ":memory:":
+        for suffix in ("", "-wal", "-shm"):
+            Path(path + suffix).unlink(missing_ok=True)
+    conn = SqliteConnection(path)
+    try:
+        for name in ("schema.sql", "trigger.sql", "views.sql"):
+            conn._conn.executescript((SQL_DIR / "sqlite" / name).read_text(encoding="utf-8"))
+        if with_data:
+            # data.sql ist für MySQL geschrieben: USE weglassen, NOW() - INTERVAL n DAY/HOUR übersetzen
+            text = (SQL_DIR / "data.sql").read_text(encoding="utf-8")
+            text = "\n".join(l for l in text.splitlines() if not l.upper().startswith("USE "))
+            text = _MYSQL_INTERVAL.sub(
+                lambda m: f"datetime('now', 'localtime', '-{m.group(1)} {m.group(2).lower()}s')", text)
+            conn._conn.executescript(text)
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
 def fetch_one(cur, sql, params=None):
     """Ein Datensatz zurückgeben (oder None)."""
     cur.execute(sql, params or ())
@@ -85,6 +526,13 @@ def fetch_all(cur, sql, params=None):
 
 
 if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Datenbankverbindung testen bzw. SQLite-Datenbank anlegen.")
+    p.add_argument("--init-sqlite", action="store_true", help="SQLite-Datei (DB_SQLITE_PATH) neu anlegen")
+    p.add_argument("--ohne-daten", action="store_true", help="mit --init-sqlite: ohne Beispieldaten (sql/data.sql)")
+    args = p.parse_args()
+    if args.init_sqlite:
+        print(f"SQLite-Datenbank angelegt: {init_sqlite(with_data=not args.ohne_daten)}")
+
     # Test der Verbindung
     conn = get_conn()
     if conn:
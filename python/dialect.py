@@ -0,0 +1,113 @@
+"""
+SQL-Unterschiede zwischen MySQL/MariaDB und SQLite an einer Stelle.
+
+Welche Datenbank benutzt wird, steht in DB_BACKEND (mysql = Standard, sqlite → siehe db.py).
+Hier stehen nur Dinge, die sich nicht als gleichnamige Funktion nachbilden lassen (Syntax);
+einfache Funktionen wie CONCAT, GREATEST, NOW oder DATEDIFF registriert db.py für SQLite direkt.
+
+Ohne Importe aus dem Projekt, damit sowohl die Flask-App (from .dialect import …)
+als auch die Generatoren (from dialect import …) dieses Modul laden können.
+"""
+
+import os
+from typing import Sequence
+
+
+def backend() -> str:
+    """'mysql' oder 'sqlite' (Umgebungsvariable DB_BACKEND, wird bei jedem Aufruf gelesen)."""
+    return (os.getenv("DB_BACKEND") or "mysql").strip().lower()
+
+
+def is_sqlite() -> bool:
+    return backend() == "sqlite"
+
+
+def group_expr(grp: str, column: str) -> str:
+    """SQL-Ausdruck für die Gruppierung nach Tag/Monat/Quartal/Jahr (Ergebnis als Text bzw. Datum)."""
+    grp = (grp or "day").lower()
+    if is_sqlite():
+        if grp == "month":
+            return f"strftime('%%Y-%%m', {column})"
+        if grp == "quarter":
+            return (f"strftime('%%Y', {column}) || '-Q' || "
+                    f"((CAST(strftime('%%m', {column}) AS INTEGER) + 2) / 3)")
+        if grp == "year":
+            return f"strftime('%%Y', {column})"
+        return f"date({column})"
+    if grp == "month":
+        return f"DATE_FORMAT({column}, '%%Y-%%m')"                  # Beispiel: 2025-11
+    if grp == "quarter":
+        return f"CONCAT(YEAR({column}), '-Q', QUARTER({column}))"    # Beispiel: 2025-Q4
+    if grp == "year":
+        return f"DATE_FORMAT({column}, '%%Y')"                      # Beispiel: 2025
+    return f"DATE({column})"                                        # Beispiel: 2025-11-01
+
+
+def days_ago(days: str = "%s") -> str:
+    """Zeitpunkt vor N Tagen; days = Platzhalter oder Zahl als Text."""
+    if is_sqlite():
+        return f"datetime('now', 'localtime', '-' || ({days}) || ' days')"
+    return f"NOW() - INTERVAL {days} DAY"
+
+
+def for_update() -> str:
+    """Zeilensperre für SELECT (SQLite sperrt beim Schreiben die ganze Datenbank → leer)."""
+    return "" if is_sqlite() else " FOR UPDATE"
+
+
+def update_order_by(column: str) -> str:
+    """ORDER BY in UPDATE (feste Sperr-Reihenfolge); SQLite kennt es nicht und braucht es nicht."""
+    return "" if is_sqlite() else f" ORDER BY {column}"
+
+
+def last_insert_id() -> str:
+    return "last_insert_rowid()" if is_sqlite() else "LAST_INSERT_ID()"
+
+
+def upsert(table: str, columns: Sequence[str], key: Sequence[str], update: Sequence[str]) -> str:
+    """INSERT … bei vorhandenem Schlüssel die Spalten `update` überschreiben."""
+    cols = ", ".join(columns)
+    values = ", ".join(["%s"] * len(columns))
+    if is_sqlite():
+        sets = ", ".join(f"{c} = excluded.{c}" for c in update)
+        return f"INSERT INTO {table} ({cols}) VALUES ({values}) ON CONFLICT ({', '.join(key)}) DO UPDATE SET {sets}"
+    sets = ", ".join(f"{c} = VALUES({c})" for c in update)
+    return f"INSERT INTO {table} ({cols}) VALUES ({values}) ON DUPLICATE KEY UPDATE {sets}"
+
+
+def update_from(table: str, key: str, source: str, columns: Sequence[str]) -> str:
+    """
+    Spalten `columns` von `table` aus `source` (Tabelle oder „(SELECT …)“ mit gleichnamigen Spalten)
+    übernehmen, verknüpft über `key`; Zeilen ohne Treffer bleiben unverändert.
+    SQLite kennt kein UPDATE mit JOIN → je Spalte eine Unterabfrage, nur für Schlüssel aus `source`.
+    """
+    if is_sqlite():
+        sets = ", ".join(f"{c} = (SELECT s.{c} FROM {source} s WHERE s.{key} = {table}.{key})" for c in columns)
+        return f"UPDATE {table} SET {sets} WHERE {key} IN (SELECT s.{key} FROM {source} s)"
+    sets = ", ".join(f"t.{c} = s.{c}" for c in columns)
+    return f"UPDATE {table} t JOIN {source} s ON s.{key} = t.{key} SET {sets}"
+
+
+def delete_in(table: str, key: str, select: str) -> str:
+    """Zeilen von `table` löschen, deren `key` in `select` („SELECT key FROM …“) vorkommt."""
+    if is_sqlite():
+        return f"DELETE FROM {table} WHERE {key} IN ({select})"
+    return f"DELETE t FROM {table} t JOIN ({select}) s ON s.{key} = t.{key}"
+
+
+def drop_temporary_table(name: str) -> str:
+    return f"DROP TABLE {name}" if is_sqlite() else f"DROP TEMPORARY TABLE {name}"
+
+
+def table_exists(cur, *names: str) -> bool:
+    """True, wenn alle genannten Tabellen/Sichten existieren."""
+    marks = ", ".join(["%s"] * len(names))
+    if is_sqlite():
+        cur.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type IN ('table', 'view') AND name IN ({marks})",
+                    names)
+    else:
+        cur.execute(f"""
+            SELECT COUNT(*) FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({marks})
+        """, names)
+    return cur.fetchone()[0] == len(names)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+bulk_import.py
+Bewegungsdaten (z. B. den Kassen-Export eines Tages) in großen Blöcken importieren –
+ohne dass die Lager-Trigger für jede Zeile laufen.
+
+Ablauf (eine Transaktion):
+  1) Session in den Bulk-Modus schalten (SET @newshop_bulk = 1 → Trigger aus sql/trigger.sql tun nichts).
+  2) CSV-Dateien einkauf / einkaufartikel / verkauf / verkaufartikel (so vorhanden) in Blöcken
+     mit mehrzeiligen INSERTs laden. Spalten laut Kopfzeile (Namen wie in offline.COLUMNS),
+     Primärschlüssel-Spalte darf fehlen (dann vergibt die DB die IDs).
+  3) Prüfen, ob irgendein Artikel danach negativen Bestand hätte → Abbruch + rollback.
+  4) lagerbestand und durchschnittskosten aller Artikel in EINEM UPDATE aus allen Bewegungen berechnen:
+       lagerbestand        = Σ einkaufsmenge − Σ verkaufsmenge
+       durchschnittskosten = Σ (einkaufsmenge × einkaufspreis) / Σ einkaufsmenge   (wie trg_update_avgcost)
+  5) commit, Bulk-Modus aus.
+
+Start:
+    python -m python.generators.bulk_import data/kasse_2025-10-31
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from db import get_conn
+from dialect import is_sqlite, update_from
+from generators.bulk_load import active_stock_triggers, mark_rescan, set_bulk_mode
+from generators.hot_stock import reset_stripes
+from generators.offline import COLUMNS, CSV_NULL, FACT_TABLES
+
+# Zeilen pro INSERT-Block
+BATCH = 5_000
+
+# Mengen und Werte je Artikel aus allen Bewegungen (e = Einkauf, v = Verkauf), an artikel a gejoint
+MOVEMENT_JOINS = """
+    LEFT JOIN (
+        SELECT artikelID, SUM(einkaufsmenge) AS menge, SUM(einkaufsmenge * einkaufspreis) AS wert
+        FROM einkaufartikel
+        GROUP BY artikelID
+    ) e ON e.artikelID = a.artikelID
+    LEFT JOIN (
+        SELECT artikelID, SUM(verkaufsmenge) AS menge
+        FROM verkaufartikel
+        GROUP BY artikelID
+    ) v ON v.artikelID = a.artikelID
+"""
+NEW_STOCK = "COALESCE(e.menge, 0) - COALESCE(v.menge, 0)"
+NEW_AVGCOST = "ROUND(e.wert / NULLIF(e.menge, 0), 4)"
+
+
+class NegativeStockError(RuntimeError):
+    """Nach dem Import hätte mindestens ein Artikel negativen Bestand."""
+
+
+def read_csv_batches(path: Path, table: str) -> Tuple[List[str], Iterator[List[Sequence]]]:
+    """Kopfzeile prüfen und Zeilen blockweise liefern (\\N → NULL)."""
+    f = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(f)
+    header = next(reader, None) or []
+    unknown = [c for c in header if c not in COLUMNS[table]]
+    if not header or unknown:
+        f.close()
+        raise ValueError(f"{path.name}: unbekannte Spalten {unknown or '(leer)'} – erlaubt: {COLUMNS[table]}")
+
+    def batches():
+        with f:
+            batch = []
+            for row in reader:
+                batch.append([None if v == CSV_NULL else v for v in row])
+                if len(batch) >= BATCH:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    return header, batches()
+
+
+def load_table(cur, path: Path, table: str) -> int:
+    """Eine CSV-Datei in Blöcken laden. Gibt die Anzahl Zeilen zurück."""
+    header, batches = read_csv_batches(path, table)
+    sql = (f"INSERT INTO {table} ({', '.join(header)}) "
+           f"VALUES ({', '.join(['%s'] * len(header))})")
+    n = 0
+    for batch in batches:
+        cur.executemany(sql, batch)
+        n += len(batch)
+    return n
+
+
+def check_negative_stock(cur, limit: int = 20) -> List[Tuple[int, int]]:
+    """Artikel, deren Bestand aus allen Bewegungen negativ wäre → [(artikelID, bestand), ...]."""
+    cur.execute(f"""
+        SELECT a.artikelID, {NEW_STOCK} AS bestand
+        FROM artikel a
+        {MOVEMENT_JOINS}
+        WHERE {NEW_STOCK} < 0
+        ORDER BY bestand
+        LIMIT %s
+    """, (limit,))
+    return [(int(a), int(b)) for a, b in cur.fetchall()]
+
+
+def recompute_stock(cur) -> int:
+    """
+    lagerbestand + durchschnittskosten aller Artikel in einem UPDATE setzen. Gibt betroffene Zeilen zurück.
+    Puffer der Hot-Artikel (artikel_lager_stripe) werden geleert – der Bestand steht danach ganz in artikel.
+    """
+    reset_stripes(cur)
+    if is_sqlite():                      # kein UPDATE … JOIN → Sollwerte als Unterabfrage
+        cur.execute(update_from("artikel", "artikelID", f"""(
+            SELECT a.artikelID, {NEW_STOCK} AS lagerbestand, {NEW_AVGCOST} AS durchschnittskosten
+            FROM artikel a
+            {MOVEMENT_JOINS}
+        )""", ("lagerbestand", "durchschnittskosten")))
+        return cur.rowcount
+    cur.execute(f"""
+        UPDATE artikel a
+        {MOVEMENT_JOINS}
+        SET a.lagerbestand = {NEW_STOCK},
+            a.durchschnittskosten = {NEW_AVGCOST}
+    """)
+    return cur.rowcount
+
+
+def bulk_import(conn, src: Path) -> dict:
+    """Alle vorhandenen Dateien laden, Lager neu berechnen, commit. Bei negativem Bestand: rollback + Fehler."""
+    files = [(t, src / f"{t}.csv") for t in FACT_TABLES if (src / f"{t}.csv").exists()]
+    if not files:
+        raise FileNotFoundError(f"Keine Dateien in {src} ({', '.join(t + '.csv' for t in FACT_TABLES)})")
+
+    counts = {}
+    with conn.cursor() as cur:
+        triggers = active_stock_triggers(cur)
+        if triggers:
+            raise RuntimeError("Lager-Trigger ohne Bulk-Schalter aktiv (" + ", ".join(triggers) + ") – "
+                               "bitte sql/trigger.sql neu einspielen.")
+        set_bulk_mode(cur, True)
+        try:
+            for table, path in files:
+                t0 = time.perf_counter()
+                counts[table] = load_table(cur, path, table)
+                print(f"• {table}: {counts[table]} Zeilen in {time.perf_counter() - t0:.1f} s")
+
+            negative = check_negative_stock(cur)
+            if negative:
+                raise NegativeStockError(
+                    "Negativer Bestand nach dem Import: "
+                    + ", ".join(f"Artikel {a}: {b}" for a, b in negative))
+
+            t0 = time.perf_counter()
+            counts["artikel"] = recompute_stock(cur)
+            print(f"• artikel: Bestand + Durchschnittskosten neu berechnet in {time.perf_counter() - t0:.1f} s")
+            mark_rescan(cur, [t for t, _ in files] + ["artikel"])
+            conn.commit()
+        finally:
+            set_bulk_mode(cur, False)
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Bewegungsdaten ohne Trigger importieren, Lager danach neu berechnen.")
+    p.add_argument("dir", help="Ordner mit einkauf.csv, einkaufartikel.csv, verkauf.csv, verkaufartikel.csv")
+    args = p.parse_args(argv)
+
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        sys.exit(1)
+
+    t_start = time.perf_counter()
+    try:
+        bulk_import(conn, Path(args.dir))
+        print(f"• Fertig in {time.perf_counter() - t_start:.1f} s")
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ IMPORT ABGEBROCHEN, nichts gespeichert: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
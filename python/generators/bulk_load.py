@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+bulk_load.py
+Lädt die Dateien aus "generate_history --out DIR" schnell in die Datenbank.
+
+Ablauf:
+  1) Prüfen: keine ungeschützten Lager-Trigger aktiv (sonst würde LOAD DATA jede Zeile doppelt buchen).
+     Trigger aus sql/trigger.sql werden über @newshop_bulk = 1 für diese Session abgeschaltet.
+  2) Bewegungstabellen leeren (TRUNCATE), Prüfungen aus (FOREIGN_KEY_CHECKS, UNIQUE_CHECKS).
+  3) Sekundär-Indizes der Bewegungstabellen entfernen (werden am Ende neu gebaut).
+  4) LOAD DATA LOCAL INFILE für einkauf, einkaufartikel, verkauf, verkaufartikel.
+  5) Endbestand + Durchschnittskosten aus artikel_bestand.csv in artikel übernehmen.
+  6) Indizes wieder anlegen, commit.
+
+Achtung: TRUNCATE und ALTER TABLE beenden in MySQL die Transaktion (impliziter Commit). Bricht das Laden
+danach ab, sind die Bewegungstabellen schon leer bzw. nur teilweise gefüllt – ein rollback holt die alten
+Daten NICHT zurück. Dann den Lauf einfach wiederholen (er beginnt wieder mit TRUNCATE).
+
+Start:
+    python -m python.generators.bulk_load data/run1
+
+Hinweis: Der MySQL-Server braucht "local_infile=1" (SET GLOBAL local_infile = 1;).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+from db import get_conn
+from dialect import is_sqlite, table_exists
+from generators.hot_stock import reset_stripes
+from generators.offline import COLUMNS, FACT_TABLES
+
+# Indizes aus sql/index.sql auf den Bewegungstabellen → beim Laden entfernen, danach neu bauen
+# (Name, Tabelle, Spalten)
+DEFERRED_INDEXES: List[Tuple[str, str, str]] = [
+    ("idx_einkauf_lieferantID",       "einkauf",        "lieferantID"),
+    ("idx_einkaufartikel_einkaufID",  "einkaufartikel", "einkaufID"),
+    ("idx_einkaufartikel_artikelID",  "einkaufartikel", "artikelID"),
+    ("idx_verkauf_kundenID",          "verkauf",        "kundenID"),
+    ("idx_verkauf_datum",             "verkauf",        "verkaufsdatum"),
+    ("idx_verkaufartikel_verkaufID",  "verkaufartikel", "verkaufID"),
+    ("idx_verkaufartikel_artikelID",  "verkaufartikel", "artikelID"),
+]
+
+# MySQL-Fehler 1553: Index wird von einem Fremdschlüssel gebraucht → bleibt bestehen
+ER_DROP_INDEX_FK = 1553
+
+
+# Session-Variable, mit der die Trigger aus sql/trigger.sql nichts tun
+BULK_FLAG = "@newshop_bulk"
+
+
+def active_stock_triggers(cur) -> List[str]:
+    """
+    Namen der Trigger auf einkaufartikel/verkaufartikel, die sich NICHT über @newshop_bulk
+    abschalten lassen (alte Version von sql/trigger.sql).
+    """
+    if is_sqlite():
+        cur.execute("""
+            SELECT name FROM sqlite_master
+            WHERE type = 'trigger'
+              AND tbl_name IN ('einkaufartikel', 'verkaufartikel')
+              AND sql NOT LIKE %s
+        """, ("%newshop_bulk()%",))
+        return [r[0] for r in cur.fetchall()]
+    cur.execute("""
+        SELECT TRIGGER_NAME
+        FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE()
+          AND EVENT_OBJECT_TABLE IN ('einkaufartikel', 'verkaufartikel')
+          AND ACTION_STATEMENT NOT LIKE %s
+    """, (f"%{BULK_FLAG}%",))
+    return [r[0] for r in cur.fetchall()]
+
+
+def set_bulk_mode(cur, on: bool) -> None:
+    """Lager-Trigger für diese Session ab- (on=True) bzw. wieder einschalten."""
+    if is_sqlite():
+        cur.connection.bulk = on            # liest newshop_bulk() in sql/sqlite/trigger.sql
+        return
+    cur.execute(f"SET {BULK_FLAG} = %s", (1 if on else None,))
+
+
+def mark_rescan(cur, tables: Sequence[str]) -> None:
+    """
+    Bulk-Läufe protokollieren nicht zeilenweise in changelog (sql/changelog.sql) →
+    stattdessen eine R-Zeile pro Tabelle: Konsumenten lesen diese Tabellen komplett neu.
+    Ohne changelog-Tabelle: nichts zu tun.
+    """
+    if tables and table_exists(cur, "changelog"):
+        cur.executemany("INSERT INTO changelog (tabelle, op) VALUES (%s, 'R')", [(t,) for t in tables])
+
+
+def existing_indexes(cur) -> set:
+    """(Tabelle, Indexname) aller vorhandenen Indizes der Bewegungstabellen."""
+    cur.execute("""
+        SELECT DISTINCT TABLE_NAME, INDEX_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE()
+          AND TABLE_NAME IN ('einkauf', 'einkaufartikel', 'verkauf', 'verkaufartikel')
+    """)
+    return {(r[0], r[1]) for r in cur.fetchall()}
+
+
+def drop_deferred_indexes(cur) -> List[Tuple[str, str, str]]:
+    """Sekundär-Indizes entfernen. Gibt die tatsächlich entfernten zurück (für den Neuaufbau)."""
+    present = existing_indexes(cur)
+    dropped = []
+    for name, table, cols in DEFERRED_INDEXES:
+        if (table, name) not in present:
+            continue
+        try:
+            cur.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+            dropped.append((name, table, cols))
+        except Exception as e:
+            if getattr(e, "args", [None])[0] == ER_DROP_INDEX_FK:
+                print(f"  (Index {name} wird für Fremdschlüssel gebraucht → bleibt)")
+                continue
+            raise
+    return dropped
+
+
+def rebuild_indexes(cur, indexes: List[Tuple[str, str, str]]) -> None:
+    """Entfernte Indizes wieder anlegen (pro Tabelle ein ALTER → ein Durchlauf über die Daten)."""
+    by_table = {}
+    for name, table, cols in indexes:
+        by_table.setdefault(table, []).append(f"ADD INDEX {name} ({cols})")
+    for table, parts in by_table.items():
+        cur.execute(f"ALTER TABLE {table} " + ", ".join(parts))
+
+
+def load_csv(cur, path: Path, table: str, columns) -> int:
+    """Eine CSV-Datei mit LOAD DATA LOCAL INFILE laden. Gibt die Anzahl Zeilen zurück."""
+    cur.execute(
+        f"""
+        LOAD DATA LOCAL INFILE %s
+        INTO TABLE {table}
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+        LINES TERMINATED BY '\\n'
+        IGNORE 1 LINES
+        ({", ".join(columns)})
+        """,
+        (str(path),),
+    )
+    return cur.rowcount
+
+
+def apply_final_stock(cur, path: Path) -> int:
+    """Endbestand/Durchschnittskosten über eine temporäre Tabelle in einem UPDATE übernehmen."""
+    cur.execute("""
+        CREATE TEMPORARY TABLE tmp_artikel_bestand (
+          artikelID INT PRIMARY KEY,
+          lagerbestand INT NOT NULL,
+          durchschnittskosten DECIMAL(10,4) NULL
+        )
+    """)
+    load_csv(cur, path, "tmp_artikel_bestand", COLUMNS["artikel_bestand"])
+    cur.execute("UPDATE artikel SET lagerbestand = 0, durchschnittskosten = NULL")
+    reset_stripes(cur)
+    cur.execute("""
+        UPDATE artikel a
+        JOIN tmp_artikel_bestand t ON t.artikelID = a.artikelID
+        SET a.lagerbestand = t.lagerbestand,
+            a.durchschnittskosten = t.durchschnittskosten
+    """)
+    n = cur.rowcount
+    cur.execute("DROP TEMPORARY TABLE tmp_artikel_bestand")
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="CSV-Dateien aus generate_history --out laden.")
+    p.add_argument("dir", help="Ordner mit einkauf.csv, einkaufartikel.csv, verkauf.csv, …")
+    args = p.parse_args(argv)
+
+    src = Path(args.dir)
+    missing = [t for t in (*FACT_TABLES, "artikel_bestand") if not (src / f"{t}.csv").exists()]
+    if missing:
+        print(f"Dateien fehlen in {src}: {', '.join(m + '.csv' for m in missing)}")
+        return
+
+    conn = get_conn(local_infile=True)
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        return
+
+    t_start = time.perf_counter()
+    dropped = []
+    truncated = False       # ab TRUNCATE hilft rollback nicht mehr (impliziter Commit)
+    try:
+        with conn.cursor() as cur:
+            triggers = active_stock_triggers(cur)
+            if triggers:
+                print("Abbruch: Lager-Trigger ohne Bulk-Schalter aktiv (" + ", ".join(triggers) + ").")
+                print("Bitte sql/trigger.sql neu einspielen (oder sql/drop_trigger.sql ausführen).")
+                return
+
+            set_bulk_mode(cur, True)
+            cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+            cur.execute("SET UNIQUE_CHECKS = 0")
+
+            print("• Leere Bewegungstabellen …")
+            truncated = True
+            for t in reversed(FACT_TABLES):
+                cur.execute(f"TRUNCATE TABLE {t}")
+
+            print("• Entferne Sekundär-Indizes …")
+            dropped = drop_deferred_indexes(cur)
+
+            for t in FACT_TABLES:
+                t0 = time.perf_counter()
+                n = load_csv(cur, src / f"{t}.csv", t, COLUMNS[t])
+                print(f"• {t}: {n} Zeilen in {time.perf_counter() - t0:.1f} s")
+
+            n = apply_final_stock(cur, src / "artikel_bestand.csv")
+            print(f"• artikel: Bestand für {n} Artikel übernommen")
+            mark_rescan(cur, list(FACT_TABLES) + ["artikel"])
+
+            if dropped:
+                t0 = time.perf_counter()
+                rebuild_indexes(cur, dropped)
+                dropped = []
+                print(f"• Indizes neu gebaut in {time.perf_counter() - t0:.1f} s")
+
+            cur.execute("SET UNIQUE_CHECKS = 1")
+            cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+            set_bulk_mode(cur, False)
+
+        conn.commit()
+        print(f"• Fertig in {time.perf_counter() - t_start:.1f} s")
+
+    except Exception as e:
+        conn.rollback()
+        if truncated:
+            print(f"Fehler beim Laden: {e}")
+            print("Achtung: TRUNCATE/ALTER TABLE waren schon gespeichert (impliziter Commit) – die "
+                  "Bewegungstabellen sind leer oder nur teilweise geladen, die alten Daten sind weg.")
+            print(f"Bitte den Lauf wiederholen: python -m python.generators.bulk_load {args.dir}")
+        else:
+            print(f"Fehler beim Laden, nichts geändert: {e}")
+    finally:
+        # Indizes nie dauerhaft fehlen lassen (auch nach einem Fehler)
+        if dropped:
+            try:
+                with conn.cursor() as cur:
+                    rebuild_indexes(cur, dropped)
+            except Exception as e:
+                print(f"Indizes konnten nicht neu gebaut werden: {e}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -11,16 +11,52 @@ Was das Skript macht (kurz und einfach):
 • Wenn Lager für einen Artikel zu klein ist → vor dem Verkauf automatisch nachkaufen.
 • Beim Einkauf wird lagerbestand erhöht und durchschnittskosten (Durchschnittspreis) neu berechnet.
 • Es wird schneller, weil wir einmal am Tag „committen“ und viele Nachschlage-Daten cachen.
+• Mit --workers N werden die Bons parallel in N Prozessen simuliert (Kunden werden aufgeteilt).
+  Jeder Worker bekommt einen abgeleiteten Seed → gleiche Daten bei gleicher Worker-Anzahl
+  (und gleichem Simulationsweg: mit NumPy entstehen andere Bons als ohne).
+  Ein Koordinator schreibt die Bons danach zeitlich sortiert (= aufsteigende IDs) in die DB
+  und macht dabei den Lager-Abgleich (Auto-Nachkauf).
+
+• Nach jedem Tag wird ein Checkpoint gespeichert (Tabelle generator_checkpoint, gleiche
+  Transaktion wie der Tag). Nach Absturz oder Ctrl+C geht es mit --resume weiter.
+• Mit --out DIR werden die Bewegungsdaten nicht in die DB, sondern in Dateien geschrieben
+  (CSV oder Parquet, siehe offline.py). Laden danach schnell mit bulk_load.py.
+
+Start:
+    python -m python.generators.generate_history                 (1 Prozess, wie bisher)
+    python -m python.generators.generate_history --workers 4     (4 Prozesse)
+    python -m python.generators.generate_history --out data/run1 (nur Dateien, DB bleibt unverändert)
+    python -m python.generators.generate_history --resume        (nach Abbruch fortsetzen)
+    python -m python.generators.generate_history --scale 10      (10× Stammdaten, siehe scale.py)
 """
 
 from __future__ import annotations
 
+import argparse
+import json
+import math
+import multiprocessing as mp
 import random
+import time
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 
 import pymysql
 from db import get_conn  # eigene Funktion: verbindet zur DB (liest .env)
+from dialect import last_insert_id, table_exists, update_order_by
+from generators.bulk_load import active_stock_triggers, mark_rescan, set_bulk_mode
+from generators.hot_stock import reset_stripes
+from generators.offline import FileStore, is_offline
+from generators.scale import scale_master_data
+from profiler import SamplingProfiler, write_collapsed
+
+# Tabellen, die im Bulk-Modus ohne changelog-Einträge geändert werden (→ mark_rescan)
+CHANGELOG_TABLES = ["verkauf", "verkaufartikel", "einkauf", "einkaufartikel", "artikel", "artikelpreis"]
+
+try:
+    import numpy as np   # optional: schnelle Simulation mit Arrays
+except ImportError:      # ohne NumPy → reine Python-Simulation (gleiche Regeln)
+    np = None
 
 # ============================== K O N S T A N T E N ==============================
 
@@ -64,6 +100,12 @@ VK_FALLBACK_MARKUP = 1.35
 # Wie oft Fortschritt drucken (alle N Tage)
 PROGRESS_EVERY_N_DAYS = 7
 
+# 8) Zufall: Basis-Seed (pro Partition und Woche wird daraus ein Seed abgeleitet)
+BASE_SEED = 42
+
+# 9) NumPy-Simulation: max. Zellen der Zufallsmatrix (Bons × Artikel) pro Block
+SIM_CHUNK_CELLS = 2_000_000
+
 
 # ============================== H I L F S F U N K T I O N E N ==============================
 
@@ -115,7 +157,7 @@ def exec_many(conn, sql: str, rows: List[Tuple]) -> None:
 def last_id(conn) -> int:
     """Letzte erzeugte ID (AUTO_INCREMENT) holen."""
     with conn.cursor() as cur:
-        cur.execute("SELECT LAST_INSERT_ID();")
+        cur.execute(f"SELECT {last_insert_id()};")
         return int(cur.fetchone()[0])
 
 
@@ -184,6 +226,8 @@ def load_latest_prices(conn) -> Dict[int, float]:
 
 def get_stock_and_avgcost(conn, artikel_id: int) -> Tuple[int, float]:
     """Lagerbestand und durchschnittskosten (Durchschnitt) eines Artikels holen."""
+    if is_offline(conn):
+        return conn.get_stock_and_avgcost(artikel_id)
     row = fetch_one(
         conn,
         "SELECT COALESCE(lagerbestand,0) AS qty, COALESCE(durchschnittskosten,0) AS avgc "
@@ -204,6 +248,9 @@ def inc_stock_with_avgcost(conn, artikel_id: int, qty: int, price: float) -> Non
     new_qty = cur_qty + qty
     total_value = (cur_qty * cur_avg) + (qty * price)
     new_avg = round(total_value / new_qty, 4) if new_qty > 0 else 0.0
+    if is_offline(conn):
+        conn.set_stock(artikel_id, new_qty, new_avg)
+        return
     exec_one(
         conn,
         "UPDATE artikel SET lagerbestand=%s, durchschnittskosten=%s WHERE artikelID=%s;",
@@ -211,10 +258,30 @@ def inc_stock_with_avgcost(conn, artikel_id: int, qty: int, price: float) -> Non
     )
 
 
+def dec_stock_many(conn, items: Dict[int, int]) -> None:
+    """
+    Verkauf: Lager mehrerer Artikel in EINEM UPDATE vermindern (nicht negativ werden lassen).
+    ORDER BY artikelID → Zeilen werden immer in derselben Reihenfolge gesperrt.
+    items: {artikelID: menge}
+    """
+    ids = sorted(items)
+    cases = " ".join(["WHEN %s THEN %s"] * len(ids))
+    params = [v for a in ids for v in (a, items[a])] + ids
+    exec_one(
+        conn,
+        f"UPDATE artikel SET lagerbestand = GREATEST(0, lagerbestand - CASE artikelID {cases} END) "
+        f"WHERE artikelID IN ({', '.join(['%s'] * len(ids))}){update_order_by('artikelID')};",
+        tuple(params),
+    )
+
+
 def dec_stock(conn, artikel_id: int, qty: int) -> None:
     """Verkauf: Lager vermindern (nicht negativ werden lassen)."""
     cur_qty, _ = get_stock_and_avgcost(conn, artikel_id)
     new_qty = max(0, cur_qty - qty)
+    if is_offline(conn):
+        conn.set_stock(artikel_id, new_qty)
+        return
     exec_one(conn, "UPDATE artikel SET lagerbestand=%s WHERE artikelID=%s;", (new_qty, artikel_id))
 
 
@@ -222,11 +289,14 @@ def dec_stock(conn, artikel_id: int, qty: int) -> None:
 
 def create_purchase_header(conn, lieferant_id: int, when: datetime, note: str) -> int:
     """Kopfzeile für Einkauf anlegen (einkauf)."""
+    values = (lieferant_id, when, f"INV-{random.randint(10_000, 99_999)}", note)
+    if is_offline(conn):
+        return conn.add_row("einkauf", values)
     exec_one(
         conn,
         "INSERT INTO einkauf (lieferantID, einkaufsdatum, rechnung, bemerkung) "
         "VALUES (%s, %s, %s, %s);",
-        (lieferant_id, when, f"INV-{random.randint(10_000, 99_999)}", note),
+        values,
     )
     return last_id(conn)
 
@@ -242,6 +312,9 @@ def add_purchase_items(conn, einkauf_id: int, items: List[Tuple[int, int, float]
         rows.append((einkauf_id, a_id, qty, price))
         inc_stock_with_avgcost(conn, a_id, qty, price)
 
+    if is_offline(conn):
+        conn.add_rows("einkaufartikel", rows)
+        return
     exec_many(
         conn,
         "INSERT INTO einkaufartikel (einkaufID, artikelID, einkaufsmenge, einkaufspreis) "
@@ -316,6 +389,8 @@ def restock_if_needed(conn,
 
 def create_sale_header(conn, kunden_id: int, when: datetime) -> int:
     """Kopfzeile für Verkauf (Bon) anlegen."""
+    if is_offline(conn):
+        return conn.add_row("verkauf", (kunden_id, when))
     exec_one(conn, "INSERT INTO verkauf (kundenID, verkaufsdatum) VALUES (%s, %s);", (kunden_id, when))
     return last_id(conn)
 
@@ -325,113 +400,463 @@ def add_sale_items(conn,
                    rows: List[Tuple[int, int, float, float]],
                    do_stock_update: bool = True) -> None:
     """
-    Verkaufs-Positionen einfügen.
+    Verkaufs-Positionen einfügen (nach artikelID sortiert, wie reservation.reserve_receipt).
     rows: [(artikelID, verkaufsmenge, verkaufspreis, rabatt), ...]
     """
-    exec_many(
-        conn,
-        "INSERT INTO verkaufartikel (verkaufID, artikelID, verkaufsmenge, verkaufspreis, rabatt) "
-        "VALUES (%s, %s, %s, %s, %s);",
-        [(verkauf_id, a, q, p, r) for (a, q, p, r) in rows],
-    )
-    if do_stock_update:
+    rows = sorted(rows, key=lambda r: r[0])
+    values = [(verkauf_id, a, q, p, r) for (a, q, p, r) in rows]
+    if is_offline(conn):
+        conn.add_rows("verkaufartikel", values)
+    else:
+        exec_many(
+            conn,
+            "INSERT INTO verkaufartikel (verkaufID, artikelID, verkaufsmenge, verkaufspreis, rabatt) "
+            "VALUES (%s, %s, %s, %s, %s);",
+            values,
+        )
+    if not do_stock_update or not rows:
+        return
+    if is_offline(conn):
         for a, q, _, _ in rows:
             dec_stock(conn, a, q)
+        return
+    # ein UPDATE pro Bon statt SELECT + UPDATE pro Position
+    totals: Dict[int, int] = {}
+    for a, q, _, _ in rows:
+        totals[a] = totals.get(a, 0) + q
+    dec_stock_many(conn, totals)
+
 
+# Ein simulierter Bon: (Zeitpunkt, kundenID, [(artikelID, menge, vk_preis|None, rabatt), ...])
+# vk_preis = None → kein Listenpreis, Preis wird beim Schreiben aus den Durchschnittskosten berechnet.
+Receipt = Tuple[datetime, int, List[Tuple[int, int, Optional[float], float]]]
 
-def weekly_receipt_days(count: int) -> List[int]:
+
+def weekly_receipt_days(count: int, rng=random) -> List[int]:
     """Gibt zufällige Wochentage (0=Mo..6=So) zurück, an denen verkauft wird."""
     count = max(0, min(7, count))
-    return sorted(random.sample(range(7), count))
+    return sorted(rng.sample(range(7), count))
+
+
+def week_starts(d0: date, d1: date):
+    """Gibt den Montag jeder Woche zurück, die den Zeitraum d0..d1 berührt."""
+    cur = d0 - timedelta(days=d0.weekday())
+    while cur <= d1:
+        yield cur
+        cur += timedelta(days=7)
+
+
+def worker_seed(base_seed: int, part: int, week_start: date) -> str:
+    """Abgeleiteter Seed für eine Aufgabe (Partition + Woche)."""
+    return f"{base_seed}:{part}:{week_start.isoformat()}"
+
+
+def simulation_path() -> str:
+    """'numpy' oder 'python' – welche Simulation läuft (steht im Checkpoint, siehe --resume)."""
+    return "numpy" if np is not None else "python"
+
+
+def run_state(base_seed: int, workers: int) -> dict:
+    """Lauf-Optionen für den Checkpoint: alles, wovon die erzeugten Daten abhängen."""
+    return {"seed": base_seed, "workers": workers, "simulation": simulation_path()}
+
+
+def make_rng(base_seed: int, part: int, week_start: date):
+    """
+    Zufallsgenerator für (Partition, Woche).
+    Mit NumPy → np.random.Generator, sonst random.Random. Gleiche Seeds → gleiche Daten nur auf demselben
+    Weg: NumPy- und Python-Simulation erzeugen bei gleichem Seed unterschiedliche Bons (hängt also davon
+    ab, ob NumPy installiert ist).
+    """
+    if np is not None:
+        return np.random.default_rng([base_seed, part, week_start.toordinal()])
+    return random.Random(worker_seed(base_seed, part, week_start))
+
+
+def simulate_week_py(rng: random.Random, week_start: date, kunden: List[dict],
+                     artikel_ids: List[int], price_cache: Dict[int, float]) -> List[Receipt]:
+    """
+    Reine Python-Simulation einer Woche (Fallback, wenn NumPy fehlt).
+    Regeln: TYPE_RULES (Positionen + Stück), Rabatt aus kundentyp, Listenpreis aus Cache.
+    """
+    receipts: List[Receipt] = []
+
+    for k in kunden:
+        k_id = int(k["kundenID"])
+        typ_name = (k.get("type_name") or "Standard").strip()
+        rabatt = float(k.get("rabatt") or 0.0)
+        rules = TYPE_RULES.get(typ_name, TYPE_RULES["Standard"])
+
+        cnt = rng.randint(RECEIPTS_PER_WEEK_MIN, RECEIPTS_PER_WEEK_MAX)
+        for wd in weekly_receipt_days(cnt, rng):
+            cur_day = week_start + timedelta(days=wd)
+            if cur_day < SALES_START or cur_day > SALES_END:
+                continue
+
+            items_n = rng.randint(rules["items_min"], rules["items_max"])
+            items_n = max(1, min(items_n, len(artikel_ids)))
+            when = datetime(cur_day.year, cur_day.month, cur_day.day,
+                            rng.randint(STORE_OPEN_HOUR, STORE_CLOSE_HOUR - 1),
+                            rng.randint(0, 59), rng.randint(0, 59))
+
+            rows = []
+            for a_id in rng.sample(artikel_ids, items_n):
+                qty = rng.randint(rules["qty_min"], rules["qty_max"])
+                base_price = price_cache.get(a_id)
+                vk_preis = round(base_price * (1.0 - rabatt / 100.0), 2) if base_price is not None else None
+                rows.append((a_id, qty, vk_preis, rabatt))
+            receipts.append((when, k_id, rows))
+
+    return receipts
+
+
+def _choose_articles_np(rng, items, n_art: int):
+    """
+    Pro Bon items[i] verschiedene Artikel-Positionen (0..n_art-1) ziehen – ohne Schleife pro Artikel.
+    Trick: je Bon eine Zeile Zufallsschlüssel; die kleinsten items[i] Schlüssel = gewählte Artikel.
+    Gearbeitet wird in Blöcken, damit die Matrix klein bleibt (max. SIM_CHUNK_CELLS Zellen).
+    Ergebnis: flaches Array, Bon für Bon hintereinander.
+    """
+    out = []
+    rows_per_chunk = max(1, SIM_CHUNK_CELLS // n_art)
+    for s in range(0, len(items), rows_per_chunk):
+        it = items[s:s + rows_per_chunk]
+        kmax = int(it.max())
+        keys = rng.random((len(it), n_art))
+        if kmax < n_art:
+            idx = np.argpartition(keys, kmax - 1, axis=1)[:, :kmax]
+        else:
+            idx = np.broadcast_to(np.arange(n_art), keys.shape)
+        # innerhalb der kmax Kandidaten nach Schlüssel sortieren → die ersten items[i] nehmen
+        order = np.take_along_axis(keys, idx, axis=1).argsort(axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+        mask = np.arange(kmax)[None, :] < it[:, None]
+        out.append(idx[mask])
+    return np.concatenate(out)
+
+
+def simulate_week_np(rng, week_start: date, kunden: List[dict],
+                     artikel_ids: List[int], price_cache: Dict[int, float]) -> List[Receipt]:
+    """
+    NumPy-Simulation einer Woche: alle Bons, Positionen, Artikel, Mengen und Uhrzeiten
+    werden als Arrays gezogen (keine Schleife pro Kunde/Artikel beim Würfeln).
+    Gleiche Regeln wie simulate_week_py(): TYPE_RULES + Rabatt aus kundentyp.
+    """
+    n_k, n_art = len(kunden), len(artikel_ids)
+    if not n_k or not n_art:
+        return []
+
+    # Regeln und Rabatt als Arrays (eine Zeile pro Kunde)
+    rules = [TYPE_RULES.get((k.get("type_name") or "Standard").strip(), TYPE_RULES["Standard"])
+             for k in kunden]
+    k_ids = np.array([int(k["kundenID"]) for k in kunden])
+    rabatt = np.array([float(k.get("rabatt") or 0.0) for k in kunden])
+    qty_min = np.array([r["qty_min"] for r in rules])
+    qty_max = np.array([r["qty_max"] for r in rules])
+    items_min = np.array([r["items_min"] for r in rules])
+    items_max = np.array([r["items_max"] for r in rules])
+
+    # 1) Bons pro Woche: Anzahl je Kunde + verschiedene Wochentage (Rang der Schlüssel < Anzahl)
+    cnt = rng.integers(RECEIPTS_PER_WEEK_MIN, RECEIPTS_PER_WEEK_MAX + 1, size=n_k).clip(0, 7)
+    rank = rng.random((n_k, 7)).argsort(axis=1).argsort(axis=1)
+    active = rank < cnt[:, None]
+    in_range = np.array([SALES_START <= week_start + timedelta(days=i) <= SALES_END for i in range(7)])
+    active &= in_range[None, :]
+
+    r_kunde, r_wd = np.nonzero(active)   # ein Eintrag pro Bon
+    n_r = len(r_kunde)
+    if not n_r:
+        return []
+
+    # 2) Positionen pro Bon + Uhrzeit (Sekunden ab Mitternacht)
+    items = rng.integers(items_min[r_kunde], items_max[r_kunde] + 1).clip(1, n_art)
+    secs = rng.integers(STORE_OPEN_HOUR * 3600, STORE_CLOSE_HOUR * 3600, size=n_r)
+
+    # 3) Artikel (ohne Wiederholung im Bon) und 4) Stückzahl je Position
+    chosen = _choose_articles_np(rng, items, n_art)
+    line_kunde = np.repeat(r_kunde, items)
+    qty = rng.integers(qty_min[line_kunde], qty_max[line_kunde] + 1)
+
+    # 5) Preise: Listenpreis minus Kundenrabatt (NaN = kein Listenpreis → später Fallback)
+    base = np.array([price_cache.get(a, np.nan) for a in artikel_ids], dtype=float)
+    line_rabatt = rabatt[line_kunde]
+    vk = np.round(base[chosen] * (1.0 - line_rabatt / 100.0), 2)
+
+    # In Python-Tupel umwandeln (für das Schreiben in die DB)
+    art_l = np.asarray(artikel_ids)[chosen].tolist()
+    qty_l, vk_l, rab_l = qty.tolist(), vk.tolist(), line_rabatt.tolist()
+    bounds = np.concatenate(([0], np.cumsum(items))).tolist()
+
+    receipts: List[Receipt] = []
+    for i in range(n_r):
+        d = week_start + timedelta(days=int(r_wd[i]))
+        s = int(secs[i])
+        when = datetime(d.year, d.month, d.day, s // 3600, (s % 3600) // 60, s % 60)
+        rows = [(art_l[j], qty_l[j], None if math.isnan(vk_l[j]) else vk_l[j], rab_l[j])
+                for j in range(bounds[i], bounds[i + 1])]
+        receipts.append((when, int(k_ids[r_kunde[i]]), rows))
+    return receipts
+
+
+def simulate_customers_week(base_seed: int, part: int, week_start: date, kunden: List[dict],
+                            artikel_ids: List[int], price_cache: Dict[int, float]) -> List[Receipt]:
+    """Eine Woche für eine Kunden-Partition simulieren (NumPy wenn vorhanden, sonst Python)."""
+    rng = make_rng(base_seed, part, week_start)
+    if np is not None:
+        return simulate_week_np(rng, week_start, kunden, artikel_ids, price_cache)
+    return simulate_week_py(rng, week_start, kunden, artikel_ids, price_cache)
+
+
+def write_receipt(conn, receipt: Receipt,
+                  suppliers_by_art: Dict[int, List[Tuple[int, float]]]) -> None:
+    """
+    Einen simulierten Bon schreiben.
+    Vorher wird bei knappem Lager automatisch nachgekauft.
+    """
+    when, k_id, rows = receipt
+    vk_id = create_sale_header(conn, k_id, when)
+
+    resolved: List[Tuple[int, int, float, float]] = []
+    for a_id, qty, vk_preis, rabatt in rows:
+        # Vor Verkauf ggf. nachkaufen (wenn Bestand knapp)
+        try:
+            restock_if_needed(conn, a_id, max(RESTOCK_THRESHOLD, qty), suppliers_by_art, when)
+        except Exception:
+            # Fehler beim Auto-Nachkauf ignorieren (geht weiter)
+            pass
+
+        # Verkaufspreis ohne Listenpreis: Durchschnittskosten * Aufschlag
+        if vk_preis is None:
+            _, avgc = get_stock_and_avgcost(conn, a_id)
+            vk_preis = round((avgc or 1.0) * VK_FALLBACK_MARKUP * (1.0 - rabatt / 100.0), 2)
+        resolved.append((a_id, qty, vk_preis, rabatt))
+
+    # Positionen eintragen + Lager verringern
+    add_sale_items(conn, vk_id, resolved)
+
+
+def write_week(conn, week_start: date, receipts: List[Receipt],
+               suppliers_by_art: Dict[int, List[Tuple[int, float]]], day_no: int,
+               state: Optional[dict] = None, resume_after: Optional[date] = None) -> int:
+    """
+    Bons einer Woche nach Zeit sortiert schreiben (→ IDs in Zeitreihenfolge), ein Commit pro Tag.
+    state        → Lauf-Optionen für den Checkpoint (None = kein Checkpoint)
+    resume_after → Tage bis einschließlich diesem Datum sind schon gespeichert (--resume)
+    Gibt den neuen Tageszähler zurück (für die Fortschrittsanzeige).
+    """
+    total_days = (SALES_END - SALES_START).days + 1
+
+    by_day: Dict[date, List[Receipt]] = {}
+    for r in sorted(receipts, key=lambda r: (r[0], r[1])):
+        by_day.setdefault(r[0].date(), []).append(r)
+
+    for wd in range(7):
+        cur_day = week_start + timedelta(days=wd)
+        if cur_day < SALES_START or cur_day > SALES_END:
+            continue
+        if resume_after is not None and cur_day <= resume_after:
+            continue  # schon im letzten Lauf gespeichert
+        day_no += 1
+
+        for r in by_day.get(cur_day, []):
+            write_receipt(conn, r, suppliers_by_art)
+
+        # Checkpoint in derselben Transaktion wie der Tag
+        if state is not None and not is_offline(conn):
+            save_checkpoint(conn, cur_day, day_no, state)
+
+        # Einmal pro Tag speichern (schneller)
+        conn.commit()
+
+        # Fortschritt zeigen
+        if day_no % PROGRESS_EVERY_N_DAYS == 0 or day_no == total_days:
+            print(f"  • committed day {day_no}/{total_days}: {cur_day.isoformat()}")
+
+    return day_no
 
 
 def generate_sales(conn,
                    artikel_ids: List[int],
                    kunden: List[dict],
                    suppliers_by_art: Dict[int, List[Tuple[int, float]]],
-                   price_cache: Dict[int, float]) -> None:
+                   price_cache: Dict[int, float],
+                   base_seed: int = BASE_SEED,
+                   resume_after: Optional[date] = None,
+                   day_no: int = 0) -> Dict[str, float]:
     """
     Erzeugt die täglichen Verkäufe für den ganzen Zeitraum.
+    Der Plan wird Woche für Woche erzeugt (nicht alles im Voraus) und sofort geschrieben.
+    Mit resume_after werden bereits gespeicherte Tage übersprungen (die Woche wird mit
+    demselben Seed neu simuliert → gleiche Bons wie im abgebrochenen Lauf).
     Nutzt:
       • TYPE_RULES (wie viele Positionen + Stück)
       • Rabatt aus kundentyp
       • Auto-Nachkauf bei Bedarf
+    Gibt die Zeit für Simulation und Schreiben zurück (Sekunden).
     """
+    times = {"simulation": 0.0, "schreiben": 0.0}
     if not artikel_ids or not kunden:
-        return
+        return times
+
+    state = run_state(base_seed, 1)
+    for week_start in week_starts(SALES_START, SALES_END):
+        if resume_after is not None and week_start + timedelta(days=6) <= resume_after:
+            continue
+        t0 = time.perf_counter()
+        receipts = simulate_customers_week(base_seed, 0, week_start, kunden, artikel_ids, price_cache)
+        t1 = time.perf_counter()
+        day_no = write_week(conn, week_start, receipts, suppliers_by_art, day_no, state, resume_after)
+        times["simulation"] += t1 - t0
+        times["schreiben"] += time.perf_counter() - t1
+    return times
+
+
+# ============================== P A R A L L E L - M O D U S ==============================
+# Idee:
+#   • Kunden werden auf N Partitionen verteilt (kunden[i::N]).
+#   • Ein Worker-Prozess simuliert für (Woche, Partition) alle Bons – OHNE Datenbank.
+#     Der Seed hängt nur von (BASE_SEED, Partition, Woche) ab → reproduzierbar pro Worker-Anzahl.
+#   • Der Koordinator (Hauptprozess) sammelt die Bons einer Woche, sortiert sie nach Zeit
+#     und schreibt sie Tag für Tag (Auto-Nachkauf + Lager wie im normalen Modus).
+#   • Grenze: nur die Simulation wird parallel. Das Schreiben (Auto-Nachkauf, Lager, INSERTs) bleibt
+#     seriell über eine Verbindung, weil Lager und Durchschnittskosten von der Reihenfolge der Bons
+#     abhängen. Mehr Worker verkürzen also höchstens die Simulationszeit; main() gibt beide Anteile aus.
+#     Gemessen (SQLite, Originaldaten, 667 Tage): Simulation ≈ 0,1 s, Schreiben ≈ 4 s → mehr Worker
+#     bringen hier nichts (Zahlen für 1/2/4/8 im README). Lohnt sich nur, wenn die Simulation teuer ist.
+
+# Nachschlage-Daten im Worker-Prozess (werden einmal pro Prozess gesetzt, nicht pro Aufgabe)
+_W_ARTIKEL: List[int] = []
+_W_PARTS: List[List[dict]] = []
+_W_PRICES: Dict[int, float] = {}
+_W_SEED: int = BASE_SEED
+
+
+def _init_worker(artikel_ids: List[int], parts: List[List[dict]],
+                 price_cache: Dict[int, float], base_seed: int) -> None:
+    """Initialisierung eines Worker-Prozesses (Pool-initializer)."""
+    global _W_ARTIKEL, _W_PARTS, _W_PRICES, _W_SEED
+    _W_ARTIKEL, _W_PARTS, _W_PRICES, _W_SEED = artikel_ids, parts, price_cache, base_seed
+
+
+def simulate_week(task: Tuple[date, int]) -> List[Receipt]:
+    """Worker: simuliert alle Bons einer Woche für eine Kunden-Partition (ohne DB)."""
+    week_start, part = task
+    return simulate_customers_week(_W_SEED, part, week_start, _W_PARTS[part], _W_ARTIKEL, _W_PRICES)
+
+
+def generate_sales_parallel(conn,
+                            artikel_ids: List[int],
+                            kunden: List[dict],
+                            suppliers_by_art: Dict[int, List[Tuple[int, float]]],
+                            price_cache: Dict[int, float],
+                            workers: int,
+                            base_seed: int = BASE_SEED,
+                            resume_after: Optional[date] = None,
+                            day_no: int = 0) -> Dict[str, float]:
+    """
+    Verkäufe mit mehreren Prozessen erzeugen.
+    Die Simulation läuft parallel, das Schreiben in die DB macht nur der Koordinator
+    (eine Verbindung, ein Commit pro Tag, Bons nach Zeit sortiert → IDs in Zeitreihenfolge).
+    Gibt zurück, wie lange der Koordinator auf die Worker gewartet und wie lange er geschrieben hat.
+    """
+    times = {"simulation": 0.0, "schreiben": 0.0}
+    if not artikel_ids or not kunden:
+        return times
+
+    parts = [kunden[i::workers] for i in range(workers)]
+    weeks = [w for w in week_starts(SALES_START, SALES_END)
+             if resume_after is None or w + timedelta(days=6) > resume_after]
+    tasks = [(w, p) for w in weeks for p in range(workers)]
+
+    state = run_state(base_seed, workers)
+    with mp.Pool(workers, initializer=_init_worker,
+                 initargs=(artikel_ids, parts, price_cache, base_seed)) as pool:
+        # imap liefert die Ergebnisse in Aufgaben-Reihenfolge (Woche für Woche)
+        results = pool.imap(simulate_week, tasks, chunksize=1)
+
+        for week_start in weeks:
+            t0 = time.perf_counter()
+            receipts: List[Receipt] = []
+            for _ in range(workers):
+                receipts.extend(next(results))
+            t1 = time.perf_counter()
+            day_no = write_week(conn, week_start, receipts, suppliers_by_art, day_no,
+                                state, resume_after)
+            times["simulation"] += t1 - t0        # Warten auf die Worker (was nicht überlappt)
+            times["schreiben"] += time.perf_counter() - t1
+    return times
+
+
+# ============================== C H E C K P O I N T ==============================
+# Eine Zeile pro Job: letzter gespeicherter Tag, Zustand des Zufallsgenerators (random, für
+# Auto-Nachkauf/Rechnungsnummern) und die Lauf-Optionen. Die Wochen-Simulation selbst braucht
+# keinen Zustand – sie hängt nur vom Seed ab und wird beim Fortsetzen neu berechnet.
+
+CHECKPOINT_JOB = "generate_history"
+
+
+def ensure_checkpoint_table(conn) -> None:
+    """Tabelle generator_checkpoint anlegen, falls sie fehlt (siehe sql/generator_checkpoint.sql)."""
+    with conn.cursor() as cur:
+        if table_exists(cur, "generator_checkpoint"):
+            return
+    exec_one(conn, """
+        CREATE TABLE IF NOT EXISTS generator_checkpoint (
+          job VARCHAR(50) PRIMARY KEY,
+          letzter_tag DATE NOT NULL,
+          tage_fertig INT NOT NULL,
+          tage_gesamt INT NOT NULL,
+          rng_state LONGTEXT NOT NULL,
+          zustand LONGTEXT NOT NULL,
+          aktualisiert_am DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
 
-    # Plan: für jede Woche und jeden Kunden
-    # (year, week, kundenID) → Liste von Verkaufstagen [0..6]
-    schedule: Dict[Tuple[int, int, int], List[int]] = {}
-    d = SALES_START
-    while d <= SALES_END:
-        y, w, _ = d.isocalendar()
-        for k in kunden:
-            k_id = int(k["kundenID"])
-            cnt = random.randint(RECEIPTS_PER_WEEK_MIN, RECEIPTS_PER_WEEK_MAX)
-            schedule[(y, w, k_id)] = weekly_receipt_days(cnt)
-        d += timedelta(days=7)
 
-    total_days = (SALES_END - SALES_START).days + 1
-    for i, cur_day in enumerate(daterange(SALES_START, SALES_END), start=1):
-        y, w, wd = cur_day.isocalendar()
-        wd = wd - 1  # 0..6 (Mo..So)
-
-        for k in kunden:
-            k_id = int(k["kundenID"])
-            typ_name = (k.get("type_name") or "Standard").strip()
-            rabatt   = float(k.get("rabatt") or 0.0)
-
-            # An diesem Wochentag für diesen Kunden ein Bon geplant?
-            if schedule.get((y, w, k_id)) and wd in schedule[(y, w, k_id)]:
-                rules = TYPE_RULES.get(typ_name, TYPE_RULES["Standard"])
-
-                # Wie viele Positionen im Bon?
-                items_n = random.randint(rules["items_min"], rules["items_max"])
-                items_n = max(1, min(items_n, len(artikel_ids)))
-
-                when = rand_time_in_day(cur_day)
-                vk_id = create_sale_header(conn, k_id, when)
-
-                # Zufällige Artikel auswählen
-                chosen = random.sample(artikel_ids, items_n)
-                rows: List[Tuple[int, int, float, float]] = []
-
-                for a_id in chosen:
-                    # Stückzahl pro Position
-                    qty = random.randint(rules["qty_min"], rules["qty_max"])
-
-                    # Vor Verkauf ggf. nachkaufen (wenn Bestand knapp)
-                    try:
-                        restock_if_needed(conn, a_id, max(RESTOCK_THRESHOLD, qty), suppliers_by_art, when)
-                    except Exception:
-                        # Fehler beim Auto-Nachkauf ignorieren (geht weiter)
-                        pass
-
-                    # Verkaufspreis:
-                    # 1) ideal: Listenpreis aus Cache
-                    # 2) sonst: Durchschnittskosten * Aufschlag
-                    base_price = price_cache.get(a_id)
-                    if base_price is None:
-                        _, avgc = get_stock_and_avgcost(conn, a_id)
-                        base_price = (avgc or 1.0) * VK_FALLBACK_MARKUP
-
-                    vk_preis = round(base_price * (1.0 - rabatt / 100.0), 2)
-                    rows.append((a_id, qty, vk_preis, rabatt))
-
-                # Positionen eintragen + Lager verringern
-                add_sale_items(conn, vk_id, rows)
+def save_checkpoint(conn, last_day: date, day_no: int, state: dict) -> None:
+    """Checkpoint schreiben (ohne commit – gehört zur Transaktion des Tages)."""
+    exec_one(
+        conn,
+        "REPLACE INTO generator_checkpoint "
+        "(job, letzter_tag, tage_fertig, tage_gesamt, rng_state, zustand) "
+        "VALUES (%s, %s, %s, %s, %s, %s);",
+        (CHECKPOINT_JOB, last_day, day_no, (SALES_END - SALES_START).days + 1,
+         json.dumps(random.getstate()), json.dumps(state)),
+    )
 
-        # Einmal pro Tag speichern (schneller)
-        conn.commit()
 
-        # Fortschritt zeigen
-        if i % PROGRESS_EVERY_N_DAYS == 0 or i == total_days:
-            print(f"  • committed day {i}/{total_days}: {cur_day.isoformat()}")
+def load_checkpoint(conn) -> Optional[dict]:
+    """Checkpoint lesen (oder None). rng_state wird wieder in ein Tupel für random.setstate umgewandelt."""
+    row = fetch_one(conn, "SELECT * FROM generator_checkpoint WHERE job=%s;", (CHECKPOINT_JOB,))
+    if not row:
+        return None
+    version, internal, gauss = json.loads(row["rng_state"])
+    row["rng_state"] = (version, tuple(internal), gauss)
+    row["zustand"] = json.loads(row["zustand"])
+    return row
 
 
 # ============================== H A U P T A B L A U F ==============================
 
+def mark_history_rescan(conn) -> None:
+    """
+    R-Zeilen für alle Bewegungstabellen sofort committen. Im Bulk-Modus schreibt kein Trigger nach changelog;
+    jeder Tag wird aber einzeln committet → Konsumenten müssen schon vor dem ersten Tag (clear_all),
+    beim Fortsetzen und nach einem Abbruch davon erfahren, nicht erst am Ende eines erfolgreichen Laufs.
+    """
+    with conn.cursor() as cur:
+        mark_rescan(cur, CHANGELOG_TABLES)
+    conn.commit()
+
+
+def mark_after_abort(conn) -> None:
+    """Nach Abbruch: schon committete Tage melden (Verbindung kann kaputt sein → nur Warnung)."""
+    try:
+        mark_history_rescan(conn)
+    except Exception as e:
+        print(f"⚠️  changelog-Markierung (R) nicht geschrieben: {e} – Konsumenten ggf. von Hand neu lesen lassen")
+
+
 def clear_all(conn) -> None:
     """Alle bisherigen Bewegungen löschen und Lager zurücksetzen."""
     exec_one(conn, "DELETE FROM verkaufartikel;")
@@ -439,23 +864,105 @@ def clear_all(conn) -> None:
     exec_one(conn, "DELETE FROM einkaufartikel;")
     exec_one(conn, "DELETE FROM einkauf;")
     exec_one(conn, "UPDATE artikel SET lagerbestand=0, durchschnittskosten=NULL;")
+    with conn.cursor() as cur:
+        reset_stripes(cur)
+        mark_rescan(cur, CHANGELOG_TABLES)
+    exec_one(conn, "DELETE FROM generator_checkpoint WHERE job=%s;", (CHECKPOINT_JOB,))
     conn.commit()
 
 
-def main() -> None:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Kommandozeilen-Optionen lesen."""
+    p = argparse.ArgumentParser(description="Historische Einkäufe/Verkäufe erzeugen.")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Anzahl Prozesse für die Verkaufs-Simulation (Standard: 1)")
+    p.add_argument("--seed", type=int, default=BASE_SEED,
+                   help=f"Basis-Seed für den Zufall (Standard: {BASE_SEED})")
+    p.add_argument("--out", metavar="DIR",
+                   help="Bewegungsdaten in Dateien schreiben statt in die DB (Laden: bulk_load.py)")
+    p.add_argument("--format", choices=("csv", "parquet"), default="csv",
+                   help="Dateiformat für --out (Standard: csv)")
+    p.add_argument("--resume", action="store_true",
+                   help="Abgebrochenen Lauf ab dem letzten Checkpoint fortsetzen")
+    p.add_argument("--scale", type=int, metavar="N",
+                   help="Stammdaten vorher synthetisch auf N× vergrößern (1 = Originaldaten)")
+    p.add_argument("--profile", metavar="DATEI",
+                   help="Laufzeit-Profil (collapsed-Format für Flammendiagramme) in DATEI schreiben")
+    args = p.parse_args(argv)
+    args.workers = max(1, args.workers)
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Gesamtablauf: löschen → Nachschlage-Daten laden → Anfangseinkäufe → Verkäufe erzeugen."""
+    args = parse_args(argv)
+
     conn = get_conn()
     if not conn:
         print("Keine Verbindung zur Datenbank")
         return
 
+    if args.resume and args.out:
+        print("--resume geht nur beim Schreiben in die DB (nicht mit --out).")
+        conn.close()
+        return
+    if args.scale and (args.out or args.resume):
+        print("--scale geht nur bei einem neuen DB-Lauf (für --out vorher: python -m python.generators.scale N).")
+        conn.close()
+        return
+
+    # Ziel: DB-Verbindung oder (mit --out) Dateien; Stammdaten werden immer aus der DB gelesen
+    target = FileStore(args.out, args.format) if args.out else conn
+
+    t_start = time.perf_counter()
+    profiler = SamplingProfiler().start() if args.profile else None
     try:
         # gleiche Zufallswerte bei jedem Lauf (reproduzierbar)
-        random.seed(42)
-
-        print("• Cleaning data …")
-        clear_all(conn)
-        print("  done.")
+        random.seed(args.seed)
+
+        resume_after: Optional[date] = None
+        day_no = 0
+        if not is_offline(target):
+            ensure_checkpoint_table(conn)
+            # Lager + Durchschnittskosten rechnet dieses Skript selbst → Trigger für diese Session aus
+            with conn.cursor() as cur:
+                unguarded = active_stock_triggers(cur)
+                set_bulk_mode(cur, True)
+            if unguarded:
+                print("⚠️  Trigger ohne Bulk-Schalter aktiv (" + ", ".join(unguarded) + ") – "
+                      "bitte sql/trigger.sql neu einspielen oder sql/drop_trigger.sql ausführen.")
+
+        if args.resume:
+            cp = load_checkpoint(conn)
+            if not cp:
+                print("Kein Checkpoint gefunden – bitte ohne --resume starten.")
+                return
+            # NumPy- und Python-Simulation liefern verschiedene Bons → kein Wechsel mitten im Lauf
+            saved_path = cp["zustand"].get("simulation")
+            if saved_path and saved_path != simulation_path():
+                print(f"Checkpoint wurde mit der {saved_path}-Simulation erstellt, jetzt läuft "
+                      f"{simulation_path()} – Fortsetzen würde andere Daten erzeugen. Bitte ohne --resume "
+                      f"neu starten (oder {'NumPy installieren' if saved_path == 'numpy' else 'ohne NumPy starten'}).")
+                return
+            # Seed und Worker-Anzahl bestimmen die Daten → Werte aus dem Checkpoint übernehmen
+            args.seed = int(cp["zustand"]["seed"])
+            args.workers = int(cp["zustand"]["workers"])
+            random.setstate(cp["rng_state"])
+            resume_after, day_no = cp["letzter_tag"], int(cp["tage_fertig"])
+            mark_history_rescan(conn)       # Tage vor dem Abbruch + alle folgenden kommen ohne changelog-Zeilen
+            print(f"• Fortsetzen nach {resume_after} (Tag {day_no}/{cp['tage_gesamt']}, "
+                  f"seed={args.seed}, workers={args.workers})")
+        elif is_offline(target):
+            print(f"• Offline-Modus: schreibe {args.format.upper()} nach {args.out} (DB wird nicht verändert)")
+        else:
+            print("• Cleaning data …")
+            clear_all(conn)
+            print("  done.")
+
+            if args.scale:
+                print(f"• Scaling master data to {args.scale}× …")
+                created = scale_master_data(conn, args.scale, args.seed)
+                print("  " + ", ".join(f"{k}=+{v}" for k, v in created.items()))
 
         print("• Loading dictionaries …")
         artikel_ids      = load_articles(conn)
@@ -464,23 +971,55 @@ def main() -> None:
         price_cache      = load_latest_prices(conn)
         print(f"  artikel={len(artikel_ids)}, kunden={len(kunden)}, suppliers={len(suppliers_by_art)}, priced={len(price_cache)}")
 
-        print("• Initial purchases …")
-        initial_purchases(conn, suppliers_by_art)
+        if not args.resume:
+            print("• Initial purchases …")
+            initial_purchases(target, suppliers_by_art)
+            if not is_offline(target):
+                # Startpunkt für --resume: Anfangsbestand ist gespeichert, noch kein Verkaufstag
+                save_checkpoint(conn, SALES_START - timedelta(days=1), 0,
+                                run_state(args.seed, args.workers))
+                conn.commit()
+            print("  done.")
+
+        print(f"• Generating sales … (workers={args.workers})")
+        if args.workers > 1:
+            times = generate_sales_parallel(target, artikel_ids, kunden, suppliers_by_art, price_cache,
+                                    workers=args.workers, base_seed=args.seed,
+                                    resume_after=resume_after, day_no=day_no)
+        else:
+            times = generate_sales(target, artikel_ids, kunden, suppliers_by_art, price_cache,
+                           base_seed=args.seed, resume_after=resume_after, day_no=day_no)
         print("  done.")
 
-        print("• Generating sales …")
-        generate_sales(conn, artikel_ids, kunden, suppliers_by_art, price_cache)
-        print("  done.")
+        if is_offline(target):
+            target.close()
+            print(f"• Dateien geschrieben: {args.out}")
+        else:
+            # Verkäufe/Einkäufe liefen ohne changelog-Zeilen → Konsumenten lesen einmal alles neu
+            mark_history_rescan(conn)
+
+        # Laufzeit ausgeben (zum Vergleich 1/2/4/8 Worker)
+        print(f"• Dauer: {time.perf_counter() - t_start:.1f} s (workers={args.workers})")
+        print(f"  davon Verkäufe: Simulation {times['simulation']:.1f} s, Schreiben {times['schreiben']:.1f} s "
+              f"(Schreiben ist seriell → mehr Worker helfen nur beim Simulationsanteil)")
 
     except KeyboardInterrupt:
         # Manuell abgebrochen → aktuellen Tag zurückrollen
-        conn.rollback()
+        target.rollback()
         print("\n️ Stopped by user (Ctrl+C). Rolled back current transaction.")
+        if not is_offline(target):
+            mark_after_abort(conn)
+            print("  Fortsetzen mit: --resume")
     except Exception as e:
         # Fehler → alles zurückrollen
-        conn.rollback()
+        target.rollback()
         print(f" Fehler, Transaktion abgebrochen: {e}")
+        if not is_offline(target):
+            mark_after_abort(conn)
     finally:
+        if profiler is not None:
+            profiler.stop()
+            write_collapsed(profiler, args.profile)
         # Verbindung sicher schließen
         try:
             conn.close()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+hot_stock.py
+Hot-Artikel verwalten: Lagerbestand auf Teilzähler (Streifen) verteilen, damit gleichzeitige Verkäufe
+desselben Artikels nicht alle auf die Sperre der artikel-Zeile warten (siehe sql/artikel_hot.sql).
+Optional: braucht den Trigger aus sql/trigger_hot.sql (Einschränkungen dort); enable verweigert sonst.
+
+Bestand eines Hot-Artikels = artikel.lagerbestand (zentral) + Σ artikel_lager_stripe.menge (Puffer).
+trg_verkaufartikel_bi bucht Verkäufe vom Streifen der Verbindung ab und füllt ihn bei Bedarf
+aus dem zentralen Bestand nach. Die Summe bleibt immer exakt; nur artikel.lagerbestand allein
+ist für Hot-Artikel um die Puffer zu klein → Leser des Bestands (Berichte, purchase.py, sale.py,
+reservation.py) nehmen stock_source() bzw. cached_stock_source().
+
+  enable   Artikel als Hot-Artikel eintragen (IDs oder --top N meistverkaufte)
+  flush    Puffer in artikel.lagerbestand zurückbuchen (z. B. vor Inventur oder Export)
+  disable  zurückbuchen und Hot-Eintrag entfernen
+  status   Hot-Artikel mit zentralem Bestand und Puffern anzeigen
+
+Start:
+    python -m python.generators.hot_stock enable --top 20 --stripes 8
+    python -m python.generators.hot_stock status
+    python -m python.generators.hot_stock disable --all
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from typing import FrozenSet, List, Optional, Sequence
+
+from db import get_conn
+from dialect import days_ago, is_sqlite, table_exists
+
+STRIPES = 8                 # Teilzähler pro Hot-Artikel
+NACHFUELLMENGE = 50         # zusätzliche Menge pro Nachfüllen eines Streifens
+TOP_TAGE = 30               # --top: Verkäufe der letzten N Tage
+HOT_CACHE_TTL = 30.0        # cached_hot_ids/cached_stock_source: so lange wiederverwenden (Sekunden)
+
+# Zwischenspeicher für cached_hot_ids/cached_stock_source (pro Prozess, von allen Threads gelesen)
+_hot_cache = {"ids": frozenset(), "quelle": "artikel", "bis": 0.0}
+
+
+def _in(ids: Sequence[int]) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+def has_stripe_tables(cur) -> bool:
+    """True, wenn sql/artikel_hot.sql eingespielt ist (mit SQLite nie)."""
+    return table_exists(cur, "artikel_hot", "artikel_lager_stripe")
+
+
+def has_stripe_trigger(cur) -> bool:
+    """True, wenn trg_verkaufartikel_bi aus sql/trigger_hot.sql stammt (mit SQLite nie)."""
+    if is_sqlite():
+        return False
+    cur.execute("""
+        SELECT COUNT(*) FROM information_schema.TRIGGERS
+        WHERE TRIGGER_SCHEMA = DATABASE() AND TRIGGER_NAME = 'trg_verkaufartikel_bi'
+          AND ACTION_STATEMENT LIKE '%%artikel_lager_stripe%%'
+    """)
+    return cur.fetchone()[0] > 0
+
+
+def stock_source(cur) -> str:
+    """Tabelle/Sicht mit dem Gesamtbestand: v_artikel_bestand, wenn sql/artikel_hot.sql eingespielt ist."""
+    return "v_artikel_bestand" if table_exists(cur, "v_artikel_bestand") else "artikel"
+
+
+def hot_ids(cur) -> List[int]:
+    cur.execute("SELECT artikelID FROM artikel_hot ORDER BY artikelID")
+    return [r[0] for r in cur.fetchall()]
+
+
+def cached_hot_ids(cur, ttl: float = HOT_CACHE_TTL) -> FrozenSet[int]:
+    """
+    Hot-Artikel aus dem Zwischenspeicher (höchstens `ttl` Sekunden alt) – für Aufrufer pro Beleg
+    (reservation.py), damit nicht jeder Verkauf artikel_hot abfragt. Ohne Tabellen: leere Menge.
+    """
+    _refresh_cache(cur, ttl)
+    return _hot_cache["ids"]
+
+
+def cached_stock_source(cur, ttl: float = HOT_CACHE_TTL) -> str:
+    """stock_source() aus dem Zwischenspeicher – für Aufrufer pro Verkauf (sale.py, reservation.py)."""
+    _refresh_cache(cur, ttl)
+    return _hot_cache["quelle"]
+
+
+def _refresh_cache(cur, ttl: float) -> None:
+    now = time.monotonic()
+    if now >= _hot_cache["bis"]:
+        tabellen = has_stripe_tables(cur)
+        ids = frozenset(hot_ids(cur)) if tabellen else frozenset()
+        _hot_cache.update(ids=ids, quelle=stock_source(cur) if tabellen else "artikel", bis=now + ttl)
+
+
+def top_sellers(cur, k: int, tage: int = TOP_TAGE) -> List[int]:
+    """
+    Die k meistverkauften Artikel (Menge, letzte `tage` Tage) mit Lagerbestand > 0.
+    Ohne Verkäufe im Zeitraum: die k Artikel mit dem größten Bestand.
+    """
+    source = stock_source(cur)
+    cur.execute(f"""
+        SELECT s.artikelID
+        FROM v_sales s
+        JOIN {source} a ON a.artikelID = s.artikelID
+        WHERE s.verkaufsdatum >= {days_ago()}
+          AND a.lagerbestand > 0
+        GROUP BY s.artikelID
+        ORDER BY SUM(s.menge) DESC
+        LIMIT %s
+    """, (tage, k))
+    ids = [r[0] for r in cur.fetchall()]
+    if len(ids) < k:
+        cur.execute(f"SELECT artikelID FROM {source} ORDER BY lagerbestand DESC LIMIT %s", (k,))
+        ids += [r[0] for r in cur.fetchall() if r[0] not in ids][:k - len(ids)]
+    return ids
+
+
+def flush(cur, ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Puffer der Streifen in artikel.lagerbestand zurückbuchen (alle Hot-Artikel oder nur `ids`).
+    Sperrt zuerst die Streifen, dann die artikel-Zeilen (gleiche Reihenfolge wie der Trigger
+    beim Nachfüllen). Gibt die zurückgebuchte Menge zurück.
+    """
+    if ids is not None and not ids:
+        return 0
+    where, params = ("WHERE artikelID IN (" + _in(ids) + ")", tuple(ids)) if ids else ("", ())
+    cur.execute(f"SELECT COALESCE(SUM(menge), 0) FROM artikel_lager_stripe {where} FOR UPDATE", params)
+    moved = int(cur.fetchone()[0])
+    cur.execute(f"""
+        UPDATE artikel a
+        JOIN (
+            SELECT artikelID, SUM(menge) AS menge
+            FROM artikel_lager_stripe {where}
+            GROUP BY artikelID
+        ) s ON s.artikelID = a.artikelID
+        SET a.lagerbestand = a.lagerbestand + s.menge
+    """, params)
+    cur.execute(f"UPDATE artikel_lager_stripe SET menge = 0 {where}", params)
+    return moved
+
+
+def enable(cur, ids: Sequence[int], stripes: int = STRIPES, nachfuellmenge: int = NACHFUELLMENGE) -> int:
+    """Artikel als Hot-Artikel eintragen (bestehende: Puffer zurückbuchen, Streifen neu anlegen)."""
+    if not ids:
+        return 0
+    if not 2 <= stripes <= 64:
+        raise ValueError("stripes muss zwischen 2 und 64 liegen")
+    flush(cur, ids)
+    cur.execute(f"DELETE FROM artikel_lager_stripe WHERE artikelID IN ({_in(ids)})", tuple(ids))
+    now = datetime.now()
+    cur.executemany("""
+        INSERT INTO artikel_hot (artikelID, stripes, nachfuellmenge, aktiviert_am)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE stripes = VALUES(stripes),
+                                nachfuellmenge = VALUES(nachfuellmenge),
+                                aktiviert_am = VALUES(aktiviert_am)
+    """, [(a, stripes, nachfuellmenge, now) for a in ids])
+    cur.executemany(
+        "INSERT INTO artikel_lager_stripe (artikelID, stripe, menge) VALUES (%s, %s, 0)",
+        [(a, s) for a in ids for s in range(stripes)])
+    _hot_cache["bis"] = 0.0
+    return len(ids)
+
+
+def disable(cur, ids: Optional[Sequence[int]] = None) -> int:
+    """Puffer zurückbuchen und Hot-Einträge löschen (alle oder nur `ids`). Gibt die Anzahl Artikel zurück."""
+    ids = list(ids) if ids is not None else hot_ids(cur)
+    if not ids:
+        return 0
+    flush(cur, ids)
+    cur.execute(f"DELETE FROM artikel_lager_stripe WHERE artikelID IN ({_in(ids)})", tuple(ids))
+    cur.execute(f"DELETE FROM artikel_hot WHERE artikelID IN ({_in(ids)})", tuple(ids))
+    _hot_cache["bis"] = 0.0
+    return cur.rowcount
+
+
+def reset_stripes(cur) -> None:
+    """
+    Alle Puffer auf 0 setzen, ohne zurückzubuchen – für Jobs, die artikel.lagerbestand
+    absolut neu setzen (bulk_import, bulk_load, generate_history, reconcile --fix).
+    Ohne sql/artikel_hot.sql: nichts zu tun.
+    """
+    if has_stripe_tables(cur):
+        cur.execute("UPDATE artikel_lager_stripe SET menge = 0 WHERE menge <> 0")
+
+
+def print_status(cur) -> None:
+    cur.execute("""
+        SELECT h.artikelID, b.produktname, h.stripes, h.nachfuellmenge,
+               b.lager_zentral, b.lager_stripes, b.lagerbestand
+        FROM artikel_hot h
+        JOIN v_artikel_bestand b ON b.artikelID = h.artikelID
+        ORDER BY h.artikelID
+    """)
+    rows = cur.fetchall()
+    print(f"• Hot-Artikel: {len(rows)}")
+    if rows:
+        print(f"  {'artikelID':>9}  {'Streifen':>8}  {'Nachf.':>6}  {'zentral':>9}  {'Puffer':>7}  {'gesamt':>9}  Artikel")
+        for a, name, st, nf, zentral, puffer, gesamt in rows:
+            print(f"  {a:>9}  {st:>8}  {nf:>6}  {zentral:>9}  {puffer:>7}  {gesamt:>9}  {name}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Hot-Artikel mit aufgeteiltem Lagerzähler verwalten.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    e = sub.add_parser("enable", help="Artikel als Hot-Artikel eintragen")
+    e.add_argument("ids", type=int, nargs="*")
+    e.add_argument("--top", type=int, default=0, help="die N meistverkauften Artikel")
+    e.add_argument("--stripes", type=int, default=STRIPES)
+    e.add_argument("--nachfuellmenge", type=int, default=NACHFUELLMENGE)
+
+    for name, text in (("flush", "Puffer in artikel.lagerbestand zurückbuchen"),
+                       ("disable", "zurückbuchen und Hot-Eintrag entfernen")):
+        d = sub.add_parser(name, help=text)
+        d.add_argument("ids", type=int, nargs="*")
+        d.add_argument("--all", action="store_true", help="alle Hot-Artikel")
+
+    sub.add_parser("status", help="Hot-Artikel anzeigen")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        sys.exit(1)
+
+    try:
+        with conn.cursor() as cur:
+            if not has_stripe_tables(cur):
+                print("Tabellen fehlen – bitte sql/artikel_hot.sql einspielen.")
+                sys.exit(1)
+            if args.cmd == "enable" and not has_stripe_trigger(cur):
+                # ohne den Streifen-Trigger würden Verkäufe die Puffer nie benutzen
+                print("Trigger fehlt – bitte sql/trigger_hot.sql einspielen (optional, Einschränkungen dort).")
+                sys.exit(1)
+
+            if args.cmd == "enable":
+                ids = list(args.ids) + (top_sellers(cur, args.top) if args.top else [])
+                n = enable(cur, list(dict.fromkeys(ids)), args.stripes, args.nachfuellmenge)
+                print(f"• Hot-Artikel eingetragen: {n} ({args.stripes} Streifen)")
+            elif args.cmd in ("flush", "disable"):
+                if not args.ids and not args.all:
+                    print("Artikel-IDs oder --all angeben")
+                    sys.exit(1)
+                ids = None if args.all else args.ids
+                if args.cmd == "flush":
+                    print(f"• Zurückgebucht: {flush(cur, ids)} Stück")
+                else:
+                    print(f"• Hot-Artikel entfernt: {disable(cur, ids)}")
+            else:
+                print_status(cur)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Fehler, Transaktion abgebrochen: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
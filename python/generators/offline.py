@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+offline.py
+Ziel für generate_history ohne Schreibzugriff auf die Datenbank (Option --out).
+
+Statt INSERT/UPDATE werden die Bewegungsdaten als Dateien geschrieben:
+  einkauf, einkaufartikel, verkauf, verkaufartikel  → eine Datei pro Tabelle
+  artikel_bestand                                   → Endbestand + Durchschnittskosten je Artikel
+
+• IDs werden hier selbst vergeben (ab 1, wie nach clear_all()) und stehen in der ersten Spalte.
+  Der Loader (bulk_load.py) übernimmt sie 1:1 → gleiche IDs wie bei einem Lauf gegen die DB.
+• Lager und Durchschnittskosten werden im Speicher geführt (gleiche Formeln wie in der DB-Variante).
+• Format: CSV (Standard, für LOAD DATA LOCAL INFILE) oder Parquet (benötigt pyarrow).
+"""
+
+from __future__ import annotations
+
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Spalten pro Datei (Reihenfolge = Spalten der Tabelle, erste Spalte = Primärschlüssel)
+COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "einkauf":         ("einkaufID", "lieferantID", "einkaufsdatum", "rechnung", "bemerkung"),
+    "einkaufartikel":  ("einkauf_artikelID", "einkaufID", "artikelID", "einkaufsmenge", "einkaufspreis"),
+    "verkauf":         ("verkaufID", "kundenID", "verkaufsdatum"),
+    "verkaufartikel":  ("verkauf_artikelID", "verkaufID", "artikelID", "verkaufsmenge",
+                        "verkaufspreis", "rabatt"),
+    "artikel_bestand": ("artikelID", "lagerbestand", "durchschnittskosten"),
+}
+
+# Reihenfolge beim Laden (Kopf vor Positionen wegen Fremdschlüsseln)
+FACT_TABLES = ("einkauf", "einkaufartikel", "verkauf", "verkaufartikel")
+
+# NULL-Markierung in CSV (versteht LOAD DATA INFILE)
+CSV_NULL = r"\N"
+
+# Parquet: Zeilen puffern und als Row-Group schreiben, sobald so viele zusammen sind
+PARQUET_ROW_GROUP = 100_000
+
+
+def _csv_value(v):
+    """Wert für CSV aufbereiten (NULL → \\N, datetime → 'YYYY-MM-DD HH:MM:SS')."""
+    if v is None:
+        return CSV_NULL
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d %H:%M:%S")
+    return v
+
+
+def _arrow_type(column: str):
+    """Parquet-Datentyp einer Spalte (fest, damit alle Row-Groups das gleiche Schema haben)."""
+    import pyarrow as pa
+    if column.endswith("datum"):
+        return pa.timestamp("s")
+    if column in ("rechnung", "bemerkung"):
+        return pa.string()
+    if column.endswith("preis") or column in ("rabatt", "durchschnittskosten"):
+        return pa.float64()
+    return pa.int64()
+
+
+class FileStore:
+    """
+    Ersetzt die DB-Verbindung in generate_history (nur Schreiben).
+    Bietet die gleichen Schritte wie die DB-Variante: Kopf anlegen, Positionen anlegen,
+    Bestand lesen/setzen, commit/rollback/close.
+    """
+
+    def __init__(self, out_dir: str, fmt: str = "csv"):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+
+        # Nächste ID pro Tabelle (AUTO_INCREMENT-Ersatz)
+        self._next_id: Dict[str, int] = {t: 1 for t in FACT_TABLES}
+
+        # Lager im Speicher: artikelID → Menge / Durchschnittskosten
+        self.stock: Dict[int, int] = {}
+        self.avgcost: Dict[int, Optional[float]] = {}
+
+        self._files = {}
+        self._writers = {}
+        self._buffers: Dict[str, List[Sequence]] = {t: [] for t in FACT_TABLES}
+        self._committed: Dict[str, int] = {t: 0 for t in FACT_TABLES}  # gespeicherte Zeilen im Puffer
+        # Stand beim letzten commit → rollback setzt IDs und Lager darauf zurück
+        self._saved_next_id: Dict[str, int] = dict(self._next_id)
+        self._saved_stock: Dict[int, int] = {}
+        self._saved_avgcost: Dict[int, Optional[float]] = {}
+
+        if fmt == "csv":
+            for t in FACT_TABLES:
+                f = open(self.out_dir / f"{t}.csv", "w", newline="", encoding="utf-8")
+                w = csv.writer(f, lineterminator="\n")
+                w.writerow(COLUMNS[t])
+                self._files[t], self._writers[t] = f, w
+        elif fmt == "parquet":
+            import pyarrow  # noqa: F401 – früh prüfen, ob pyarrow installiert ist
+        else:
+            raise ValueError(f"Unbekanntes Format: {fmt}")
+
+    # ---------- Zeilen schreiben ----------
+
+    def add_row(self, table: str, values: Sequence) -> int:
+        """Eine Zeile anhängen, neue ID zurückgeben."""
+        new_id = self._next_id[table]
+        self._next_id[table] += 1
+        self._buffers[table].append((new_id, *values))
+        return new_id
+
+    def add_rows(self, table: str, rows: List[Sequence]) -> None:
+        """Mehrere Zeilen anhängen (IDs werden fortlaufend vergeben)."""
+        for values in rows:
+            self.add_row(table, values)
+
+    # ---------- Lager ----------
+
+    def get_stock_and_avgcost(self, artikel_id: int) -> Tuple[int, float]:
+        return self.stock.get(artikel_id, 0), float(self.avgcost.get(artikel_id) or 0.0)
+
+    def set_stock(self, artikel_id: int, qty: int, avgcost: Optional[float] = None) -> None:
+        """Bestand setzen; Durchschnittskosten nur, wenn angegeben (wie UPDATE ... SET)."""
+        self.stock[artikel_id] = qty
+        if avgcost is not None:
+            self.avgcost[artikel_id] = avgcost
+
+    # ---------- Transaktion (Dateien) ----------
+
+    def commit(self) -> None:
+        """Gepufferte Zeilen auf die Platte schreiben."""
+        for t in FACT_TABLES:
+            buf = self._buffers[t]
+            if not buf:
+                continue
+            if self.fmt == "csv":
+                self._writers[t].writerows([_csv_value(v) for v in row] for row in buf)
+                buf.clear()
+            elif len(buf) >= PARQUET_ROW_GROUP:
+                self._flush_parquet(t)
+            self._committed[t] = len(buf)
+        self._saved_next_id = dict(self._next_id)
+        self._saved_stock = dict(self.stock)
+        self._saved_avgcost = dict(self.avgcost)
+
+    def rollback(self) -> None:
+        """Nicht gespeicherte Zeilen (aktueller Tag) verwerfen; IDs und Lager wie beim letzten commit."""
+        for t, buf in self._buffers.items():
+            del buf[self._committed[t]:]
+        self._next_id = dict(self._saved_next_id)
+        self.stock = dict(self._saved_stock)
+        self.avgcost = dict(self._saved_avgcost)
+
+    def close(self) -> None:
+        """Restliche Zeilen + Endbestand schreiben, Dateien schließen."""
+        self.commit()
+        bestand = [(a, self.stock.get(a, 0), self.avgcost.get(a))
+                   for a in sorted(set(self.stock) | set(self.avgcost))]
+
+        if self.fmt == "csv":
+            for f in self._files.values():
+                f.close()
+            with open(self.out_dir / "artikel_bestand.csv", "w", newline="", encoding="utf-8") as f:
+                w = csv.writer(f, lineterminator="\n")
+                w.writerow(COLUMNS["artikel_bestand"])
+                w.writerows([_csv_value(v) for v in row] for row in bestand)
+        else:
+            for t in FACT_TABLES:
+                self._flush_parquet(t)
+                writer = self._writers.pop(t, None)
+                if writer is not None:
+                    writer.close()
+            self._write_parquet_table("artikel_bestand", bestand)
+
+    # ---------- Parquet ----------
+
+    def _to_arrow(self, table: str, rows: List[Sequence]):
+        import pyarrow as pa
+        cols = COLUMNS[table]
+        schema = pa.schema([(c, _arrow_type(c)) for c in cols])
+        return pa.table({c: [r[i] for r in rows] for i, c in enumerate(cols)}, schema=schema)
+
+    def _flush_parquet(self, table: str) -> None:
+        """Puffer einer Tabelle als Row-Group in die Parquet-Datei schreiben."""
+        import pyarrow.parquet as pq
+        buf = self._buffers[table]
+        if not buf:
+            return
+        data = self._to_arrow(table, buf)
+        if table not in self._writers:
+            self._writers[table] = pq.ParquetWriter(self.out_dir / f"{table}.parquet", data.schema)
+        self._writers[table].write_table(data)
+        buf.clear()
+
+    def _write_parquet_table(self, table: str, rows: List[Sequence]) -> None:
+        import pyarrow.parquet as pq
+        pq.write_table(self._to_arrow(table, rows), self.out_dir / f"{table}.parquet")
+
+
+def is_offline(conn) -> bool:
+    """True, wenn generate_history in Dateien statt in die DB schreibt."""
+    return isinstance(conn, FileStore)
@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+pos_load.py
+Dauerlast wie an mehreren Kassen: N Threads erzeugen gleichzeitig Verkäufe (wie sale.py),
+über einen Verbindungs-Pool und mit einer Ziel-Rate (Belege pro Sekunde).
+
+Gemessen wird laufend:
+  • Latenz pro Beleg (p50 / p95 / p99 / max), gemessen ab dem geplanten Startzeitpunkt
+    → wenn die Ziel-Rate nicht erreicht wird, zählt die Wartezeit mit.
+  • Deadlocks (1213), Lock-Timeouts (1205), "Not enough stock" aus trg_verkaufartikel_bi,
+    Belege ohne Artikel auf Lager, sonstige Fehler, fehlgeschlagener Verbindungsaufbau (no_conn).
+    Deadlock/Lock-Timeout wird erst gezählt, wenn auch die Wiederholungen aus
+    reservation.run_with_retry scheitern; jede Wiederholung zählt als "retry".
+
+Konkurrenz-Test (Hot-Artikel, optional: sql/artikel_hot.sql + sql/trigger_hot.sql):
+  --hot K       alle Kassen verkaufen nur die K meistverkauften Artikel (kleines K = mehr Warten auf dieselben Zeilen)
+  --stripes N   diese Artikel für den Lauf auf N Teilzähler verteilen (0 = normaler Trigger-Weg), danach zurückbuchen
+  Listen wie --hot 64,16,4,1 --stripes 0,8 laufen nacheinander (je --duration Sekunden) → Vergleichstabelle.
+
+Start (lokale MySQL-Instanz aus .env):
+    python -m python.generators.pos_load --workers 8 --rate 50 --duration 120
+    python -m python.generators.pos_load --workers 16 --rate 0          (so schnell wie möglich)
+    python -m python.generators.pos_load --workers 16 --rate 0 --duration 30 --hot 64,16,4,1 --stripes 0,8
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from db import ConnectionPool
+from generators import hot_stock
+from generators.reservation import InsufficientStock, run_with_retry
+from generators.sale import create_random_sale
+
+# MySQL-Fehlercodes
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+ER_SIGNAL_EXCEPTION = 1644          # SIGNAL SQLSTATE '45000' aus den Triggern
+
+# Ergebnis-Arten (Reihenfolge = Ausgabe)
+KINDS = ("ok", "deadlock", "lock_timeout", "no_stock", "empty", "error", "retry", "no_conn")
+RECONNECT_WAIT_S = 1.0      # Pause nach fehlgeschlagenem Verbindungsaufbau (no_conn), dann neuer Versuch
+
+# Histogramm für die Gesamtauswertung: logarithmische Klassen, 2 % Breite (feste Speichergröße)
+HIST_STEP = math.log(1.02)
+
+# Rückstand, den der Taktgeber höchstens aufholt (danach wird neu angesetzt)
+MAX_BACKLOG_S = 1.0
+
+
+def classify_error(e: Exception) -> str:
+    """Fehler einer Ergebnis-Art zuordnen."""
+    args = getattr(e, "args", ())
+    code = args[0] if args and isinstance(args[0], int) else None
+    msg = str(args[1]) if len(args) > 1 else str(e)
+    if code == ER_LOCK_DEADLOCK:
+        return "deadlock"
+    if code == ER_LOCK_WAIT_TIMEOUT:
+        return "lock_timeout"
+    if code == ER_SIGNAL_EXCEPTION and "Not enough stock" in msg or isinstance(e, InsufficientStock):
+        return "no_stock"
+    if isinstance(e, RuntimeError) and msg.startswith("Keine Artikel hinzugefügt"):
+        return "no_stock"               # sale.py: alle Positionen auf den gesperrten Bestand (0) gekürzt
+    if isinstance(e, RuntimeError) and "Lagerbestand" in msg:
+        return "empty"
+    return "error"
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """q-Quantil (0..1) einer sortierten Liste (nächster Rang)."""
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[i]
+
+
+class LoadStats:
+    """
+    Zähler + Latenzen, von allen Threads beschrieben.
+    Fenster (seit der letzten Ausgabe): exakte Werte. Gesamt: Histogramm (Speicher bleibt konstant).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.window: List[float] = []
+        self.window_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self.hist: Dict[int, int] = {}
+        self.max_ms = 0.0
+
+    def record(self, kind: str, latency_ms: float) -> None:
+        with self._lock:
+            self.window_counts[kind] += 1
+            self.total_counts[kind] += 1
+            if kind == "ok":
+                self.window.append(latency_ms)
+                b = int(math.log(max(latency_ms, 0.01)) / HIST_STEP)
+                self.hist[b] = self.hist.get(b, 0) + 1
+                self.max_ms = max(self.max_ms, latency_ms)
+
+    def take_window(self):
+        """Fenster-Werte abholen und zurücksetzen → (sortierte Latenzen, Zähler)."""
+        with self._lock:
+            lat, cnt = self.window, self.window_counts
+            self.window, self.window_counts = [], Counter()
+        lat.sort()
+        return lat, cnt
+
+    def total_percentile(self, q: float) -> float:
+        with self._lock:
+            n = sum(self.hist.values())
+            if not n:
+                return 0.0
+            rank = math.ceil(q * n)
+            seen = 0
+            for b in sorted(self.hist):
+                seen += self.hist[b]
+                if seen >= rank:
+                    return math.exp((b + 0.5) * HIST_STEP)
+        return 0.0
+
+
+class Pacer:
+    """Verteilt Startzeitpunkte gleichmäßig auf alle Threads (rate = Belege/s, 0 = ohne Takt)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def next_slot(self) -> float:
+        """Geplanten Startzeitpunkt holen (time.monotonic-Skala)."""
+        now = time.monotonic()
+        if not self.interval:
+            return now
+        with self._lock:
+            if self._next < now - MAX_BACKLOG_S:
+                self._next = now
+            slot = self._next
+            self._next += self.interval
+        return slot
+
+
+def worker(pool: ConnectionPool, pacer: Pacer, stats: LoadStats, stop: threading.Event,
+           artikel_pool: Optional[List[int]] = None) -> None:
+    """
+    Ein Kassen-Thread: Belege erzeugen bis stop gesetzt ist (optional nur aus artikel_pool).
+    Keine Verbindung → zählt als "no_conn", kurze Pause, neuer Versuch (der Thread läuft weiter).
+    """
+    conn = None
+    conn_failed = False                  # Fehlermeldung nur beim ersten Fehlschlag in Folge
+    try:
+        while not stop.is_set():
+            if conn is None:
+                try:
+                    conn = pool.acquire()
+                    conn_failed = False
+                except Exception as e:
+                    stats.record("no_conn", 0.0)
+                    if not conn_failed:
+                        print(f"⚠️  {threading.current_thread().name}: keine Verbindung zur Datenbank – {e}")
+                        conn_failed = True
+                    if stop.wait(RECONNECT_WAIT_S):
+                        break
+                    continue
+
+            slot = pacer.next_slot()
+            wait = slot - time.monotonic()
+            if wait > 0 and stop.wait(wait):
+                break
+            try:
+                # Deadlock/Lock-Timeout → ganze Transaktion neu (zählt als "retry", Latenz läuft weiter)
+                run_with_retry(conn, lambda cur: create_random_sale(cur, artikel_pool),
+                               on_retry=lambda e: stats.record("retry", 0.0))
+                kind = "ok"
+            except Exception as e:
+                kind = classify_error(e)
+                try:
+                    conn.rollback()
+                except Exception:
+                    pool.release(conn, broken=True)
+                    conn = None              # nächste Runde holt eine neue Verbindung
+            stats.record(kind, (time.monotonic() - slot) * 1000.0)
+    finally:
+        if conn is not None:
+            pool.release(conn)
+
+
+def format_counts(cnt: Counter) -> str:
+    return "  ".join(f"{k}={cnt.get(k, 0)}" for k in KINDS)
+
+
+def int_list(text: str) -> List[int]:
+    """"64,16,4" → [64, 16, 4]"""
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Dauerlast-Simulator für Kassen-Verkäufe.")
+    p.add_argument("--workers", type=int, default=8, help="gleichzeitige Kassen (Threads)")
+    p.add_argument("--rate", type=float, default=20.0, help="Ziel: Belege pro Sekunde (0 = unbegrenzt)")
+    p.add_argument("--duration", type=float, default=0, help="Laufzeit in Sekunden (0 = bis Strg+C)")
+    p.add_argument("--interval", type=float, default=2.0, help="Ausgabe alle N Sekunden")
+    p.add_argument("--hot", type=int_list, default=[0],
+                   help="nur die K meistverkauften Artikel verkaufen (0 = alle); Liste = mehrere Läufe")
+    p.add_argument("--stripes", type=int_list, default=[0],
+                   help="Hot-Artikel auf N Teilzähler verteilen (0 = aus); Liste = mehrere Läufe")
+    p.add_argument("--seed", type=int, default=None)
+    args = p.parse_args(argv)
+    if len(args.hot) * len(args.stripes) > 1 and not args.duration:
+        p.error("mehrere Läufe (--hot/--stripes als Liste) brauchen --duration")
+    if any(n and not k for k in args.hot for n in args.stripes):
+        p.error("--stripes nur zusammen mit --hot K > 0")
+    return args
+
+
+def run_load(pool: ConnectionPool, args, artikel_pool: Optional[List[int]] = None):
+    """Einen Lauf mit args.workers Threads durchführen. Gibt (LoadStats, Laufzeit in s, abgebrochen) zurück."""
+    pacer = Pacer(args.rate)
+    stats = LoadStats()
+    stop = threading.Event()
+
+    threads = [threading.Thread(target=worker, args=(pool, pacer, stats, stop, artikel_pool), daemon=True)
+               for _ in range(args.workers)]
+    t_start = time.monotonic()
+    for t in threads:
+        t.start()
+
+    interrupted = False
+    try:
+        while not stop.is_set():
+            t_win = time.monotonic()
+            time.sleep(args.interval)
+            lat, cnt = stats.take_window()
+            elapsed = time.monotonic() - t_start
+            tps = cnt.get("ok", 0) / (time.monotonic() - t_win)
+            print(f"[{elapsed:6.0f}s] tps={tps:7.1f}  "
+                  f"p50={percentile(lat, 0.50):7.1f}ms  p95={percentile(lat, 0.95):7.1f}ms  "
+                  f"p99={percentile(lat, 0.99):7.1f}ms  max={(lat[-1] if lat else 0):7.1f}ms  "
+                  f"{format_counts(cnt)}")
+            if args.duration and elapsed >= args.duration:
+                break
+    except KeyboardInterrupt:
+        print("\nAbbruch durch Benutzer …")
+        interrupted = True
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(timeout=10)
+    return stats, time.monotonic() - t_start, interrupted
+
+
+def set_stripes(pool: ConnectionPool, ids: List[int], stripes: int) -> None:
+    """Hot-Artikel für einen Lauf ein- (stripes > 0) oder austragen (Puffer zurückbuchen)."""
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            if stripes:
+                hot_stock.enable(cur, ids, stripes)
+            else:
+                hot_stock.disable(cur, ids)
+        conn.commit()
+
+
+def summary_line(stats: LoadStats, elapsed: float) -> str:
+    total = stats.total_counts
+    return (f"{total.get('ok', 0) / max(elapsed, 1e-9):9.1f}  {stats.total_percentile(0.50):8.1f}  "
+            f"{stats.total_percentile(0.95):8.1f}  {stats.total_percentile(0.99):8.1f}  "
+            f"{total.get('deadlock', 0):>8}  {total.get('lock_timeout', 0):>8}  {total.get('no_stock', 0):>8}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    pool = ConnectionPool(args.workers)
+    hot_ids: List[int] = []
+    stripe_tables = False
+    if max(args.hot):
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                stripe_tables = hot_stock.has_stripe_tables(cur)
+                if max(args.stripes) and not stripe_tables:
+                    raise SystemExit("Tabellen fehlen – bitte sql/artikel_hot.sql einspielen.")
+                if max(args.stripes) and not hot_stock.has_stripe_trigger(cur):
+                    raise SystemExit("Trigger fehlt – bitte sql/trigger_hot.sql einspielen.")
+                hot_ids = hot_stock.top_sellers(cur, max(args.hot))
+
+    rate_txt = f"{args.rate:g}/s" if args.rate > 0 else "unbegrenzt"
+    runs = [(k, n) for k in args.hot for n in args.stripes]
+    results = []
+    try:
+        for k, n in runs:
+            artikel_pool = hot_ids[:k] if k else None
+            hot_txt = f", {k} Hot-Artikel, {n or 'keine'} Streifen" if k else ""
+            print(f"• POS-Last: {args.workers} Kassen, Ziel {rate_txt}{hot_txt} (Strg+C zum Beenden)")
+            if k and stripe_tables:
+                set_stripes(pool, artikel_pool, n)      # n = 0: Vergleichslauf über die artikel-Zeile
+            try:
+                stats, elapsed, interrupted = run_load(pool, args, artikel_pool)
+            finally:
+                if k and n:
+                    set_stripes(pool, artikel_pool, 0)
+            results.append((k, n, stats, elapsed))
+            total = stats.total_counts
+            print(f"• Gesamt nach {elapsed:.0f} s: {total.get('ok', 0) / max(elapsed, 1e-9):.1f} Belege/s  "
+                  f"p50={stats.total_percentile(0.50):.1f}ms  p95={stats.total_percentile(0.95):.1f}ms  "
+                  f"p99={stats.total_percentile(0.99):.1f}ms  max={stats.max_ms:.1f}ms")
+            print(f"  {format_counts(total)}")
+            if interrupted:
+                break
+    finally:
+        pool.close()
+
+    if len(results) > 1:
+        print(f"\n  {'hot':>5}  {'stripes':>7}  {'Belege/s':>9}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  "
+              f"{'deadlock':>8}  {'timeout':>8}  {'no_stock':>8}")
+        for k, n, stats, elapsed in results:
+            print(f"  {k:>5}  {n:>7}  {summary_line(stats, elapsed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,72 +1,190 @@
 # purhase.py – erzeugt automatisch Einkäufe für Artikel mit geringem Lagerbestand
 # Idee:
-#  - Suche alle Artikel mit Lagerbestand < 3000.
-#  - Finde zufällige Lieferanten, die diese Artikel liefern können.
-#  - Erstelle automatisch Einkäufe (einkauf + einkaufartikel).
+#  - Suche alle Artikel unter ihrem Meldebestand (artikel_dispo, siehe reorder_points.py;
+#    ohne Eintrag, mit Meldebestand 0 oder ohne Tabelle artikel_dispo: fester Wert 4000).
+#  - Lade alle Angebote (artikellieferant) für diese Artikel mit EINER Abfrage.
+#  - Plane die Einkäufe im Speicher (Lieferant zufällig, am günstigsten oder aufgeteilt).
+#  - Schreibe alle Köpfe und Positionen mit mehrzeiligen INSERTs in einer Transaktion.
 #
 # Benötigt:
 # Tabellen artikel, artikellieferant, einkauf, einkaufartikel, lieferant.
+#
+# Start:
+#   python -m python.generators.purchase                          (zufälliger Lieferant)
+#   python -m python.generators.purchase --strategy cheapest
+#   python -m python.generators.purchase --strategy split --tolerance 0.05
 
+import argparse
 import random
 from datetime import datetime
 from db import get_conn
+from dialect import table_exists
+from generators.hot_stock import stock_source
+from generators.sampling import pick_one
+
+# Nachbestellen unter diesem Bestand, falls für den Artikel kein Meldebestand berechnet ist
+LOW_STOCK_LIMIT = 4000
+
+# Bestellmenge pro Artikel (zufällig, falls artikel_dispo keine Bestellmenge hat)
+ORDER_QTY_MIN, ORDER_QTY_MAX = 200, 8000
+
+# Strategien für die Lieferantenwahl
+STRATEGIES = ("random", "cheapest", "split")
+
 
 # Hilfsfunktionen
-def fetch_low_stock(cur):
+def dispo_join(cur):
     """
-    Sucht alle Artikel mit Lagerbestand < 3000.
-    Gibt zurück: [(artikelID, name, bestand), ...]
+    JOIN auf artikel_dispo – ohne die Tabelle (sql/artikel_dispo.sql nicht eingespielt) eine leere
+    Ersatz-Tabelle, dann gilt für alle Artikel LOW_STOCK_LIMIT.
     """
-    cur.execute("""
-        SELECT artikelID, produktname, lagerbestand
-        FROM artikel
-        WHERE lagerbestand < 4000;
-    """)
-    return cur.fetchall()
+    if table_exists(cur, "artikel_dispo"):
+        return "LEFT JOIN artikel_dispo d ON d.artikelID = a.artikelID"
+    return "LEFT JOIN (SELECT NULL AS artikelID, NULL AS meldebestand, NULL AS bestellmenge) d ON 1 = 0"
 
 
-def pick_random_supplier(cur, artikel_id):
+def fetch_low_stock(cur):
     """
-    Wählt einen zufälligen Lieferanten für einen Artikel.
-    Quelle: Tabelle artikellieferant.
-    Gibt zurück: (lieferantID, einkaufspreis) oder None.
+    Sucht alle Artikel unter ihrem Meldebestand (Fallback LOW_STOCK_LIMIT, auch bei Meldebestand 0 = keine Nachfrage).
+    Bestand inkl. Puffer der Hot-Artikel, falls sql/artikel_hot.sql eingespielt ist (v_artikel_bestand).
+    Gibt zurück: [(artikelID, name, bestand, bestellmenge oder None), ...]
     """
-    cur.execute("""
-        SELECT lieferantID, einkaufspreis
-        FROM artikellieferant
-        WHERE artikelID = %s
-        ORDER BY RAND()
-        LIMIT 1;
-    """, (artikel_id,))
-    return cur.fetchone()
+    cur.execute(f"""
+        SELECT a.artikelID, a.produktname, a.lagerbestand, NULLIF(d.bestellmenge, 0)
+        FROM {stock_source(cur)} a
+        {dispo_join(cur)}
+        WHERE a.lagerbestand < COALESCE(NULLIF(d.meldebestand, 0), %s);
+    """, (LOW_STOCK_LIMIT,))
+    return cur.fetchall()
 
 
-def create_header(cur, lieferant_id):
+def fetch_offers(cur):
     """
-    Erstellt einen neuen Einkauf (Kopfzeile in Tabelle 'einkauf').
-    Rechnung wird automatisch generiert (z. B. INV-12345).
-    Gibt zurück: einkaufID.
+    Alle Angebote für die Artikel mit niedrigem Bestand – eine Abfrage statt einer pro Artikel.
+    Gibt zurück: {artikelID: [(lieferantID, einkaufspreis), ...]}
     """
-    cur.execute("""
-        INSERT INTO einkauf (lieferantID, einkaufsdatum, rechnung, bemerkung)
-        VALUES (%s, NOW(), %s, 'Auto-Generated (smart)');
-    """, (lieferant_id, f"INV-{random.randint(10000, 99999)}"))
-    return cur.lastrowid
+    cur.execute(f"""
+        SELECT al.artikelID, al.lieferantID, al.einkaufspreis
+        FROM artikellieferant al
+        JOIN {stock_source(cur)} a ON a.artikelID = al.artikelID
+        {dispo_join(cur)}
+        WHERE a.lagerbestand < COALESCE(NULLIF(d.meldebestand, 0), %s)
+        ORDER BY al.artikelID, al.lieferantID;
+    """, (LOW_STOCK_LIMIT,))
+    offers = {}
+    for artikel_id, lieferant_id, preis in cur.fetchall():
+        offers.setdefault(artikel_id, []).append((lieferant_id, preis))
+    return offers
+
+
+def choose_suppliers(offers, menge, strategy="random", tolerance=0.05):
+    """
+    Verteilt die Menge eines Artikels auf Lieferanten.
+      random   → ein zufälliger Lieferant
+      cheapest → der günstigste (bei Gleichstand kleinste lieferantID)
+      split    → alle, deren Preis höchstens tolerance über dem günstigsten liegt, zu gleichen Teilen
+    Gibt zurück: [(lieferantID, menge, preis), ...]
+    """
+    if not offers:
+        return []
+    if strategy == "random":
+        lieferant_id, preis = pick_one(offers)
+        return [(lieferant_id, menge, preis)]
+
+    by_price = sorted(offers, key=lambda o: (float(o[1]), o[0]))
+    if strategy == "cheapest":
+        lieferant_id, preis = by_price[0]
+        return [(lieferant_id, menge, preis)]
 
+    if strategy == "split":
+        limit = float(by_price[0][1]) * (1 + tolerance)
+        group = [o for o in by_price if float(o[1]) <= limit]
+        group = group[:max(1, min(len(group), menge))]       # nie Positionen mit Menge 0
+        share, rest = divmod(menge, len(group))
+        # Rest geht an die günstigsten
+        return [(lid, share + (1 if i < rest else 0), preis) for i, (lid, preis) in enumerate(group)]
 
-def add_item(cur, einkauf_id, artikel_id, menge, preis):
+    raise ValueError(f"Unbekannte Strategie: {strategy}")
+
+
+def plan_purchases(low, offers, strategy="random", tolerance=0.05):
+    """
+    Einkaufsplan im Speicher.
+    Gibt zurück: ({lieferantID: [(artikelID, menge, preis), ...]}, [(artikelID, name), ...] ohne Lieferant)
     """
-    Fügt eine Position (Artikel) zum Einkauf hinzu.
+    plan = {}
+    skipped = []
+    for artikel_id, name, bestand, bestellmenge in low:
+        menge = int(bestellmenge) if bestellmenge else random.randint(ORDER_QTY_MIN, ORDER_QTY_MAX)
+        parts = choose_suppliers(offers.get(artikel_id, []), menge, strategy, tolerance)
+        if not parts:
+            skipped.append((artikel_id, name))
+            continue
+        for lieferant_id, teil, preis in parts:
+            plan.setdefault(lieferant_id, []).append((artikel_id, teil, preis))
+    return plan, skipped
+
+
+def write_plan(cur, plan, when=None):
     """
-    cur.execute("""
+    Schreibt alle Einkäufe: ein mehrzeiliges INSERT für die Köpfe, eins für alle Positionen.
+    Die neuen einkaufIDs werden über (lieferantID, rechnung) oberhalb der bisher größten ID
+    zurückgelesen (AUTO_INCREMENT-Werte eines INSERTs sind nicht sicher lückenlos).
+    Einkaufsdatum: NOW() der Datenbank wie bisher, außer when ist angegeben.
+    Gibt zurück: [(einkaufID, lieferantID, Positionen), ...]
+    """
+    lieferanten = list(plan)
+    nummern = random.sample(range(10000, 100000), len(lieferanten))
+    heads = [(lid, f"INV-{nr}", "Auto-Generated (smart)") for lid, nr in zip(lieferanten, nummern)]
+
+    cur.execute("SELECT COALESCE(MAX(einkaufID), 0) FROM einkauf;")
+    last_id = cur.fetchone()[0]
+    if when is None:
+        cur.executemany("""
+            INSERT INTO einkauf (lieferantID, einkaufsdatum, rechnung, bemerkung)
+            VALUES (%s, NOW(), %s, %s);
+        """, heads)
+    else:
+        cur.executemany("""
+            INSERT INTO einkauf (lieferantID, einkaufsdatum, rechnung, bemerkung)
+            VALUES (%s, %s, %s, %s);
+        """, [(lid, when, rechnung, bemerkung) for lid, rechnung, bemerkung in heads])
+
+    cur.execute(f"""
+        SELECT einkaufID, lieferantID, rechnung
+        FROM einkauf
+        WHERE einkaufID > %s
+          AND rechnung IN ({", ".join(["%s"] * len(heads))});
+    """, (last_id, *(h[1] for h in heads)))
+    wanted = {(h[0], h[1]) for h in heads}
+    id_by_supplier = {lid: eid for eid, lid, rechnung in cur.fetchall() if (lid, rechnung) in wanted}
+    if len(id_by_supplier) != len(heads):
+        raise RuntimeError("Neue Einkaufsköpfe konnten nicht eindeutig zugeordnet werden.")
+
+    lines = [(id_by_supplier[lid], artikel_id, menge, preis)
+             for lid in lieferanten for artikel_id, menge, preis in plan[lid]]
+    cur.executemany("""
         INSERT INTO einkaufartikel (einkaufID, artikelID, einkaufsmenge, einkaufspreis)
         VALUES (%s, %s, %s, %s);
-    """, (einkauf_id, artikel_id, menge, preis))
+    """, lines)
+
+    return [(id_by_supplier[lid], lid, len(plan[lid])) for lid in lieferanten]
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Einkäufe für Artikel mit niedrigem Bestand erzeugen.")
+    p.add_argument("--strategy", choices=STRATEGIES, default="random",
+                   help="Lieferantenwahl: random, cheapest oder split (Preis-Toleranz)")
+    p.add_argument("--tolerance", type=float, default=0.05,
+                   help="für split: max. Preisaufschlag gegenüber dem günstigsten (0.05 = 5 %%)")
+    return p.parse_args(argv)
 
 
 
 # Hauptprogramm
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+
     # Verbindung zur Datenbank herstellen
     conn = get_conn()
     if not conn:
@@ -75,40 +193,22 @@ def main():
 
     try:
         with conn.cursor() as cur:
-            # 1️ Artikel mit niedrigem Lagerbestand holen
+            # 1️ Artikel mit niedrigem Lagerbestand + alle Angebote dafür holen
             low = fetch_low_stock(cur)
             if not low:
-                print(" Keine Artikel mit Lagerbestand < 4000. Kein Einkauf nötig.")
+                print(" Keine Artikel unter dem Meldebestand. Kein Einkauf nötig.")
                 return
+            offers = fetch_offers(cur)
 
-            # 2️ Plan für Einkäufe vorbereiten
+            # 2️ Plan für Einkäufe im Speicher
             # Struktur: {lieferantID: [(artikelID, menge, preis), ...]}
-            plan = {}
-            skipped = []  # Artikel ohne Lieferant
-
-            for artikel_id, name, bestand in low:
-                sup = pick_random_supplier(cur, artikel_id)
-                if not sup:
-                    skipped.append((artikel_id, name))
-                    continue
-                lieferant_id, preis = sup
-
-                # zufällige Menge zwischen 200 und 4000 Stück
-                menge = random.randint(200, 8000)
-
-                plan.setdefault(lieferant_id, []).append((artikel_id, menge, preis))
-
+            plan, skipped = plan_purchases(low, offers, args.strategy, args.tolerance)
             if not plan:
                 print("Keine Lieferanten für die benötigten Artikel gefunden.")
                 return
 
-            # 3️ Einkäufe anlegen
-            created = []
-            for lieferant_id, items in plan.items():
-                einkauf_id = create_header(cur, lieferant_id)
-                for artikel_id, menge, preis in items:
-                    add_item(cur, einkauf_id, artikel_id, menge, preis)
-                created.append((einkauf_id, lieferant_id, len(items)))
+            # 3️ Einkäufe anlegen (mehrzeilige INSERTs)
+            created = write_plan(cur, plan)
 
         # 4️ Alles speichern (commit)
         conn.commit()
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+reconcile.py
+Abgleich: Lagerbestand und Durchschnittskosten in artikel gegen den Verlauf aus einkaufartikel/verkaufartikel.
+
+Der Bestand wird an mehreren Stellen gepflegt (generate_history, Trigger, Hand-SQL wie
+sql/update_lager_verkauf.sql) und kann dadurch vom Bewegungsverlauf abweichen.
+
+Ablauf:
+  1) EINE Abfrage über alle Bewegungen (Einkauf +menge, Verkauf −menge), zeitlich sortiert je Artikel.
+     Fensterfunktionen liefern den laufenden Bestand, den Endbestand und den kleinsten Zwischenbestand.
+     Zurück kommen nur die Einkaufszeilen (+ letzte Zeile je Artikel) – Verkäufe bleiben in der DB.
+  2) Ein Durchlauf in Python über diese Zeilen für die Durchschnittskosten. Standard (--kosten gesamt)
+     ist das Modell der Trigger und von bulk_import:
+       Σ(menge × preis) / Σ menge aller Einkäufe (wie trg_update_avgcost, der als letzter Trigger schreibt)
+     Mit --kosten gleitend stattdessen der gleitende Durchschnitt von generate_history (inc_stock_with_avgcost),
+     für Datenbanken, die nur aus generate_history stammen:
+       neu = (bestand_vorher × durchschnitt + menge × preis) / bestand_nachher
+  3) Abweichungen gegen artikel melden; mit --fix korrigieren (ein UPDATE über eine temporäre Tabelle).
+
+Start:
+    python -m python.generators.reconcile
+    python -m python.generators.reconcile --fix
+    python -m python.generators.reconcile --kosten gleitend     (Bestand nur aus generate_history)
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pymysql.cursors import SSCursor
+
+from db import get_conn
+from dialect import drop_temporary_table, update_from
+from generators.hot_stock import flush, has_stripe_tables
+
+# Abweichung der Durchschnittskosten, ab der ein Artikel als "abweichend" gilt
+KOSTEN_TOLERANZ = 0.01
+
+# Zeilen pro INSERT-Block (Korrektur)
+BATCH = 5_000
+
+# Bewegungen je Artikel in zeitlicher Reihenfolge (bei gleicher Zeit: Einkauf vor Verkauf)
+MOVEMENTS_SQL = """
+    SELECT artikelID, art, menge, preis, laufend, endbestand, min_laufend
+    FROM (
+        SELECT t.*,
+               SUM(menge)   OVER (PARTITION BY artikelID)                                   AS endbestand,
+               MIN(laufend) OVER (PARTITION BY artikelID)                                   AS min_laufend,
+               ROW_NUMBER() OVER (PARTITION BY artikelID ORDER BY zeit DESC, art DESC, id DESC) AS rn_letzte
+        FROM (
+            SELECT m.*,
+                   SUM(menge) OVER (PARTITION BY artikelID ORDER BY zeit, art, id
+                                    ROWS UNBOUNDED PRECEDING)                               AS laufend
+            FROM (
+                SELECT ea.artikelID, e.einkaufsdatum AS zeit, 0 AS art, ea.einkauf_artikelID AS id,
+                       ea.einkaufsmenge AS menge, ea.einkaufspreis AS preis
+                FROM einkaufartikel ea
+                JOIN einkauf e ON e.einkaufID = ea.einkaufID
+                UNION ALL
+                SELECT va.artikelID, v.verkaufsdatum, 1, va.verkauf_artikelID,
+                       -va.verkaufsmenge, NULL
+                FROM verkaufartikel va
+                JOIN verkauf v ON v.verkaufID = va.verkaufID
+            ) m
+        ) t
+    ) x
+    WHERE art = 0 OR rn_letzte = 1
+    ORDER BY artikelID, zeit, art, id
+"""
+
+# Erwartung je Artikel: (bestand, durchschnittskosten oder None, kleinster Zwischenbestand)
+Expected = Dict[int, Tuple[int, Optional[float], int]]
+
+
+def expected_from_history(conn, kosten: str = "gesamt") -> Expected:
+    """Erwarteten Endbestand + Durchschnittskosten aller Artikel mit Bewegungen berechnen (ein Durchlauf)."""
+    result: Expected = {}
+    cur_art = None
+    avg, menge_sum, wert_sum = None, 0, 0.0
+    endbestand, min_laufend = 0, 0
+
+    def close_article():
+        if cur_art is None:
+            return
+        if kosten == "gesamt":
+            value = round(wert_sum / menge_sum, 4) if menge_sum > 0 else None
+        else:
+            value = avg
+        result[cur_art] = (endbestand, value, min_laufend)
+
+    with conn.cursor(SSCursor) as cur:            # Zeilen streamen statt alles in den Speicher
+        cur.execute(MOVEMENTS_SQL)
+        for artikel_id, art, menge, preis, laufend, end, min_l in cur:
+            if artikel_id != cur_art:
+                close_article()
+                cur_art = artikel_id
+                avg, menge_sum, wert_sum = None, 0, 0.0
+                endbestand, min_laufend = int(end), int(min_l)
+            if art != 0:
+                continue                          # letzte Zeile war ein Verkauf → nur für Endbestand
+            menge, preis, laufend = int(menge), float(preis), int(laufend)
+            vorher = laufend - menge
+            total = vorher * (avg or 0.0) + menge * preis
+            avg = round(total / laufend, 4) if laufend > 0 else 0.0
+            menge_sum += menge
+            wert_sum += menge * preis
+        close_article()
+    return result
+
+
+def find_drift(conn, expected: Expected, toleranz: float = KOSTEN_TOLERANZ) -> List[tuple]:
+    """
+    Vergleich mit artikel (Hot-Artikel: zentraler Bestand + Puffer aus v_artikel_bestand).
+    Gibt zurück: [(artikelID, name, ist_bestand, soll_bestand, ist_kosten, soll_kosten), ...] nur Abweichungen
+    """
+    drift = []
+    with conn.cursor() as cur:
+        source = "v_artikel_bestand" if has_stripe_tables(cur) else "artikel"
+        cur.execute(f"SELECT artikelID, produktname, lagerbestand, durchschnittskosten FROM {source}")
+        for artikel_id, name, ist_b, ist_k in cur.fetchall():
+            soll_b, soll_k, _ = expected.get(artikel_id, (0, None, 0))
+            ist_b = int(ist_b or 0)
+            ist_k = float(ist_k) if ist_k is not None else None
+            kosten_diff = (ist_k is None) != (soll_k is None) or (
+                ist_k is not None and abs(ist_k - soll_k) > toleranz)
+            if ist_b != soll_b or kosten_diff:
+                drift.append((artikel_id, name, ist_b, soll_b, ist_k, soll_k))
+    return drift
+
+
+def apply_fix(conn, drift: List[tuple]) -> int:
+    """Abweichende Artikel auf die Sollwerte setzen (temporäre Tabelle + ein UPDATE). Gibt die Anzahl zurück."""
+    with conn.cursor() as cur:
+        if has_stripe_tables(cur):
+            flush(cur, [d[0] for d in drift])     # Puffer der Hot-Artikel zurück → Soll gilt für artikel allein
+        cur.execute("""
+            CREATE TEMPORARY TABLE tmp_reconcile (
+              artikelID INT PRIMARY KEY,
+              lagerbestand INT NOT NULL,
+              durchschnittskosten DECIMAL(10,4) NULL
+            )
+        """)
+        rows = [(a, soll_b, soll_k) for a, _, _, soll_b, _, soll_k in drift]
+        for i in range(0, len(rows), BATCH):
+            cur.executemany("INSERT INTO tmp_reconcile VALUES (%s, %s, %s)", rows[i:i + BATCH])
+        cur.execute(update_from("artikel", "artikelID", "tmp_reconcile", ("lagerbestand", "durchschnittskosten")))
+        n = cur.rowcount
+        cur.execute(drop_temporary_table("tmp_reconcile"))
+    conn.commit()
+    return n
+
+
+def print_report(drift: List[tuple], expected: Expected, top: int) -> None:
+    """Zusammenfassung + größte Abweichungen ausgeben."""
+    bestand = [d for d in drift if d[2] != d[3]]
+    wert = sum((d[2] - d[3]) * (d[5] or 0.0) for d in bestand)
+    negativ = [a for a, (_, _, m) in expected.items() if m < 0]
+    print(f"• Abweichungen: {len(drift)} Artikel "
+          f"(Bestand: {len(bestand)}, nur Kosten: {len(drift) - len(bestand)}), "
+          f"Wertdifferenz ≈ {wert:,.2f} €")
+    if negativ:
+        print(f"• Verlauf mit negativem Zwischenbestand: {len(negativ)} Artikel (z. B. {negativ[:10]})")
+
+    if drift:
+        print(f"  {'artikelID':>9}  {'Ist':>9}  {'Soll':>9}  {'Diff':>8}  {'Ist €':>9}  {'Soll €':>9}  Artikel")
+        for a, name, ist_b, soll_b, ist_k, soll_k in sorted(
+                drift, key=lambda d: abs(d[2] - d[3]), reverse=True)[:top]:
+            fk = lambda v: f"{v:9.4f}" if v is not None else f"{'–':>9}"
+            print(f"  {a:>9}  {ist_b:>9}  {soll_b:>9}  {ist_b - soll_b:>8}  {fk(ist_k)}  {fk(soll_k)}  {name}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Lagerbestand/Durchschnittskosten gegen den Bewegungsverlauf prüfen.")
+    p.add_argument("--fix", action="store_true", help="Abweichungen in artikel korrigieren")
+    p.add_argument("--kosten", choices=("gesamt", "gleitend"), default="gesamt",
+                   help="Durchschnitt aller Einkäufe (Trigger, Standard) oder gleitender Durchschnitt (generate_history)")
+    p.add_argument("--toleranz", type=float, default=KOSTEN_TOLERANZ, help="erlaubte Kostenabweichung in €")
+    p.add_argument("--top", type=int, default=20, help="so viele Abweichungen anzeigen")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        sys.exit(1)
+
+    try:
+        t0 = time.perf_counter()
+        expected = expected_from_history(conn, args.kosten)
+        t1 = time.perf_counter()
+        drift = find_drift(conn, expected, args.toleranz)
+        print(f"• Verlauf: {len(expected)} Artikel in {t1 - t0:.1f} s, Vergleich in {time.perf_counter() - t1:.1f} s")
+        print_report(drift, expected, args.top)
+
+        if args.fix and drift:
+            n = apply_fix(conn, drift)
+            print(f"• Korrigiert: {n} Artikel")
+        elif drift:
+            print("  (mit --fix korrigieren)")
+    except Exception as e:
+        conn.rollback()
+        print(f"Fehler, Transaktion abgebrochen: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+    # Exit-Code 2 = Abweichungen gefunden und nicht korrigiert (für cron/Monitoring)
+    if drift and not args.fix:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+reorder_points.py
+Nächtlicher Job: Meldebestand, Sicherheitsbestand und Bestellmenge pro Artikel aus dem Verkaufsverlauf.
+
+Für jeden Artikel über ein Fenster der letzten N Tage (Standard 90):
+  • nachfrage_tag   = mittlere Verkaufsmenge pro Tag (Tage ohne Verkauf zählen als 0)
+  • nachfrage_std   = Standardabweichung der Tagesmenge
+  • sicherheitsbestand = z(servicegrad) × nachfrage_std × √lieferzeit
+  • meldebestand       = nachfrage_tag × lieferzeit + sicherheitsbestand
+  • bestellmenge       = nachfrage_tag × reichweite (mindestens BESTELLMENGE_MIN)
+
+Ergebnis → Tabelle artikel_dispo (sql/artikel_dispo.sql). /reports/stock_low und purchase.py
+lesen nur diese Werte; Artikel ohne Eintrag nutzen die alten festen Schwellen.
+
+Start (z. B. per cron jede Nacht):
+    python -m python.generators.reorder_points
+    python -m python.generators.reorder_points --bis 2025-10-31 --tage 90 --lieferzeit 7 --service 0.95
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from datetime import date, datetime, timedelta
+from statistics import NormalDist
+from typing import Dict, List, Optional, Tuple
+
+from db import get_conn
+
+FENSTER_TAGE = 90           # Verkaufsverlauf der letzten N Tage
+LIEFERZEIT_TAGE = 7         # Wiederbeschaffungszeit
+SERVICEGRAD = 0.95          # Wahrscheinlichkeit, in der Lieferzeit nicht leer zu laufen
+REICHWEITE_TAGE = 30        # Bestellmenge reicht für so viele Tage
+BESTELLMENGE_MIN = 200      # kleinste sinnvolle Bestellung (wie ORDER_QTY_MIN in purchase.py)
+
+
+def ensure_dispo_table(cur) -> None:
+    """Tabelle artikel_dispo anlegen, falls sie fehlt (siehe sql/artikel_dispo.sql)."""
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS artikel_dispo (
+          artikelID INT PRIMARY KEY,
+          nachfrage_tag DECIMAL(12,3) NOT NULL,
+          nachfrage_std DECIMAL(12,3) NOT NULL,
+          fenster_tage INT NOT NULL,
+          lieferzeit_tage INT NOT NULL,
+          servicegrad DECIMAL(5,4) NOT NULL,
+          sicherheitsbestand INT NOT NULL,
+          meldebestand INT NOT NULL,
+          bestellmenge INT NOT NULL,
+          berechnet_am DATETIME NOT NULL
+        )
+    """)
+
+
+def fetch_demand(cur, von: date, bis: date) -> Dict[int, Tuple[float, float]]:
+    """
+    Summe und Quadratsumme der Tagesmengen pro Artikel im Fenster [von, bis].
+    Gibt zurück: {artikelID: (Σ menge_tag, Σ menge_tag²)}
+    """
+    cur.execute("""
+        SELECT t.artikelID, SUM(t.menge), SUM(t.menge * t.menge)
+        FROM (
+            SELECT va.artikelID, DATE(v.verkaufsdatum) AS tag, SUM(va.verkaufsmenge) AS menge
+            FROM verkauf v
+            JOIN verkaufartikel va ON va.verkaufID = v.verkaufID
+            WHERE v.verkaufsdatum >= %s AND v.verkaufsdatum < %s
+            GROUP BY va.artikelID, DATE(v.verkaufsdatum)
+        ) t
+        GROUP BY t.artikelID
+    """, (von, bis + timedelta(days=1)))
+    return {int(a): (float(s), float(s2)) for a, s, s2 in cur.fetchall()}
+
+
+def dispo_values(summe: float, quadratsumme: float, tage: int, lieferzeit: int,
+                 servicegrad: float, reichweite: int) -> Tuple[float, float, int, int, int]:
+    """
+    Kennzahlen eines Artikels aus Σ und Σ² der Tagesmengen (n = tage, Tage ohne Verkauf = 0).
+    Gibt zurück: (nachfrage_tag, nachfrage_std, sicherheitsbestand, meldebestand, bestellmenge)
+    """
+    mittel = summe / tage
+    varianz = max(0.0, quadratsumme / tage - mittel * mittel)
+    std = math.sqrt(varianz)
+    z = NormalDist().inv_cdf(servicegrad)
+    sicherheit = math.ceil(z * std * math.sqrt(lieferzeit))
+    melde = math.ceil(mittel * lieferzeit) + sicherheit
+    menge = max(BESTELLMENGE_MIN, math.ceil(mittel * reichweite)) if mittel > 0 else 0
+    return mittel, std, sicherheit, melde, menge
+
+
+def compute_reorder_points(conn, bis: date, tage: int = FENSTER_TAGE, lieferzeit: int = LIEFERZEIT_TAGE,
+                           servicegrad: float = SERVICEGRAD, reichweite: int = REICHWEITE_TAGE) -> int:
+    """artikel_dispo für alle Artikel neu berechnen (eine Transaktion). Gibt die Anzahl Artikel zurück."""
+    von = bis - timedelta(days=tage - 1)
+    now = datetime.now()
+    with conn.cursor() as cur:
+        ensure_dispo_table(cur)
+        demand = fetch_demand(cur, von, bis)
+        cur.execute("SELECT artikelID FROM artikel")
+        artikel_ids = [int(r[0]) for r in cur.fetchall()]
+
+        rows = []
+        for a in artikel_ids:
+            summe, quadrat = demand.get(a, (0.0, 0.0))
+            mittel, std, sicherheit, melde, menge = dispo_values(
+                summe, quadrat, tage, lieferzeit, servicegrad, reichweite)
+            rows.append((a, round(mittel, 3), round(std, 3), tage, lieferzeit, servicegrad,
+                         sicherheit, melde, menge, now))
+
+        cur.execute("DELETE FROM artikel_dispo")
+        cur.executemany("""
+            INSERT INTO artikel_dispo (artikelID, nachfrage_tag, nachfrage_std, fenster_tage, lieferzeit_tage,
+                                       servicegrad, sicherheitsbestand, meldebestand, bestellmenge, berechnet_am)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, rows)
+    conn.commit()
+    return len(rows)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Meldebestände aus dem Verkaufsverlauf berechnen.")
+    p.add_argument("--bis", type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                   help="letzter Tag des Fensters (Standard: gestern)")
+    p.add_argument("--tage", type=int, default=FENSTER_TAGE, help="Fensterlänge in Tagen")
+    p.add_argument("--lieferzeit", type=int, default=LIEFERZEIT_TAGE, help="Lieferzeit in Tagen")
+    p.add_argument("--service", type=float, default=SERVICEGRAD, help="Servicegrad 0..1")
+    p.add_argument("--reichweite", type=int, default=REICHWEITE_TAGE, help="Bestellmenge für N Tage")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.tage < 1 or not 0.5 <= args.service < 1:
+        print("--tage muss ≥ 1 und --service zwischen 0.5 und 1 sein.")
+        return
+
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        return
+    try:
+        n = compute_reorder_points(conn, args.bis, args.tage, args.lieferzeit, args.service, args.reichweite)
+        print(f"• artikel_dispo: {n} Artikel berechnet "
+              f"(Fenster {args.bis - timedelta(days=args.tage - 1)} … {args.bis})")
+    except Exception as e:
+        conn.rollback()
+        print(f"Fehler, Transaktion abgebrochen: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
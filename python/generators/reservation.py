@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+reservation.py
+Lager für einen ganzen Beleg auf einmal reservieren und die Positionen in einem Schritt einfügen.
+
+Bisher (Position für Position in Zufallsreihenfolge) sperrt trg_verkaufartikel_bi die artikel-Zeilen
+in der Reihenfolge der Positionen. Zwei gleichzeitige Belege mit gemeinsamen Artikeln
+(A, B) und (B, A) warten dann gegenseitig aufeinander → Deadlock (1213).
+
+Ablauf pro Beleg:
+  1) EIN  SELECT … FOR UPDATE über alle Artikel, sortiert nach artikelID → immer gleiche Sperr-Reihenfolge.
+     Hot-Artikel (sql/artikel_hot.sql) bleiben außen vor: dort sperrt der Trigger nur einen Streifen.
+  2) Bestand für den ganzen Korb prüfen (fehlende Mengen gesammelt melden oder mit clip=True kürzen).
+  3) EIN  mehrzeiliges INSERT in verkaufartikel (gleiche Reihenfolge). Der Trigger findet die Sperre
+     schon vor und wartet nicht mehr.
+run_with_retry wiederholt die ganze Transaktion bei Lock-Timeout (1205) und Deadlock (1213).
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from dialect import for_update
+from generators.hot_stock import cached_hot_ids, cached_stock_source
+
+# MySQL-Fehler, nach denen die ganze Transaktion wiederholt wird
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+RETRY_CODES = (ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK)
+
+MAX_RETRIES = 3             # Wiederholungen nach dem ersten Versuch
+BACKOFF_S = 0.02            # Grundwartezeit, verdoppelt pro Versuch (mit Zufall, damit Kassen auseinanderlaufen)
+
+# Eine Position: (artikelID, verkaufsmenge, verkaufspreis, rabatt)
+Line = Tuple[int, int, float, float]
+
+
+class InsufficientStock(RuntimeError):
+    """Mindestens ein Artikel des Belegs hat nicht genug Bestand."""
+
+    def __init__(self, missing: Dict[int, Tuple[int, int]]):
+        self.missing = missing          # {artikelID: (gewünscht, vorhanden)}
+        super().__init__("Nicht genug Lagerbestand: " + ", ".join(
+            f"Artikel {a}: {want} > {have}" for a, (want, have) in sorted(missing.items())))
+
+
+def _in(ids: Sequence[int]) -> str:
+    return ", ".join(["%s"] * len(ids))
+
+
+def lock_stock(cur, artikel_ids: Sequence[int]) -> Dict[int, int]:
+    """
+    artikel-Zeilen in artikelID-Reihenfolge sperren (ein Statement).
+    Mit sql/artikel_hot.sql zählen Reste in artikel_lager_stripe mit (ohne sie zu sperren): ein gerade
+    eingeschalteter Hot-Artikel kann noch fehlen, bis cached_hot_ids neu lädt – der Trigger sammelt die
+    Puffer dann selbst ein.
+    Gibt zurück: {artikelID: Gesamtbestand} (unbekannte IDs fehlen)
+    """
+    ids = sorted(set(artikel_ids))
+    if not ids:
+        return {}
+    cur.execute(f"""
+        SELECT artikelID, COALESCE(lagerbestand, 0)
+        FROM artikel
+        WHERE artikelID IN ({_in(ids)})
+        ORDER BY artikelID{for_update()}
+    """, ids)
+    stock = {int(a): int(b) for a, b in cur.fetchall()}
+    if cached_stock_source(cur) != "artikel":
+        cur.execute(f"""
+            SELECT artikelID, SUM(menge)
+            FROM artikel_lager_stripe
+            WHERE artikelID IN ({_in(ids)})
+            GROUP BY artikelID
+        """, ids)
+        for a, menge in cur.fetchall():
+            if int(a) in stock:
+                stock[int(a)] += int(menge or 0)
+    return stock
+
+
+def fetch_prices(cur, artikel_ids: Sequence[int], when: datetime) -> Dict[int, float]:
+    """Gültige Listenpreise mehrerer Artikel zu einem Zeitpunkt (eine Abfrage statt einer pro Artikel)."""
+    ids = sorted(set(artikel_ids))
+    if not ids:
+        return {}
+    cur.execute(f"""
+        SELECT artikelID, listenpreis
+        FROM (
+            SELECT artikelID, listenpreis,
+                   ROW_NUMBER() OVER (PARTITION BY artikelID ORDER BY gueltig_ab DESC) AS rn
+            FROM artikelpreis
+            WHERE artikelID IN ({_in(ids)})
+              AND gueltig_ab <= %s
+              AND (gueltig_bis IS NULL OR gueltig_bis >= %s)
+        ) p
+        WHERE rn = 1
+    """, (*ids, when, when))
+    return {int(a): float(p) for a, p in cur.fetchall()}
+
+
+def reserve_receipt(cur, verkauf_id: int, lines: Sequence[Line], clip: bool = False) -> List[Line]:
+    """
+    Bestand für alle Positionen sperren + prüfen, dann alle Positionen mit einem INSERT anlegen.
+    Gleicher Artikel mehrfach (z. B. mit anderem Preis oder Rabatt): die Positionen bleiben getrennt,
+    geprüft wird die Summe der Mengen.
+    clip=True: Menge auf den Bestand kürzen (Positionen eines Artikels der Reihe nach), Positionen ohne
+    Bestand weglassen (statt Fehler).
+    Gibt die eingefügten Positionen zurück (nach artikelID sortiert). Kein commit.
+    """
+    ordered = sorted(lines, key=lambda line: line[0])     # stabil: gleiche Artikel in Eingabe-Reihenfolge
+    wanted: Dict[int, int] = {}
+    for a, menge, _, _ in ordered:
+        wanted[a] = wanted.get(a, 0) + menge
+
+    hot = cached_hot_ids(cur)
+    stock = lock_stock(cur, [a for a in wanted if a not in hot])
+
+    missing = {a: (menge, stock.get(a, 0)) for a, menge in wanted.items()
+               if a not in hot and menge > stock.get(a, 0)}
+    if missing and not clip:
+        raise InsufficientStock(missing)
+
+    result: List[Line] = []
+    for a, menge, preis, rabatt in ordered:
+        if a not in hot:                                  # Hot-Artikel prüft der Trigger (Streifen)
+            menge = min(menge, stock.get(a, 0))
+            stock[a] = stock.get(a, 0) - menge
+        if menge > 0:
+            result.append((a, menge, preis, rabatt))
+
+    if result:
+        cur.executemany("""
+            INSERT INTO verkaufartikel (verkaufID, artikelID, verkaufsmenge, verkaufspreis, rabatt)
+            VALUES (%s, %s, %s, %s, %s)
+        """, [(verkauf_id, a, m, p, r) for a, m, p, r in result])
+    return result
+
+
+def run_with_retry(conn, fn: Callable, retries: int = MAX_RETRIES,
+                   on_retry: Optional[Callable[[Exception], None]] = None):
+    """
+    fn(cur) in einer Transaktion ausführen und committen.
+    Bei Lock-Timeout/Deadlock: rollback, kurz warten, ganz von vorne (höchstens `retries` Mal).
+    Andere Fehler: rollback und weiterreichen.
+    """
+    for attempt in range(retries + 1):
+        try:
+            with conn.cursor() as cur:
+                result = fn(cur)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            args = getattr(e, "args", ())
+            code = args[0] if args and isinstance(args[0], int) else None
+            if code not in RETRY_CODES or attempt == retries:
+                raise
+            if on_retry:
+                on_retry(e)
+            time.sleep(BACKOFF_S * (2 ** attempt) * (0.5 + random.random()))
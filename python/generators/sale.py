@@ -10,9 +10,18 @@
 # kunden, kundentyp, verkauf, verkaufartikel, artikel, artikelpreis.
 
 import random
+import time
 from datetime import datetime
 from db import get_conn
+from dialect import days_ago
+from generators.hot_stock import cached_stock_source
+from generators.reservation import fetch_prices, reserve_receipt, run_with_retry
+from generators.sampling import IdSampler, pick_by_pk
 
+# Artikel-Auswahl: Kandidaten mit Bestand, gewichtet nach Beliebtheit (Positionen der letzten N Tage + 1)
+BELIEBT_TAGE = 90
+STOCK_CACHE_TTL = 30.0      # Kandidatenliste so lange wiederverwenden (Sekunden)
+_stock_cache = {"sampler": None, "bis": 0.0}
 
 
 # Hilfsfunktionen (werden von main() benutzt)
@@ -38,20 +47,21 @@ def ranges_for_type(kundentyp: str):
 def pick_customer(cur):
     """
     Wählt einen zufälligen Kunden aus der Tabelle 'kunden'.
+    Zufalls-ID über den Primärschlüssel (sampling.py) statt ORDER BY RAND().
     Gibt zurück: (kundenID, Rabatt-Prozent, Kundentyp-Name)
     """
+    picked = pick_by_pk(cur, "kunden", "kundenID")
+    if not picked:
+        raise RuntimeError("Keine Kunden in der Tabelle 'kunden'.")
     cur.execute("""
         SELECT k.kundenID,
                COALESCE(t.kundenrabatt, 0) AS rabatt,
                COALESCE(t.bezeichnung, 'Standard') AS typ
         FROM kunden k
         LEFT JOIN kundentyp t ON t.kundentypID = k.kundentypID
-        ORDER BY RAND()
-        LIMIT 1;
-    """)
+        WHERE k.kundenID = %s;
+    """, (picked[0][0],))
     row = cur.fetchone()
-    if not row:
-        raise RuntimeError("Keine Kunden in der Tabelle 'kunden'.")
     return row[0], float(row[1]), str(row[2])
 
 
@@ -68,19 +78,64 @@ def create_sale_header(cur, kunden_id, when=None):
     return cur.lastrowid, when
 
 
+def stock_sampler(cur, ttl=STOCK_CACHE_TTL, refresh=False):
+    """
+    Artikel mit Lagerbestand > 0 als IdSampler, gewichtet nach Beliebtheit – höchstens `ttl` Sekunden alt.
+    Eine Abfrage pro ttl statt einer pro Verkauf; danach kostet jeder Zug gleich viel, egal wie groß artikel ist.
+    Bestand inkl. Puffer der Hot-Artikel (v_artikel_bestand, falls sql/artikel_hot.sql eingespielt ist).
+    """
+    now = time.monotonic()
+    if refresh or _stock_cache["sampler"] is None or now >= _stock_cache["bis"]:
+        sampler = IdSampler.from_query(cur, f"""
+            SELECT a.artikelID, 1 + COALESCE(b.positionen, 0)
+            FROM {cached_stock_source(cur)} a
+            LEFT JOIN (
+                SELECT va.artikelID, COUNT(*) AS positionen
+                FROM verkaufartikel va
+                JOIN verkauf v ON v.verkaufID = va.verkaufID
+                WHERE v.verkaufsdatum >= {days_ago()}
+                GROUP BY va.artikelID
+            ) b ON b.artikelID = a.artikelID
+            WHERE a.lagerbestand > 0
+        """, (BELIEBT_TAGE,))
+        _stock_cache.update(sampler=sampler, bis=now + ttl)
+    return _stock_cache["sampler"]
+
+
 def pick_articles_with_stock(cur, max_items=5):
     """
-    Wählt zufällige Artikel aus, die auf Lager sind.
+    Wählt zufällige Artikel aus, die auf Lager sind – beliebte häufiger (stock_sampler).
+    Der Bestand wird per Primärschlüssel frisch gelesen; ist die zwischengespeicherte Liste
+    inzwischen leergekauft, wird sie einmal neu geladen.
     Gibt zurück: [(artikelID, lagerbestand), ...]
     """
-    cur.execute("""
-        SELECT artikelID, lagerbestand
-        FROM artikel
-        WHERE lagerbestand > 0
-        ORDER BY RAND()
-        LIMIT %s;
-    """, (max_items,))
-    return cur.fetchall()
+    for refresh in (False, True):
+        ids = stock_sampler(cur, refresh=refresh).sample(max_items)
+        if ids:
+            cur.execute(
+                f"SELECT artikelID, lagerbestand FROM {cached_stock_source(cur)} "
+                f"WHERE artikelID IN ({', '.join(['%s'] * len(ids))}) AND lagerbestand > 0",
+                ids,
+            )
+            rows = list(cur.fetchall())
+            if rows:
+                return rows
+    return []
+
+
+def pick_articles_from_pool(cur, pool, max_items=5):
+    """
+    Wie pick_articles_with_stock, aber nur aus einer festen Artikelliste (pos_load --hot).
+    Hot-Artikel zählen mit ihren Puffern – sonst fielen sie nach dem Nachfüllen der Streifen aus der Auswahl.
+    Gibt zurück: [(artikelID, lagerbestand), ...]
+    """
+    ids = random.sample(pool, min(max_items, len(pool)))
+    cur.execute(
+        f"SELECT artikelID, lagerbestand FROM {cached_stock_source(cur)} "
+        f"WHERE artikelID IN ({', '.join(['%s'] * len(ids))}) AND lagerbestand > 0",
+        ids,
+    )
+    return list(cur.fetchall())
 
 
 def get_listenpreis(cur, artikel_id, when):
@@ -105,7 +160,8 @@ def get_listenpreis(cur, artikel_id, when):
 
 def add_sale_items(cur, verkauf_id, items, when, rabatt_pct, menge_range):
     """
-    Fügt Artikel zum Verkauf hinzu.
+    Fügt Artikel zum Verkauf hinzu – für den ganzen Beleg auf einmal (reservation.py):
+    Preise in einer Abfrage, Lager in artikelID-Reihenfolge sperren, Positionen in einem INSERT.
 
     items = Liste von (artikelID, lagerbestand)
     menge_range = (min_menge, max_menge)
@@ -113,32 +169,68 @@ def add_sale_items(cur, verkauf_id, items, when, rabatt_pct, menge_range):
 
     Gibt zurück: (Anzahl Artikel, Gesamtsumme ohne Rabatt)
     """
-    added = 0
-    total = 0.0
     min_m, max_m = menge_range
 
+    # zufällige Menge – aber nicht mehr als Lagerbestand
+    wanted = []
     for artikel_id, stock in items:
         if stock <= 0:
             continue  # nichts auf Lager
+        menge = min(random.randint(min_m, max_m), stock)
+        if menge > 0:
+            wanted.append((artikel_id, menge))
+    if not wanted:
+        return 0, 0.0
+
+    preise = fetch_prices(cur, [a for a, _ in wanted], when)
+    for artikel_id, _ in wanted:
+        if artikel_id not in preise:
+            raise RuntimeError(f"Kein Preis für Artikel {artikel_id} am Datum {when}.")
+
+    # Bestand kann sich seit der Auswahl geändert haben → auf den gesperrten Bestand kürzen
+    lines = reserve_receipt(
+        cur, verkauf_id,
+        [(a, m, preise[a], rabatt_pct) for a, m in wanted],
+        clip=True,
+    )
+    total = sum(preis * menge for _, menge, preis, _ in lines)
+    return len(lines), round(total, 2)
+
+
+
+def create_random_sale(cur, artikel_pool=None):
+    """
+    Ein kompletter Zufallsverkauf (Kunde, Kopf, Positionen) – ohne commit.
+    Wird von main() und vom Lastgenerator (pos_load.py) benutzt.
+    artikel_pool = feste Liste von artikelIDs (nur daraus wählen → mehr Konkurrenz um dieselben Zeilen)
+    Gibt zurück: (verkaufID, Positionen, Summe ohne Rabatt, Rabatt-Prozent, Kundentyp)
+    """
+    # 1) Zufälligen Kunden wählen
+    kunden_id, rabatt_pct, kundentyp = pick_customer(cur)
+
+    # 2) Wertebereiche für diesen Kundentyp
+    menge_range, items_range = ranges_for_type(kundentyp)
 
-        # zufällige Menge – aber nicht mehr als Lagerbestand
-        menge = random.randint(min_m, max_m)
-        menge = min(menge, stock)
-        if menge <= 0:
-            continue
+    # 3) Verkauf-Kopf (Header) erstellen
+    verkauf_id, when = create_sale_header(cur, kunden_id)
 
-        preis = get_listenpreis(cur, artikel_id, when)
+    # 4) Wie viele verschiedene Artikel soll der Kunde kaufen?
+    max_items = random.randint(*items_range)
 
-        # Eintrag in verkaufartikel
-        cur.execute("""
-            INSERT INTO verkaufartikel(verkaufID, artikelID, verkaufsmenge, verkaufspreis, rabatt)
-            VALUES (%s, %s, %s, %s, %s);
-        """, (verkauf_id, artikel_id, menge, preis, rabatt_pct))
+    # 5) Artikel aus dem Lager holen
+    if artikel_pool:
+        candidates = pick_articles_from_pool(cur, artikel_pool, max_items=max_items)
+    else:
+        candidates = pick_articles_with_stock(cur, max_items=max_items)
+    if not candidates:
+        raise RuntimeError("Keine Artikel mit Lagerbestand > 0 gefunden.")
 
-        added += 1
-        total += preis * menge
+    # 6) Artikel hinzufügen
+    added, total = add_sale_items(cur, verkauf_id, candidates, when, rabatt_pct, menge_range)
+    if added == 0:
+        raise RuntimeError("Keine Artikel hinzugefügt. Abbruch.")
 
-    return added, round(total, 2)
+    return verkauf_id, added, total, rabatt_pct, kundentyp
 
 
 
@@ -151,31 +243,8 @@ def main():
         return
 
     try:
-        with conn.cursor() as cur:
-            # 1) Zufälligen Kunden wählen
-            kunden_id, rabatt_pct, kundentyp = pick_customer(cur)
-
-            # 2) Wertebereiche für diesen Kundentyp
-            menge_range, items_range = ranges_for_type(kundentyp)
-
-            # 3) Verkauf-Kopf (Header) erstellen
-            verkauf_id, when = create_sale_header(cur, kunden_id)
-
-            # 4) Wie viele verschiedene Artikel soll der Kunde kaufen?
-            max_items = random.randint(*items_range)
-
-            # 5) Artikel aus dem Lager holen
-            candidates = pick_articles_with_stock(cur, max_items=max_items)
-            if not candidates:
-                raise RuntimeError("Keine Artikel mit Lagerbestand > 0 gefunden.")
-
-            # 6) Artikel hinzufügen
-            added, total = add_sale_items(cur, verkauf_id, candidates, when, rabatt_pct, menge_range)
-            if added == 0:
-                raise RuntimeError("Keine Artikel hinzugefügt. Abbruch.")
-
-        # 7) Alles speichern (commit)
-        conn.commit()
+        # Verkauf anlegen und speichern (commit); bei Deadlock/Lock-Timeout neuer Versuch
+        verkauf_id, added, total, rabatt_pct, kundentyp = run_with_retry(conn, create_random_sale)
         print(
             f"Verkauf erstellt: ID={verkauf_id}, Positionen={added}, "
             f"Summe (ohne Rabatt)={total:.2f}, Rabatt={rabatt_pct:.2f}%, Typ={kundentyp}"
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+sampling.py
+Zufällige Datensätze ziehen, ohne "ORDER BY RAND()" (das liest und sortiert jedes Mal die ganze Tabelle).
+
+  • pick_by_pk    → Zufalls-IDs im Bereich MIN..MAX des Primärschlüssels ziehen und per Index nachschlagen.
+                    Lücken (gelöschte IDs) oder Filter (WHERE) → neuer Versuch. Jede vorhandene Zeile hat
+                    dieselbe Chance (verworfene Treffer werden nicht auf den Nachbarn umgelenkt).
+                    Klappt das nach PK_RETRIES Versuchen nicht (sehr lückenhaft oder strenger Filter),
+                    werden die passenden IDs einmal geladen und im Speicher gezogen (IdSampler) –
+                    teurer, aber weiterhin gleichverteilt. Für häufige Züge mit Filter deshalb besser:
+  • IdSampler     → Kandidaten-IDs liegen im Speicher (einmal laden, dann beliebig oft ziehen),
+                    optional gewichtet (kumulative Gewichte + Binärsuche), z. B. nach Beliebtheit.
+
+Tabellen- und Spaltennamen werden direkt ins SQL eingesetzt → nur feste Namen aus dem Code übergeben.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Wie viele Zufalls-IDs pro gesuchtem Datensatz in einem Versuch abgefragt werden
+PK_OVERSAMPLE = 2
+# Versuche mit Zufalls-IDs, bevor auf die Bereichssuche gewechselt wird
+PK_RETRIES = 5
+
+
+class IdSampler:
+    """
+    Zufallsauswahl aus IDs im Speicher.
+    Ohne Gewichte: gleichverteilt (O(1) pro Zug). Mit Gewichten: O(log n) pro Zug.
+    """
+
+    def __init__(self, ids: Sequence, weights: Optional[Sequence[float]] = None, rng=random):
+        self.ids = list(ids)
+        self.rng = rng
+        self.weights: Optional[List[float]] = None
+        self._cum: Optional[List[float]] = None
+        if weights is not None:
+            if len(weights) != len(self.ids):
+                raise ValueError("ids und weights müssen gleich lang sein")
+            self.weights = [max(0.0, float(w)) for w in weights]
+            self._cum = list(itertools.accumulate(self.weights))
+            if self.ids and self._cum[-1] <= 0:
+                raise ValueError("Summe der Gewichte muss > 0 sein")
+
+    @classmethod
+    def from_query(cls, cur, sql: str, params: Sequence = (), rng=random) -> "IdSampler":
+        """Kandidaten per SQL laden: 1. Spalte = ID, optionale 2. Spalte = Gewicht."""
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        if rows and len(rows[0]) > 1:
+            return cls([r[0] for r in rows], [r[1] or 0 for r in rows], rng=rng)
+        return cls([r[0] for r in rows], rng=rng)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def pick(self):
+        """Eine ID ziehen (mit Zurücklegen)."""
+        if not self.ids:
+            raise IndexError("Keine Kandidaten")
+        if self._cum is None:
+            return self.ids[self.rng.randrange(len(self.ids))]
+        x = self.rng.random() * self._cum[-1]
+        return self.ids[min(bisect.bisect_right(self._cum, x), len(self.ids) - 1)]
+
+    def sample(self, k: int) -> List:
+        """
+        k verschiedene IDs ziehen (ohne Zurücklegen; weniger, wenn es nicht genug gibt).
+        Gewichtet: Ziehen mit Zurücklegen, Doppelte verwerfen; will man fast alle IDs, stattdessen
+        einmal alle gewichtet mischen (Efraimidis–Spirakis) – beides kostet etwa O(k log n).
+        """
+        k = min(k, len(self.ids))
+        if self._cum is None:
+            return self.rng.sample(self.ids, k)
+        if 2 * k >= len(self.ids):
+            keys = [(self.rng.random() ** (1.0 / w) if w > 0 else -1.0, i) for i, w in enumerate(self.weights)]
+            return [self.ids[i] for key, i in sorted(keys, reverse=True)[:k] if key >= 0]
+        chosen: Dict = {}
+        for _ in range(k * 20):                     # Obergrenze, falls wenige IDs fast alles Gewicht haben
+            if len(chosen) >= k:
+                break
+            chosen.setdefault(self.pick(), None)
+        return list(chosen)
+
+
+# Cache für MIN/MAX des Primärschlüssels (pro Tabelle, wird bei Bedarf erneuert)
+_pk_bounds: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+
+def pk_bounds(cur, table: str, pk: str, refresh: bool = False) -> Optional[Tuple[int, int]]:
+    """(MIN, MAX) des Primärschlüssels – zwei Index-Zugriffe, kein Tabellen-Scan. None bei leerer Tabelle."""
+    key = (table, pk)
+    if refresh or key not in _pk_bounds:
+        cur.execute(f"SELECT MIN({pk}), MAX({pk}) FROM {table}")
+        lo, hi = cur.fetchone()
+        if lo is None:
+            _pk_bounds.pop(key, None)
+            return None
+        _pk_bounds[key] = (int(lo), int(hi))
+    return _pk_bounds[key]
+
+
+def pick_by_pk(cur, table: str, pk: str, columns: Optional[str] = None, where: Optional[str] = None,
+               params: Sequence = (), k: int = 1, rng=random, retries: int = PK_RETRIES) -> List[tuple]:
+    """
+    Bis zu k zufällige, verschiedene Zeilen aus table ziehen.
+    columns: Spaltenliste fürs SELECT (Standard: nur pk, erste Spalte muss pk sein).
+    where:   zusätzliche Bedingung (z. B. "lagerbestand > 0"), params dazu.
+    """
+    columns = columns or pk
+    cond = f" AND ({where})" if where else ""
+    result: Dict[int, tuple] = {}
+
+    for attempt in range(retries + 1):
+        bounds = pk_bounds(cur, table, pk, refresh=attempt > 0 and not result)
+        if bounds is None:
+            return []
+        lo, hi = bounds
+        k = min(k, hi - lo + 1)                     # mehr verschiedene IDs gibt es nicht
+        need = k - len(result)
+        if need <= 0:
+            break
+        ids = {rng.randint(lo, hi) for _ in range(need * PK_OVERSAMPLE)} - set(result)
+        if not ids:
+            continue
+        marks = ", ".join(["%s"] * len(ids))
+        cur.execute(f"SELECT {columns} FROM {table} WHERE {pk} IN ({marks}){cond}",
+                    (*ids, *params))
+        rows = cur.fetchall()
+        rng.shuffle(rows)
+        for row in rows[:need]:
+            result[row[0]] = row
+
+    # Fallback: passende IDs laden (nur Primärschlüssel, Index) und im Speicher ziehen.
+    # Keine Bereichssuche ab Zufalls-ID – die würde IDs direkt nach einer Lücke bevorzugen
+    # und aufeinanderfolgende IDs liefern. Kostet O(Tabelle) → wer oft mit strengem Filter zieht,
+    # hält einen IdSampler im Speicher (wie sale.stock_sampler).
+    need = k - len(result)
+    if need > 0:
+        sampler = IdSampler.from_query(cur, f"SELECT {pk} FROM {table} WHERE 1=1{cond}", params, rng=rng)
+        sampler.ids = [i for i in sampler.ids if i not in result]
+        ids = sampler.sample(need)
+        if ids:
+            marks = ", ".join(["%s"] * len(ids))
+            cur.execute(f"SELECT {columns} FROM {table} WHERE {pk} IN ({marks})", ids)
+            for row in cur.fetchall():
+                result[row[0]] = row
+
+    return list(result.values())
+
+
+def pick_one(rows: Sequence, rng=random):
+    """Ein Element aus einer (kleinen) Liste ziehen, oder None wenn leer."""
+    return rows[rng.randrange(len(rows))] if rows else None
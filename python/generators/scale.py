@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+scale.py
+Vergrößert die Stammdaten synthetisch um einen Faktor N (ähnlich wie der "scale factor" bei TPC).
+
+Aus den vorhandenen (echten) Stammdaten aus sql/data.sql werden zusätzliche Datensätze erzeugt:
+  • kunden            → N × so viele Kunden; Kundentypen als Pyramide (viele Standard, wenige Platin)
+  • lieferanten       → N × so viele Lieferanten
+  • artikel           → N × so viele Artikel (Varianten der vorhandenen Produkte)
+  • artikellieferant  → 1–4 Lieferanten pro neuem Artikel; große Lieferanten liefern mehr (Zipf)
+                        Einkaufspreis = Preis des Basisartikels × Log-Normal-Streuung
+  • artikelpreis      → Preisverlauf: Startpreis (Aufschlag 30–80 %) + einige Preisänderungen
+
+Synthetische Datensätze sind markiert (E-Mail-Domain / Namenszusatz) und werden bei jedem Lauf
+zuerst gelöscht. Faktor 1 = zurück auf die Originaldaten.
+Voraussetzung: keine Bewegungsdaten auf synthetischen Datensätzen (generate_history löscht sie vorher).
+
+Start:
+    python -m python.generators.scale 10
+    python -m python.generators.generate_history --scale 10     (Stammdaten skalieren + Historie)
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from db import get_conn
+from dialect import delete_in
+
+# Markierungen für synthetische Datensätze
+SYNTH_EMAIL_DOMAIN = "scale.newshop.test"
+SYNTH_ARTIKEL_TAG = " #S"            # produktname = "<Basisname> #S<Nr>"
+
+# Verteilung der Kundentypen bei neuen Kunden (nach kundentyp.bezeichnung)
+KUNDENTYP_GEWICHTE: Dict[str, float] = {"Standard": 0.55, "Silber": 0.27, "Gold": 0.13, "Platin": 0.05}
+
+# Lieferanten pro neuem Artikel (1..4, kleinere Zahlen häufiger)
+LIEFERANTEN_PRO_ARTIKEL = (1, 2, 3, 4)
+LIEFERANTEN_GEWICHTE = (0.45, 0.30, 0.15, 0.10)
+
+# Zipf-Exponent: wie stark sich die Artikel auf große Lieferanten konzentrieren
+LIEFERANT_ZIPF_S = 1.1
+
+# Einkaufspreis-Streuung (Log-Normal, sigma) und Verkaufsaufschlag
+EK_SIGMA = 0.25
+AUFSCHLAG_MIN, AUFSCHLAG_MAX = 1.30, 1.80
+
+# Preisverlauf: Start, Anzahl Änderungen (0..N), Änderung pro Schritt (±)
+PREIS_START = date(2024, 1, 1)
+PREIS_ENDE = date(2025, 10, 31)
+PREIS_AENDERUNGEN_MAX = 3
+PREIS_AENDERUNG_PROZENT = 0.10
+
+# Einfügen in Blöcken (executemany → mehrzeilige INSERTs)
+BATCH = 5_000
+
+
+def _insert_many(cur, sql: str, rows: List[Tuple]) -> None:
+    for i in range(0, len(rows), BATCH):
+        cur.executemany(sql, rows[i:i + BATCH])
+
+
+def remove_synthetic(cur) -> None:
+    """Alle synthetischen Stammdaten löschen (Kinder zuerst wegen Fremdschlüsseln)."""
+    like_art = f"%{SYNTH_ARTIKEL_TAG}%"
+    like_mail = f"%@{SYNTH_EMAIL_DOMAIN}"
+    synth_artikel = "SELECT artikelID FROM artikel WHERE produktname LIKE %s"
+    cur.execute(delete_in("artikelpreis", "artikelID", synth_artikel), (like_art,))
+    cur.execute(delete_in("artikellieferant", "artikelID", synth_artikel), (like_art,))
+    cur.execute(delete_in("artikellieferant", "lieferantID",
+                          "SELECT lieferantID FROM lieferanten WHERE email LIKE %s"), (like_mail,))
+    cur.execute("DELETE FROM artikel WHERE produktname LIKE %s", (like_art,))
+    cur.execute("DELETE FROM lieferanten WHERE email LIKE %s", (like_mail,))
+    cur.execute("DELETE FROM kunden WHERE email LIKE %s", (like_mail,))
+
+
+def _zipf_weights(n: int, s: float) -> List[float]:
+    """Gewichte 1/rang^s (Rang 1 = größter Lieferant)."""
+    return [1.0 / math.pow(r, s) for r in range(1, n + 1)]
+
+
+def _price_history(rng: random.Random, start_price: float) -> List[Tuple[float, date, Optional[date]]]:
+    """Preisverlauf für einen Artikel: [(listenpreis, gueltig_ab, gueltig_bis), ...]."""
+    n_changes = rng.randint(0, PREIS_AENDERUNGEN_MAX)
+    span = (PREIS_ENDE - PREIS_START).days
+    change_days = sorted({PREIS_START + timedelta(days=rng.randint(30, span)) for _ in range(n_changes)})
+
+    result = []
+    price, ab = start_price, PREIS_START
+    for d in change_days:
+        result.append((round(price, 2), ab, d - timedelta(days=1)))
+        price = max(0.05, price * (1 + rng.uniform(-PREIS_AENDERUNG_PROZENT, PREIS_AENDERUNG_PROZENT)))
+        ab = d
+    result.append((round(price, 2), ab, None))
+    return result
+
+
+def scale_master_data(conn, factor: int, seed: int = 42) -> Dict[str, int]:
+    """
+    Stammdaten auf factor × Originalgröße bringen (factor=1 → nur synthetische Daten entfernen).
+    Gibt die Anzahl neuer Datensätze pro Tabelle zurück. Commit am Ende.
+    """
+    rng = random.Random(f"scale:{seed}:{factor}")
+    like_art = f"%{SYNTH_ARTIKEL_TAG}%"
+    created = {"kunden": 0, "lieferanten": 0, "artikel": 0, "artikellieferant": 0, "artikelpreis": 0}
+
+    with conn.cursor() as cur:
+        remove_synthetic(cur)
+        if factor <= 1:
+            conn.commit()
+            return created
+
+        # ---------- Basisdaten lesen ----------
+        cur.execute("SELECT vorname, nachname FROM kunden")
+        namen = cur.fetchall()
+        cur.execute("SELECT kundentypID, bezeichnung FROM kundentyp")
+        typ_by_name = {str(b): int(i) for i, b in cur.fetchall()}
+        cur.execute("SELECT lieferantID, lieferant FROM lieferanten")
+        base_lief = cur.fetchall()
+        cur.execute("""
+            SELECT a.artikelID, a.produktname, AVG(al.einkaufspreis)
+            FROM artikel a
+            JOIN artikellieferant al ON al.artikelID = a.artikelID
+            GROUP BY a.artikelID, a.produktname
+        """)
+        base_art = cur.fetchall()
+        if not namen or not base_lief or not base_art:
+            raise RuntimeError("Keine Basis-Stammdaten gefunden (zuerst sql/data.sql laden).")
+
+        # ---------- Kunden ----------
+        typen = [t for t in KUNDENTYP_GEWICHTE if t in typ_by_name] or list(typ_by_name)
+        gewichte = [KUNDENTYP_GEWICHTE.get(t, 1.0) for t in typen]
+        n_kunden = len(namen) * (factor - 1)
+        rows = []
+        for i in range(1, n_kunden + 1):
+            vorname = rng.choice(namen)[0]
+            nachname = rng.choice(namen)[1]
+            typ = rng.choices(typen, weights=gewichte)[0]
+            rows.append((vorname, nachname, f"kunde{i}@{SYNTH_EMAIL_DOMAIN}",
+                         f"+43{rng.randint(100000000, 999999999)}", typ_by_name[typ]))
+        _insert_many(cur, "INSERT INTO kunden (vorname, nachname, email, telefon, kundentypID) "
+                          "VALUES (%s, %s, %s, %s, %s)", rows)
+        created["kunden"] = len(rows)
+
+        # ---------- Lieferanten ----------
+        n_lief = len(base_lief) * (factor - 1)
+        rows = [(f"{rng.choice(base_lief)[1]} S{i}", None, None, f"lieferant{i}@{SYNTH_EMAIL_DOMAIN}")
+                for i in range(1, n_lief + 1)]
+        _insert_many(cur, "INSERT INTO lieferanten (lieferant, kontaktperson, telefon, email) "
+                          "VALUES (%s, %s, %s, %s)", rows)
+        created["lieferanten"] = len(rows)
+
+        cur.execute("SELECT lieferantID FROM lieferanten ORDER BY lieferantID")
+        alle_lief = [int(r[0]) for r in cur.fetchall()]
+        rng.shuffle(alle_lief)                       # Rang (Größe) zufällig verteilen
+        lief_gewichte = _zipf_weights(len(alle_lief), LIEFERANT_ZIPF_S)
+
+        # ---------- Artikel ----------
+        n_art = len(base_art) * (factor - 1)
+        basis_fuer_neu = [base_art[(i - 1) % len(base_art)] for i in range(1, n_art + 1)]
+        rows = [(f"{b[1]}{SYNTH_ARTIKEL_TAG}{i}", 0, None) for i, b in enumerate(basis_fuer_neu, start=1)]
+        _insert_many(cur, "INSERT INTO artikel (produktname, lagerbestand, durchschnittskosten) "
+                          "VALUES (%s, %s, %s)", rows)
+        created["artikel"] = len(rows)
+
+        cur.execute("SELECT artikelID FROM artikel WHERE produktname LIKE %s ORDER BY artikelID",
+                    (like_art,))
+        neue_art = [int(r[0]) for r in cur.fetchall()]
+
+        # ---------- Artikel-Lieferant + Preisverlauf ----------
+        al_rows, ap_rows = [], []
+        for a_id, basis in zip(neue_art, basis_fuer_neu):
+            ek_basis = float(basis[2]) * rng.lognormvariate(0.0, EK_SIGMA)
+            n = rng.choices(LIEFERANTEN_PRO_ARTIKEL, weights=LIEFERANTEN_GEWICHTE)[0]
+            lieferanten = set()
+            while len(lieferanten) < min(n, len(alle_lief)):
+                lieferanten.add(rng.choices(alle_lief, weights=lief_gewichte)[0])
+            for l_id in sorted(lieferanten):
+                ek = max(0.01, ek_basis * rng.uniform(0.9, 1.1))
+                al_rows.append((l_id, a_id, round(ek, 2)))
+
+            start = ek_basis * rng.uniform(AUFSCHLAG_MIN, AUFSCHLAG_MAX)
+            for preis, ab, bis in _price_history(rng, start):
+                ap_rows.append((a_id, preis, ab, bis))
+
+        _insert_many(cur, "INSERT INTO artikellieferant (lieferantID, artikelID, einkaufspreis) "
+                          "VALUES (%s, %s, %s)", al_rows)
+        _insert_many(cur, "INSERT INTO artikelpreis (artikelID, listenpreis, gueltig_ab, gueltig_bis) "
+                          "VALUES (%s, %s, %s, %s)", ap_rows)
+        created["artikellieferant"] = len(al_rows)
+        created["artikelpreis"] = len(ap_rows)
+
+    conn.commit()
+    return created
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    p = argparse.ArgumentParser(description="Stammdaten synthetisch vergrößern (Faktor N).")
+    p.add_argument("factor", type=int, help="Skalierungsfaktor (1 = Originaldaten)")
+    p.add_argument("--seed", type=int, default=42)
+    args = p.parse_args(argv)
+
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        return
+    try:
+        created = scale_master_data(conn, max(1, args.factor), args.seed)
+        print(f"• Scale {args.factor}×: " + ", ".join(f"{k}=+{v}" for k, v in created.items()))
+    except Exception as e:
+        conn.rollback()
+        print(f"Fehler beim Skalieren (Bewegungsdaten auf synthetischen Daten? "
+              f"→ zuerst generate_history ohne --out laufen lassen): {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
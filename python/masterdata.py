@@ -0,0 +1,115 @@
+"""
+Stammdaten im Speicher (für Prüfungen pro Anfrage ohne DB-Abfrage, z. B. /api/sales).
+Ein Abzug enthält:
+  - artikel: artikelID → heute gültiger Listenpreis (None = kein Preis)
+  - kunden:  kundenID → Rabatt in % (aus kundentyp)
+  - hot:     Hot-Artikel mit aufgeteiltem Lagerzähler (sql/artikel_hot.sql, sonst leer)
+Der Abzug wird nach MASTERDATA_TTL Sekunden (Standard 60) von der nächsten Anfrage neu geladen.
+Lagerbestände stehen bewusst NICHT im Cache – die prüft der Schreibvorgang unter Sperre.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, Optional
+
+from .db import get_conn
+from .dialect import table_exists
+from .metrics import CACHE_REQUESTS
+
+CACHE_TTL = float(os.getenv("MASTERDATA_TTL", "60"))
+
+
+class MasterData:
+    """Unveränderlicher Abzug der Stammdaten (wird als Ganzes ausgetauscht, nie geändert)."""
+
+    __slots__ = ("artikel", "kunden", "hot", "geladen")
+
+    def __init__(self, artikel: Dict[int, Optional[float]], kunden: Dict[int, float],
+                 hot: FrozenSet[int], geladen: float):
+        self.artikel = artikel
+        self.kunden = kunden
+        self.hot = hot
+        self.geladen = geladen
+
+
+def load_masterdata(cur) -> MasterData:
+    """Alle Stammdaten mit drei Abfragen laden."""
+    cur.execute("""
+        SELECT a.artikelID, p.listenpreis
+        FROM artikel a
+        LEFT JOIN (
+            SELECT artikelID, listenpreis,
+                   ROW_NUMBER() OVER (PARTITION BY artikelID ORDER BY gueltig_ab DESC) AS rn
+            FROM artikelpreis
+            WHERE gueltig_ab <= CURDATE()
+              AND (gueltig_bis IS NULL OR gueltig_bis >= CURDATE())
+        ) p ON p.artikelID = a.artikelID AND p.rn = 1
+    """)
+    artikel = {int(a): (float(p) if p is not None else None) for a, p in cur.fetchall()}
+
+    cur.execute("""
+        SELECT k.kundenID, COALESCE(t.kundenrabatt, 0)
+        FROM kunden k
+        LEFT JOIN kundentyp t ON t.kundentypID = k.kundentypID
+    """)
+    kunden = {int(k): float(r) for k, r in cur.fetchall()}
+
+    hot = frozenset()
+    if table_exists(cur, "artikel_hot"):
+        cur.execute("SELECT artikelID FROM artikel_hot")
+        hot = frozenset(int(r[0]) for r in cur.fetchall())
+
+    return MasterData(artikel, kunden, hot, time.time())
+
+
+class MasterDataCache:
+    """
+    Thread-sicherer Zwischenspeicher mit Ablaufzeit.
+    Nur ein Thread lädt neu; die anderen arbeiten solange mit dem alten Abzug weiter
+    (nur beim allerersten Laden warten alle).
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL):
+        self.ttl = ttl
+        self._data: Optional[MasterData] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> MasterData:
+        data = self._data
+        if data is not None and time.time() - data.geladen < self.ttl:
+            CACHE_REQUESTS.inc("masterdata", "hit")
+            return data
+        if data is not None and not self._lock.acquire(blocking=False):
+            CACHE_REQUESTS.inc("masterdata", "stale")
+            return data                     # lädt gerade ein anderer Thread
+        if data is None:
+            self._lock.acquire()
+        try:
+            if self._data is data:          # nicht inzwischen schon neu geladen
+                self._data = self._load()
+                CACHE_REQUESTS.inc("masterdata", "miss")
+            else:
+                CACHE_REQUESTS.inc("masterdata", "hit")
+            return self._data
+        finally:
+            self._lock.release()
+
+    def invalidate(self) -> None:
+        """Beim nächsten get() neu laden (z. B. nach neuen Artikeln oder Preisen)."""
+        self._data = None
+
+    @staticmethod
+    def _load() -> MasterData:
+        conn = get_conn()
+        if not conn:
+            raise RuntimeError("Keine Verbindung zur Datenbank")
+        try:
+            with conn.cursor() as cur:
+                return load_masterdata(cur)
+        finally:
+            conn.close()
+
+
+# gemeinsamer Cache für die ganze App
+masterdata = MasterDataCache()
@@ -0,0 +1,288 @@
+"""
+Betriebszahlen für Prometheus: GET /metrics (Text-Format 0.0.4).
+
+Zähler im Prozess, billig auf dem heißen Pfad: jeder Thread zählt in sein eigenes dict
+(nur er schreibt hinein → kein Lock pro Anfrage/Abfrage). Erst /metrics addiert alle Threads;
+Werte beendeter Threads werden dabei in einen Rest übernommen, damit die Liste nicht wächst.
+
+Inhalt:
+    newshop_http_requests_total{route,method,status}       Anfragen pro Route (Flask-Regel, nicht die URL)
+    newshop_http_request_duration_seconds{route}            Latenz-Histogramm
+    newshop_db_connections_total{status}, …_seconds_total   Verbindungsaufbau (ok/error)
+    newshop_db_queries_total, newshop_db_query_seconds_total Abfragen (inkl. Abholen der Zeilen)
+    newshop_cache_requests_total{cache,result}, newshop_cache_hit_ratio{cache}
+    newshop_generator_days_done/_total/_progress_ratio{job} Fortschritt aus generator_checkpoint
+    newshop_db_up                                           1 = Abfrage beim Abruf von /metrics klappte
+
+METRICS_TOKEN gesetzt → nur mit Header „Authorization: Bearer <token>“ (sonst offen wie /health).
+Einbinden: init_metrics(app) in dashboard.py.
+"""
+
+import hmac
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .db import add_timing_hook, get_conn
+from .dialect import table_exists
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+START_TIME = time.time()
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[tuple]]] = []
+
+
+class _Sharded:
+    """Ein dict pro Thread; snapshot() fasst alle zusammen (merge = Addition für den Werttyp)."""
+
+    def __init__(self, merge: Callable):
+        self._merge = merge
+        self._local = threading.local()
+        self._lock = threading.Lock()            # nur beim ersten Zugriff eines Threads und beim Abruf
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        self._retired: dict = {}
+
+    def shard(self) -> dict:
+        try:
+            return self._local.data
+        except AttributeError:
+            data = self._local.data = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), data))
+            return data
+
+    def _add(self, total: dict, data: dict) -> None:
+        for key, value in data.items():
+            total[key] = self._merge(total[key], value) if key in total else self._merge(None, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            alive = []
+            for thread, data in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, data))
+                else:
+                    self._add(self._retired, data)     # Thread beendet → schreibt nicht mehr
+            self._shards = alive
+            total: dict = {}
+            self._add(total, self._retired)
+            for _, data in alive:
+                self._add(total, data.copy())         # copy: der Thread kann gerade neue Schlüssel anlegen
+        return total
+
+
+def _add_numbers(a, b):
+    return b if a is None else a + b
+
+
+def _add_lists(a, b):
+    return list(b) if a is None else [x + y for x, y in zip(a, b)]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        _registry.append(self)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._data = _Sharded(_add_numbers)
+
+    def inc(self, *label_values, amount: float = 1.0) -> None:
+        data = self._data.shard()
+        data[label_values] = data.get(label_values, 0.0) + amount
+
+    def values(self) -> Dict[tuple, float]:
+        return self._data.snapshot()
+
+    def lines(self) -> Iterable[str]:
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_labels(self.labels, key)} {_num(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        self._data = _Sharded(_add_lists)
+
+    def observe(self, value: float, *label_values) -> None:
+        data = self._data.shard()
+        counts = data.get(label_values)
+        if counts is None:
+            counts = data[label_values] = [0] * (len(self.buckets) + 1) + [0.0]   # Buckets, +Inf, Summe
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def lines(self) -> Iterable[str]:
+        for key, counts in sorted(self._data.snapshot().items()):
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                le = "+Inf" if bound == float("inf") else _num(bound)
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), key + (le,))} {running}"
+            yield f"{self.name}_sum{_labels(self.labels, key)} {_num(counts[-1])}"
+            yield f"{self.name}_count{_labels(self.labels, key)} {running}"
+
+
+def _num(value) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def add_collector(fn: Callable[[], Iterable[tuple]]) -> None:
+    """
+    Werte, die erst beim Abruf berechnet werden (Gauges).
+    fn() liefert (name, hilfe, [(labels_dict, wert), …]) pro Metrik.
+    """
+    if fn not in _collectors:               # create_app() mehrmals im Prozess → nicht doppelt ausgeben
+        _collectors.append(fn)
+
+
+def render() -> str:
+    """Alle Metriken im Prometheus-Textformat."""
+    out: List[str] = []
+    for metric in _registry:
+        out.append(f"# HELP {metric.name} {metric.help}")
+        out.append(f"# TYPE {metric.name} {metric.kind}")
+        out.extend(metric.lines())
+    for fn in _collectors:
+        try:
+            families = list(fn())
+        except Exception as e:                  # ein kaputter Sammler darf /metrics nicht kippen
+            out.append(f"# Sammler {getattr(fn, '__name__', fn)} fehlgeschlagen: {_escape(e)}")
+            continue
+        for name, help_text, samples in families:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                out.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_num(value)}")
+    return "\n".join(out) + "\n"
+
+
+# ── Metriken der App ─────────────────────────────────────────────────────────
+
+HTTP_REQUESTS = Counter("newshop_http_requests_total", "HTTP-Anfragen", ("route", "method", "status"))
+HTTP_LATENCY = Histogram("newshop_http_request_duration_seconds", "Dauer der HTTP-Anfragen", ("route",))
+DB_CONNECTIONS = Counter("newshop_db_connections_total", "Verbindungsaufbau zur Datenbank", ("status",))
+DB_CONNECT_SECONDS = Counter("newshop_db_connect_seconds_total", "Zeit für den Verbindungsaufbau")
+DB_QUERIES = Counter("newshop_db_queries_total", "SQL-Abfragen")
+DB_QUERY_SECONDS = Counter("newshop_db_query_seconds_total", "Zeit in SQL-Abfragen inkl. Abholen der Zeilen")
+CACHE_REQUESTS = Counter("newshop_cache_requests_total",
+                         "Cache-Zugriffe (hit = frisch, stale = alter Abzug während Neuladen, miss = geladen)",
+                         ("cache", "result"))
+
+
+def _on_db(phase: str, seconds: float, sql=None) -> None:
+    if phase == "sql":
+        if sql is not None:
+            DB_QUERIES.inc()
+        DB_QUERY_SECONDS.inc(amount=seconds)
+    else:
+        DB_CONNECTIONS.inc("ok" if phase == "connect" else "error")
+        DB_CONNECT_SECONDS.inc(amount=seconds)
+
+
+def _cache_ratios():
+    per_cache: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.values().items():
+        per_cache.setdefault(cache, {})[result] = value
+    samples = []
+    for cache, results in sorted(per_cache.items()):
+        total = sum(results.values())
+        hits = results.get("hit", 0) + results.get("stale", 0)
+        samples.append(({"cache": cache}, hits / total if total else 0.0))
+    yield "newshop_cache_hit_ratio", "Anteil der Cache-Zugriffe ohne Laden", samples
+
+
+def _database_state():
+    """Generator-Fortschritt aus generator_checkpoint (andere Prozesse) + ob die Datenbank antwortet."""
+    done, total, ratio, updated = [], [], [], []
+    up = 0
+    conn = get_conn()
+    if conn:
+        try:
+            with conn.cursor() as cur:
+                if table_exists(cur, "generator_checkpoint"):
+                    cur.execute("SELECT job, tage_fertig, tage_gesamt, aktualisiert_am FROM generator_checkpoint")
+                    for job, fertig, gesamt, am in cur.fetchall():
+                        labels = {"job": job}
+                        done.append((labels, fertig))
+                        total.append((labels, gesamt))
+                        ratio.append((labels, fertig / gesamt if gesamt else 0.0))
+                        if am is not None:
+                            updated.append((labels, am.timestamp()))
+            up = 1
+        except Exception:
+            up = 0
+        finally:
+            conn.rollback()
+            conn.close()
+    yield "newshop_db_up", "1 = Datenbank hat beim Abruf geantwortet", [({}, up)]
+    yield "newshop_generator_days_done", "Generator: fertige Tage", done
+    yield "newshop_generator_days_total", "Generator: alle Tage", total
+    yield "newshop_generator_progress_ratio", "Generator: Fortschritt 0…1", ratio
+    yield ("newshop_generator_last_update_timestamp_seconds",
+           "Generator: letzter Checkpoint (Unix-Zeit)", updated)
+
+
+def _process():
+    yield "newshop_process_start_time_seconds", "Startzeit des Prozesses (Unix-Zeit)", [({}, START_TIME)]
+
+
+# ── Flask ────────────────────────────────────────────────────────────────────
+
+def init_metrics(app) -> None:
+    """Zähler einschalten und GET /metrics anlegen."""
+    # Flask erst hier: masterdata.py zählt in CACHE_REQUESTS und wird auch von Kommandozeilen-Werkzeugen
+    # (api/pos_import.py) geladen, die ohne Flask laufen sollen
+    from flask import Response, g, request
+
+    def _before_request():
+        g._metrics_start = time.perf_counter()
+
+    def _after_request(response):
+        start = g.get("_metrics_start")
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"   # URL-Regel → wenige Label-Werte
+            HTTP_LATENCY.observe(time.perf_counter() - start, route)
+            HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+        return response
+
+    def metrics_view():
+        token = os.getenv("METRICS_TOKEN")
+        if token:
+            given = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+            if not hmac.compare_digest(given.encode(), token.encode()):
+                return Response("unauthorized\n", status=401, mimetype="text/plain")
+        return Response(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    add_timing_hook(_on_db)
+    add_collector(_cache_ratios)
+    add_collector(_database_state)
+    add_collector(_process)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
@@ -0,0 +1,137 @@
+"""
+Statistischer Profiler: ein Hintergrund-Thread schaut alle INTERVALL_S Sekunden nach, in welcher
+Funktion jeder andere Thread gerade steckt (sys._current_frames), und zählt die Aufrufketten.
+Kein Umbau und kein Neustart nötig; Aufwand ≈ eine Stack-Abfrage pro Thread und Intervall.
+
+Ergebnis im „collapsed“-Format (eine Zeile pro Aufrufkette, Funktionen mit ; getrennt, dann die Anzahl):
+    Thread-N (process_request_thread);run (threading.py:1010);…;report_daily (reports/routes.py:24) 37
+→ direkt lesbar für flamegraph.pl, speedscope.app oder inferno.
+
+Benutzt von:
+  • POST /admin/profile?sekunden=10 (admin/routes.py) – alle Threads der laufenden App, im Hintergrund
+  • generate_history --profile DATEI – der Generator selbst (bei --workers > 1 nur der Hauptprozess)
+
+Ohne Importe aus dem Projekt (wie dialect.py), damit App und Generatoren es laden können.
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+INTERVALL_S = 0.005          # 200 Stichproben pro Sekunde und Thread
+MAX_TIEFE = 200              # tiefere Stacks werden oben abgeschnitten
+
+# Threads, die nur warten (Server-Schleife, Queue, Lock) – zählen nicht als Arbeit
+_IDLE = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"), ("queue.py", "get"),
+    ("selectors.py", "select"), ("socketserver.py", "serve_forever"), ("socket.py", "accept"),
+}
+
+_running = threading.Lock()  # nur ein Profil gleichzeitig pro Prozess
+
+
+def _label(code, cache: Dict[object, str]) -> str:
+    """Funktionsname (Datei:Zeile der Definition) – gleiche Funktion = gleiche Beschriftung."""
+    label = cache.get(code)
+    if label is None:
+        parts = Path(code.co_filename).parts
+        name = getattr(code, "co_qualname", code.co_name)
+        label = f"{name} ({'/'.join(parts[-2:])}:{code.co_firstlineno})".replace(";", ",")
+        cache[code] = label
+    return label
+
+
+def _thread_label(name: str) -> str:
+    # Thread-123 → Thread-N: gleichartige Threads (eine pro Anfrage) werden zusammengefasst
+    return re.sub(r"\d+", "N", name).replace(";", ",")
+
+
+class SamplingProfiler:
+    """
+    profiler = SamplingProfiler(); profiler.start(); …; counts = profiler.stop()
+    nach_thread=True → Thread-Name als unterste Ebene; leerlauf=True → auch wartende Threads zählen.
+    """
+
+    def __init__(self, intervall: float = INTERVALL_S, nach_thread: bool = True, leerlauf: bool = False,
+                 ausnehmen: Iterable[int] = ()):
+        self.intervall = intervall
+        self.nach_thread = nach_thread
+        self.leerlauf = leerlauf
+        self.ausnehmen = set(ausnehmen)        # Thread-IDs, die nicht gemessen werden
+        self.counts: Counter = Counter()
+        self.stichproben = 0
+        self.dauer = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        if not _running.acquire(blocking=False):
+            raise RuntimeError("Es läuft bereits ein Profil in diesem Prozess")
+        self._thread = threading.Thread(target=self._run, name="newshop-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            _running.release()
+        return self.counts
+
+    def _sample(self, own: int, names: Dict[int, str], cache: Dict[object, str]) -> None:
+        for ident, frame in sys._current_frames().items():
+            if ident == own or ident in self.ausnehmen:
+                continue
+            code = frame.f_code
+            if not self.leerlauf and (Path(code.co_filename).name, code.co_name) in _IDLE:
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_TIEFE:
+                stack.append(_label(frame.f_code, cache))
+                frame = frame.f_back
+            if self.nach_thread:
+                stack.append(_thread_label(names.get(ident, "?")))
+            self.counts[tuple(reversed(stack))] += 1
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        cache: Dict[object, str] = {}
+        names: Dict[int, str] = {}
+        t0 = time.perf_counter()
+        while not self._stop.wait(self.intervall):
+            if self.stichproben % 50 == 0:      # Thread-Namen nur ab und zu neu lesen
+                names = {t.ident: t.name for t in threading.enumerate()}
+            self._sample(own, names, cache)
+            self.stichproben += 1
+        self.dauer = time.perf_counter() - t0
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def collapsed(counts: Counter) -> str:
+    """Zählerstand → collapsed-Format (häufigste Ketten zuerst)."""
+    return "".join(f"{';'.join(stack)} {n}\n" for stack, n in counts.most_common())
+
+
+def profile_for(sekunden: float, intervall: float = INTERVALL_S, nach_thread: bool = True,
+                leerlauf: bool = False) -> Tuple[SamplingProfiler, str]:
+    """Alle anderen Threads sekunden lang messen (der aufrufende Thread wartet nur und zählt nicht mit)."""
+    profiler = SamplingProfiler(intervall, nach_thread, leerlauf, ausnehmen=[threading.get_ident()])
+    with profiler:
+        time.sleep(sekunden)
+    return profiler, collapsed(profiler.counts)
+
+
+def write_collapsed(profiler: SamplingProfiler, path: str) -> None:
+    Path(path).write_text(collapsed(profiler.counts), encoding="utf-8")
+    print(f"• Profil: {path} ({profiler.stichproben} Stichproben in {profiler.dauer:.1f} s, "
+          f"{len(profiler.counts)} Aufrufketten)")
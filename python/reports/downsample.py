@@ -0,0 +1,67 @@
+"""
+Weniger Punkte für Diagramme: Largest-Triangle-Three-Buckets (LTTB, Steinarsson 2013).
+
+Eine Zeitreihe über mehrere Jahre pro Tag hat tausende Punkte – mehr, als das Diagramm Pixel hat.
+LTTB behält die Form (Spitzen, Einbrüche, Trends): erster und letzter Punkt bleiben, dazwischen wird die
+Reihe in gleich große Eimer geteilt und aus jedem der Punkt gewählt, der mit dem schon gewählten Punkt und
+dem Mittelwert des nächsten Eimers das größte Dreieck bildet.
+
+Die Tabelle und die Summen arbeiten weiter mit allen Zeilen; nur das Diagramm bekommt die Auswahl.
+"""
+
+from typing import List, Optional, Sequence
+
+PX_PER_POINT = 3            # ein Punkt pro 3 Pixel Diagrammbreite
+DEFAULT_WIDTH = 1100        # max-width von .chart-wrap, wenn der Browser keine Breite schickt
+MIN_POINTS = 50
+MAX_POINTS = 2000
+
+
+def target_points(width: Optional[int]) -> int:
+    """Zielanzahl Punkte aus der Diagrammbreite in Pixeln (Parameter w)."""
+    width = width or DEFAULT_WIDTH
+    return max(MIN_POINTS, min(MAX_POINTS, width // PX_PER_POINT))
+
+
+def lttb_indices(values: Sequence[Optional[float]], threshold: int) -> List[int]:
+    """
+    Indizes der Punkte, die LTTB behält (aufsteigend). x = Position in der Reihe (gleiche Abstände,
+    wie die Kategorie-Achse von Chart.js); None zählt als 0.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    ys = [float(v) if v is not None else 0.0 for v in values]
+    every = (n - 2) / (threshold - 2)       # Eimergröße ohne ersten und letzten Punkt
+    selected = [0]
+    a = 0                                   # zuletzt gewählter Punkt
+
+    for i in range(threshold - 2):
+        # Mittelwert des nächsten Eimers (für den letzten Eimer: der letzte Punkt)
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        # im aktuellen Eimer den Punkt mit der größten Dreiecksfläche suchen
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = a, ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - j) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def downsample_rows(rows: Sequence[tuple], value_index: int, threshold: int) -> list:
+    """Zeilen für das Diagramm: nur die von LTTB gewählten (nach der Spalte value_index, z. B. Umsatz)."""
+    return [rows[i] for i in lttb_indices([r[value_index] for r in rows], threshold)]
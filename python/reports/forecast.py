@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+forecast.py
+Absatzprognose für alle Artikel auf einmal (NumPy, ohne Schleife pro Artikel).
+
+Ablauf:
+  1) Tagesmengen pro Artikel (verkauf + verkaufartikel, gruppiert nach Artikel und Tag) in eine Matrix
+     Y[artikel, tag] laden – Tage ohne Verkauf = 0.
+  2) Zwei Modelle für alle Artikel gleichzeitig anpassen (Schleife nur über die Tage):
+       • ses      – einfache exponentielle Glättung
+       • ses_week – wie ses, aber auf wochentagsbereinigten Werten (Wochentagsfaktoren je Artikel)
+     Glättungsfaktor alpha aus einem Raster, pro Artikel der mit dem kleinsten Fehler (1-Schritt-Prognose).
+  3) Pro Artikel das bessere Modell wählen (AIC: Fehler + Anzahl Parameter) und die nächsten H Tage prognostizieren.
+  4) Ergebnis → Tabelle artikel_prognose (sql/artikel_prognose.sql), ersetzt den vorigen Lauf; Bericht: /reports/forecast.
+
+Start (z. B. nächtlich nach reorder_points):
+    python -m python.reports.forecast
+    python -m python.reports.forecast --bis 2025-09-30 --tage 365 --horizont 28
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..db import get_conn
+from ..dialect import table_exists
+
+FENSTER_TAGE = 365                      # Verlauf für die Anpassung
+HORIZONT_TAGE = 28                      # Prognose für so viele Tage
+ALPHAS = np.array([0.05, 0.1, 0.2, 0.3, 0.5, 0.7])
+SAISON = 7                              # Wochentage
+MODELLE = ("ses", "ses_week")
+
+# Einfügen in Blöcken (executemany → mehrzeilige INSERTs)
+BATCH = 10_000
+
+
+def ensure_forecast_table(cur) -> None:
+    """Tabelle artikel_prognose anlegen, falls sie fehlt (siehe sql/artikel_prognose.sql, SQLite: schema.sql)."""
+    if table_exists(cur, "artikel_prognose"):
+        return
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS artikel_prognose (
+          artikelID INT NOT NULL,
+          datum DATE NOT NULL,
+          menge DECIMAL(12,3) NOT NULL,
+          modell VARCHAR(20) NOT NULL,
+          alpha DECIMAL(4,3) NOT NULL,
+          stand DATE NOT NULL,
+          erstellt_am DATETIME NOT NULL,
+          PRIMARY KEY (artikelID, datum),
+          INDEX idx_artikel_prognose_datum (datum)
+        )
+    """)
+
+
+def load_daily_matrix(cur, von: date, bis: date) -> Tuple[np.ndarray, List[date], np.ndarray]:
+    """
+    Tagesmengen aller Artikel im Zeitraum [von, bis] als Matrix.
+    Gibt zurück: (artikel_ids[n], tage[T], Y[n, T])
+    """
+    cur.execute("SELECT artikelID FROM artikel ORDER BY artikelID")
+    ids = np.array([int(r[0]) for r in cur.fetchall()], dtype=np.int64)
+    tage = [von + timedelta(days=i) for i in range((bis - von).days + 1)]
+    Y = np.zeros((len(ids), len(tage)))
+    if not len(ids):
+        return ids, tage, Y
+
+    cur.execute("""
+        SELECT va.artikelID, DATEDIFF(DATE(v.verkaufsdatum), %s) AS tag, SUM(va.verkaufsmenge)
+        FROM verkauf v
+        JOIN verkaufartikel va ON va.verkaufID = v.verkaufID
+        WHERE v.verkaufsdatum >= %s AND v.verkaufsdatum < %s
+        GROUP BY va.artikelID, DATE(v.verkaufsdatum)
+    """, (von, von, bis + timedelta(days=1)))
+    rows = np.array(cur.fetchall(), dtype=float)
+    if rows.size:
+        zeile = np.searchsorted(ids, rows[:, 0].astype(np.int64))
+        ok = (zeile < len(ids)) & (ids[np.minimum(zeile, len(ids) - 1)] == rows[:, 0])
+        Y[zeile[ok], rows[ok, 1].astype(int)] = rows[ok, 2]
+    return ids, tage, Y
+
+
+def ses_fit(Y: np.ndarray, alphas: np.ndarray = ALPHAS) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Einfache exponentielle Glättung für alle Zeilen und alle alphas gleichzeitig.
+    Gibt zurück: (bestes alpha[n], letzter level[n], SSE der 1-Schritt-Prognose[n])
+    """
+    n, T = Y.shape
+    a = alphas[:, None]                                   # (k, 1)
+    level = np.repeat(Y[None, :, 0], len(alphas), axis=0) # (k, n) Start = erster Wert
+    sse = np.zeros((len(alphas), n))
+    for t in range(1, T):
+        err = Y[:, t] - level
+        sse += err * err
+        level += a * err
+    best = sse.argmin(axis=0)
+    cols = np.arange(n)
+    return alphas[best], level[best, cols], sse[best, cols]
+
+
+def weekday_factors(Y: np.ndarray, first_day: date) -> np.ndarray:
+    """Multiplikative Wochentagsfaktoren je Artikel (Mittel = 1). Gibt (n, 7) zurück, Index = weekday()."""
+    n, T = Y.shape
+    wd = (np.arange(T) + first_day.weekday()) % SAISON
+    sums = np.zeros((n, SAISON))
+    counts = np.bincount(wd, minlength=SAISON).astype(float)
+    for d in range(SAISON):
+        sums[:, d] = Y[:, wd == d].sum(axis=1)
+    means = sums / np.maximum(counts, 1)
+    overall = means.mean(axis=1, keepdims=True)
+    f = np.divide(means, overall, out=np.ones_like(means), where=overall > 0)
+    return np.clip(f, 0.05, None)
+
+
+def fit_and_forecast(Y: np.ndarray, first_day: date, horizont: int = HORIZONT_TAGE) -> Dict[str, np.ndarray]:
+    """
+    Beide Modelle für alle Artikel anpassen, je Artikel das bessere wählen und H Tage prognostizieren.
+    Gibt zurück: {"prognose": (n, H), "modell": (n,) Index in MODELLE, "alpha": (n,)}
+    """
+    n, T = Y.shape
+    wd = (np.arange(T) + first_day.weekday()) % SAISON
+    future_wd = (np.arange(T, T + horizont) + first_day.weekday()) % SAISON
+
+    # Modell 1: ses
+    a1, l1, sse1 = ses_fit(Y)
+
+    # Modell 2: ses auf wochentagsbereinigten Werten; Fehler auf der Originalskala vergleichen
+    f = weekday_factors(Y, first_day)
+    a2, l2, _ = ses_fit(Y / f[:, wd])
+    sse2 = _sse_original_scale(Y, f, wd, a2)
+
+    # Wochentagsfaktoren kosten 6 zusätzliche Parameter → Vergleich per AIC statt reinem SSE
+    aic1 = T * np.log(sse1 / T + 1e-9) + 2 * 1
+    aic2 = T * np.log(sse2 / T + 1e-9) + 2 * (1 + SAISON - 1)
+    use_week = aic2 < aic1
+    prognose = np.where(use_week[:, None], l2[:, None] * f[:, future_wd], np.repeat(l1[:, None], horizont, 1))
+    return {
+        "prognose": np.maximum(prognose, 0.0),
+        "modell": use_week.astype(int),
+        "alpha": np.where(use_week, a2, a1),
+    }
+
+
+def _sse_original_scale(Y: np.ndarray, f: np.ndarray, wd: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """SSE der 1-Schritt-Prognose des Wochentagsmodells (je Artikel eigenes alpha)."""
+    cols = np.arange(Y.shape[0])
+    D = Y / f[:, wd]
+    level = D[:, 0].copy()
+    sse = np.zeros(Y.shape[0])
+    for t in range(1, Y.shape[1]):
+        err = Y[:, t] - level * f[cols, wd[t]]
+        sse += err * err
+        level += alpha * (D[:, t] - level)
+    return sse
+
+
+def store_forecast(cur, ids: np.ndarray, start: date, result: Dict[str, np.ndarray], stand: date) -> int:
+    """
+    Prognosen ab start schreiben. Die Tabelle enthält danach nur diesen Lauf (ein Stand) – ältere Läufe
+    würden sonst liegen bleiben und MIN(datum) im Bericht über alle Läufe spannen.
+    Gibt die Anzahl Zeilen zurück.
+    """
+    prog = result["prognose"]
+    now = datetime.now()
+    tage = [start + timedelta(days=h) for h in range(prog.shape[1])]
+    rows = [
+        (int(a), tage[h], round(float(prog[i, h]), 3), MODELLE[result["modell"][i]],
+         round(float(result["alpha"][i]), 3), stand, now)
+        for i, a in enumerate(ids) for h in range(prog.shape[1])
+    ]
+    cur.execute("DELETE FROM artikel_prognose")      # kein TRUNCATE: bleibt Teil der Transaktion
+    sql = ("INSERT INTO artikel_prognose (artikelID, datum, menge, modell, alpha, stand, erstellt_am) "
+           "VALUES (%s, %s, %s, %s, %s, %s, %s)")
+    for i in range(0, len(rows), BATCH):
+        cur.executemany(sql, rows[i:i + BATCH])
+    return len(rows)
+
+
+def run_forecast(conn, bis: date, tage: int = FENSTER_TAGE, horizont: int = HORIZONT_TAGE) -> Dict[str, float]:
+    """Laden → anpassen → speichern (eine Transaktion). Gibt Zeiten und Anzahlen zurück."""
+    von = bis - timedelta(days=tage - 1)
+    with conn.cursor() as cur:
+        ensure_forecast_table(cur)
+        t0 = time.perf_counter()
+        ids, _, Y = load_daily_matrix(cur, von, bis)
+        t1 = time.perf_counter()
+        result = fit_and_forecast(Y, von, horizont)
+        t2 = time.perf_counter()
+        n_rows = store_forecast(cur, ids, bis + timedelta(days=1), result, bis)
+        t3 = time.perf_counter()
+    conn.commit()
+    return {
+        "artikel": len(ids), "zeilen": n_rows,
+        "laden_s": t1 - t0, "fit_s": t2 - t1, "speichern_s": t3 - t2,
+        "ses_week": int(result["modell"].sum()),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Absatzprognose für alle Artikel berechnen.")
+    p.add_argument("--bis", type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                   help="letzter Tag mit Ist-Werten (Standard: gestern); Prognose ab dem Folgetag")
+    p.add_argument("--tage", type=int, default=FENSTER_TAGE, help="Verlauf in Tagen")
+    p.add_argument("--horizont", type=int, default=HORIZONT_TAGE, help="Prognose für N Tage")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.tage < 2 * SAISON or args.horizont < 1:
+        print(f"--tage muss ≥ {2 * SAISON} und --horizont ≥ 1 sein.")
+        return
+
+    conn = get_conn()
+    if not conn:
+        print("Keine Verbindung zur Datenbank")
+        return
+    try:
+        r = run_forecast(conn, args.bis, args.tage, args.horizont)
+        print(f"• Prognose: {r['artikel']} Artikel × {args.horizont} Tage = {r['zeilen']} Zeilen "
+              f"(Wochentagsmodell bei {r['ses_week']} Artikeln)")
+        print(f"  laden {r['laden_s']:.2f} s · fit {r['fit_s']:.2f} s · speichern {r['speichern_s']:.2f} s")
+    except Exception as e:
+        conn.rollback()
+        print(f"Fehler, Transaktion abgebrochen: {e}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
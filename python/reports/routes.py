@@ -1,15 +1,19 @@
 #   Reports-Modul
 # Dieses Modul enthält alle Routen (Seiten) für Berichte unter /reports/…
 
+from datetime import date, timedelta
 from flask import Blueprint, render_template, request
 from flask_login import login_required
+from ..analytics import get_report_conn, source_note
 from ..db import get_conn
+from ..dialect import table_exists
 from .service import (
     f_group_expr,     # baut SQL-Ausdruck für Gruppierung nach Tag/Monat/Jahr/Quartal
     f_labels_for,     # wandelt ausgewählte IDs in kurze Namenliste für "Gefiltert → …"
     f_build_where_sql,# baut WHERE-Teil + Parameter je nach Filtern und Zeitraum
     f_get_period,     # liest von/bis aus URL oder nimmt Standard (z. B. letzte 30 Tage)
-    f_get_filters     # liest Listen von ausgewählten IDs (kunden, artikel, kundentypen)
+    f_get_filters,    # liest Listen von ausgewählten IDs (kunden, artikel, kundentypen)
+    f_chart_rows      # weniger Punkte fürs Diagramm bei langen Zeitreihen (LTTB), Tabelle bleibt vollständig
 )
 import re
 
@@ -37,7 +41,7 @@ def report_daily():
 
     rows, totals = [], {}
     #  Verbindung zur Datenbank holen
-    conn = get_conn()
+    conn = get_report_conn("daily")
     if conn:
         with conn.cursor() as cur:
             #  Stammdaten (Listen) laden, damit die Filter-Dropdowns in der UI
@@ -126,19 +130,25 @@ def report_daily():
     if kunden_txt:    parts.append(f"Kunde: {kunden_txt}")
     if kundentyp_txt: parts.append(f"Kundentyp: {kundentyp_txt}")
     if artikel_txt:   parts.append(f"Artikel: {artikel_txt}")
+    quelle_txt = source_note(conn)  # Berichte aus dem Analyse-Export (analytics.py): Stand anzeigen
+    if quelle_txt:    parts.append(quelle_txt)
     filter_line = "Gefiltert → " + " · ".join(parts)
 
+    # Diagramm: bei langen Zeiträumen nur die formgebenden Punkte (nach Umsatz), Tabelle/Summen aus allen Zeilen
+    chart_rows, chart_note = f_chart_rows(rows, 4)
+
     # HTML-Template mit Daten füllen
     return render_template(
         "reports_daily.html",
         title=f"Umsatz pro {grp}",
         rows=rows, totals=totals,
+        chart_rows=chart_rows, chart_note=chart_note, roh=request.args.get("roh") == "1",
         von=von, bis=bis, grp=grp,
         kunden_list=locals().get("kunden_list", []),
         artikel_list=locals().get("artikel_list", []),
         kundentyp_list=locals().get("kundentyp_list", []),
         kunden_sel=kunden_sel, artikel_sel=artikel_sel, kundentyp_sel=kundentyp_sel,
-        filter_line=filter_line,
+        filter_line=filter_line, quelle_txt=quelle_txt,
     )
 
 
@@ -168,7 +178,7 @@ def report_customers():
     top_n = max(5, min(top_n, 100))
 
     rows, totals = [], {}
-    conn = get_conn()
+    conn = get_report_conn("customers")
     if conn:
         with conn.cursor() as cur:
             # Stammlisten (für Filter in der UI)
@@ -256,6 +266,8 @@ def report_customers():
     if kunden_txt:    parts.append(f"Kunde: {kunden_txt}")
     if kundentyp_txt: parts.append(f"Kundentyp: {kundentyp_txt}")
     if artikel_txt:   parts.append(f"Artikel: {artikel_txt}")
+    quelle_txt = source_note(conn)  # Berichte aus dem Analyse-Export (analytics.py): Stand anzeigen
+    if quelle_txt:    parts.append(quelle_txt)
     filter_line = "Gefiltert → " + " · ".join(parts)
 
     return render_template(
@@ -297,7 +309,7 @@ def report_articles():
     rows, totals = [], {}
     ts_mode_msg = None  # Hinweistext, falls Zeitreihe ohne Einzelwahl versucht wird
 
-    conn = get_conn()
+    conn = get_report_conn("articles")
     if conn:
         with conn.cursor() as cur:
             # Stammlisten
@@ -388,12 +400,18 @@ def report_articles():
     if artikel_txt:   parts.append(f"Artikel: {artikel_txt}")
     if kunden_txt:    parts.append(f"Kunde: {kunden_txt}")
     if kundentyp_txt: parts.append(f"Kundentyp: {kundentyp_txt}")
+    quelle_txt = source_note(conn)  # Berichte aus dem Analyse-Export (analytics.py): Stand anzeigen
+    if quelle_txt:    parts.append(quelle_txt)
     filter_line = "Gefiltert → " + " · ".join(parts)
 
+    # Zeitreihe: Diagramm ggf. mit weniger Punkten (Top-Artikel haben höchstens 100 Zeilen)
+    chart_rows, chart_note = f_chart_rows(rows, 3) if grp != "items" else (rows, None)
+
     return render_template(
         "reports_articles.html",
         title="Umsatz pro Artikel",
         rows=rows, totals=totals,
+        chart_rows=chart_rows, chart_note=chart_note, roh=request.args.get("roh") == "1",
         von=von, bis=bis, top_n=top_n, grp=grp,
         artikel_list=locals().get("artikel_list", []),
         kunden_list=locals().get("kunden_list", []),
@@ -404,35 +422,51 @@ def report_articles():
 
 
 # Lagerwarnung (niedriger Bestand)
-# URL: /reports/stock_low?limit=3000
+# URL: /reports/stock_low            → Schwelle = Meldebestand je Artikel (artikel_dispo)
+#      /reports/stock_low?limit=3000 → feste Schwelle für alle Artikel
+# Meldebestände berechnet der nächtliche Job generators/reorder_points.py.
+STOCK_LOW_DEFAULT = 3000  # Artikel ohne berechneten Meldebestand (oder Meldebestand 0 = keine Nachfrage)
+
+# Ersatz für artikel_dispo, solange sql/artikel_dispo.sql nicht eingespielt ist → alle Artikel mit fester Schwelle
+DISPO_LEER = """(SELECT NULL AS artikelID, NULL AS meldebestand, NULL AS sicherheitsbestand,
+                    NULL AS bestellmenge, NULL AS nachfrage_tag) d ON 1 = 0"""
+
 @reports_bp.get("/stock_low")
 @login_required
 def report_stock_low():
-    # Schwellwert aus Parametern (Fallback 3000)
-    threshold = request.args.get("limit", "3000")
+    # Feste Schwelle nur, wenn ?limit=… angegeben ist
+    threshold = request.args.get("limit", "").strip()
     try:
-        threshold = int(threshold)
+        threshold = int(threshold) if threshold else None
     except ValueError:
-        threshold = 3000
+        threshold = None
 
     rows = []
     conn = get_conn()
     if conn:
         with conn.cursor() as cur:
-            # Einfache Liste: alle Artikel unterhalb der Schwelle
+            # Ein Durchlauf über artikel + Primärschlüssel-Zugriff auf artikel_dispo
+            # v_artikel_bestand: Hot-Artikel mit Puffern der Streifen (optional, sql/artikel_hot.sql)
+            bestand = "v_artikel_bestand" if table_exists(cur, "v_artikel_bestand") else "artikel"
+            dispo = ("artikel_dispo d ON d.artikelID = a.artikelID"
+                     if table_exists(cur, "artikel_dispo") else DISPO_LEER)
             cur.execute(
-                """
+                f"""
                 SELECT
-                  artikelID,
-                  produktname AS artikel,
-                  lagerbestand,
-                  %s AS schwelle,
-                  lagerbestand - %s AS differenz
-                FROM artikel
-                WHERE lagerbestand < %s
-                ORDER BY lagerbestand ASC
+                  a.artikelID,
+                  a.produktname AS artikel,
+                  a.lagerbestand,
+                  COALESCE(%s, NULLIF(d.meldebestand, 0), %s) AS schwelle,
+                  a.lagerbestand - COALESCE(%s, NULLIF(d.meldebestand, 0), %s) AS differenz,
+                  d.sicherheitsbestand,
+                  d.bestellmenge,
+                  d.nachfrage_tag
+                FROM {bestand} a
+                LEFT JOIN {dispo}
+                WHERE a.lagerbestand < COALESCE(%s, NULLIF(d.meldebestand, 0), %s)
+                ORDER BY differenz ASC
                 """,
-                (threshold, threshold, threshold)
+                (threshold, STOCK_LOW_DEFAULT) * 3
             )
             rows = cur.fetchall()
         conn.close()
@@ -440,7 +474,95 @@ def report_stock_low():
     return render_template(
         "reports_stock_low.html",
         title="Lagerwarnung / Artikel mit niedrigem Bestand",
-        rows=rows, threshold=threshold
+        rows=rows, threshold=threshold, default_threshold=STOCK_LOW_DEFAULT
+    )
+
+
+# Absatzprognose gegen Ist-Werte
+# URL: /reports/forecast?artikel=ID&vorlauf=60
+# Prognosen berechnet reports/forecast.py (Batch für alle Artikel) → Tabelle artikel_prognose.
+@reports_bp.get("/forecast")
+@login_required
+def report_forecast():
+    artikel_id = request.args.get("artikel", "").strip()
+    artikel_id = int(artikel_id) if artikel_id.isdigit() else None
+    try:
+        vorlauf = max(7, min(365, int(request.args.get("vorlauf", "60"))))
+    except ValueError:
+        vorlauf = 60
+
+    stand, prog_von, prog_bis = None, None, None
+    series, rows, artikel_list = [], [], []
+    conn = get_conn()
+    if conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT artikelID, produktname FROM artikel ORDER BY produktname")
+            artikel_list = cur.fetchall()
+
+            # ohne sql/artikel_prognose.sql bzw. vor dem ersten Lauf von forecast.py: Hinweis statt Fehler
+            if table_exists(cur, "artikel_prognose"):
+                cur.execute("SELECT MAX(stand), MIN(datum), MAX(datum) FROM artikel_prognose")
+                stand, prog_von, prog_bis = cur.fetchone()
+
+            if stand:
+                von = stand - timedelta(days=vorlauf - 1)
+                art_sql = " AND artikelID = %s" if artikel_id else ""
+                art_par = [artikel_id] if artikel_id else []
+
+                # Ist-Werte je Tag (Verlauf + Prognosezeitraum, soweit schon vorhanden)
+                cur.execute(f"""
+                    SELECT DATE(verkaufsdatum) AS tag, SUM(menge)
+                    FROM v_sales
+                    WHERE verkaufsdatum >= %s AND verkaufsdatum < %s{art_sql}
+                    GROUP BY DATE(verkaufsdatum)
+                """, [von, prog_bis + timedelta(days=1), *art_par])
+                ist = {r[0]: float(r[1] or 0) for r in cur.fetchall()}
+
+                # Prognose je Tag
+                cur.execute(f"""
+                    SELECT datum, SUM(menge)
+                    FROM artikel_prognose
+                    WHERE datum >= %s{art_sql}
+                    GROUP BY datum
+                """, [prog_von, *art_par])
+                prog = {r[0]: float(r[1] or 0) for r in cur.fetchall()}
+
+                today = date.today()
+                d = von
+                while d <= prog_bis:
+                    series.append({
+                        "tag": d.isoformat(),
+                        "ist": ist.get(d, 0.0) if d <= min(today, prog_bis) else None,
+                        "prognose": prog.get(d),
+                    })
+                    d += timedelta(days=1)
+
+                # Tabelle: Prognose vs. Ist im Prognosezeitraum je Artikel (WAPE = Σ|Fehler| / Σ Ist)
+                cur.execute(f"""
+                    SELECT p.artikelID, a.produktname, MAX(p.modell), MAX(p.alpha),
+                           SUM(p.menge), SUM(COALESCE(i.menge, 0)),
+                           SUM(ABS(p.menge - COALESCE(i.menge, 0)))
+                    FROM artikel_prognose p
+                    JOIN artikel a ON a.artikelID = p.artikelID
+                    LEFT JOIN (
+                        SELECT artikelID, DATE(verkaufsdatum) AS tag, SUM(menge) AS menge
+                        FROM v_sales
+                        WHERE verkaufsdatum >= %s AND verkaufsdatum < %s
+                        GROUP BY artikelID, DATE(verkaufsdatum)
+                    ) i ON i.artikelID = p.artikelID AND i.tag = p.datum
+                    WHERE p.datum <= %s{" AND p.artikelID = %s" if artikel_id else ""}
+                    GROUP BY p.artikelID, a.produktname
+                    ORDER BY SUM(p.menge) DESC
+                    LIMIT 100
+                """, [prog_von, prog_bis + timedelta(days=1), min(today, prog_bis), *art_par])
+                rows = cur.fetchall()
+        conn.close()
+
+    return render_template(
+        "reports_forecast.html",
+        title="Absatzprognose",
+        series=series, rows=rows, stand=stand, prog_von=prog_von, prog_bis=prog_bis,
+        artikel_list=artikel_list, artikel_id=artikel_id, vorlauf=vorlauf,
     )
 
 
@@ -576,7 +698,7 @@ def report_pareto():
     sql = sql.format(order_col=order_col)
 
     rows = []
-    conn = get_conn()
+    conn = get_report_conn("pareto")
     if conn:
         with conn.cursor() as cur:
             cur.execute(sql, (von, bis))
@@ -1,19 +1,14 @@
 from datetime import date, timedelta
 from flask import request
+from ..dialect import group_expr
+from .downsample import downsample_rows, target_points
 
 # Gibt einen SQL-Ausdruck für die Gruppierung nach Datum zurück.
 #    grp: 'day' | 'month' | 'year'
 #    column: Spaltenname (z. B. 'verkaufsdatum')
+#    Der Ausdruck selbst hängt von der Datenbank ab (MySQL oder SQLite) → dialect.py
 def f_group_expr(grp: str, column: str) -> str:
-    grp = (grp or "day").lower()
-    if grp == "month":
-        return f"DATE_FORMAT({column}, '%%Y-%%m')"  # Beispiel: 2025-11
-    elif grp == "quarter":
-        return f"CONCAT(YEAR({column}), '-Q', QUARTER({column}))" #  YYYY-Qn: 2025-Q4)
-    elif grp == "year":
-        return f"DATE_FORMAT({column}, '%%Y')"      # Beispiel: 2025
-    else:
-        return f"DATE({column})"                    # Beispiel: 2025-11-01
+    return group_expr(grp, column)
 
 
 # Erstellt eine kurze Textliste der ausgewählten Elemente.
@@ -91,3 +86,19 @@ def f_get_filters(include=("kunden", "artikel", "kundentypen")):
         result.append(request.args.getlist("kundentypen"))
     return tuple(result)
 
+
+# Zeilen für das Diagramm (LTTB, siehe downsample.py) – die Tabelle bekommt weiter alle Zeilen.
+#    URL-Parameter: w = Diagrammbreite in Pixeln (schickt das Formular mit), roh=1 = alle Punkte.
+#    value_index: Spalte, deren Verlauf erhalten bleiben soll (Umsatz).
+#    Gibt (zeilen, hinweis) zurück; hinweis = None, wenn nichts weggelassen wurde.
+def f_chart_rows(rows, value_index: int):
+    if request.args.get("roh") == "1":
+        return rows, None
+    try:
+        width = int(request.args.get("w", ""))
+    except ValueError:
+        width = None
+    chart = downsample_rows(rows, value_index, target_points(width))
+    if len(chart) == len(rows):
+        return rows, None
+    return chart, f"Diagramm: {len(chart)} von {len(rows)} Punkten (Form erhalten, Tabelle vollständig)"
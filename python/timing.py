@@ -0,0 +1,167 @@
+"""
+Zeitmessung pro Anfrage: wohin geht die Zeit einer langsamen Seite?
+
+Phasen (Millisekunden):
+    connect  Verbindungsaufbau (get_conn / get_report_conn)
+    sql      Abfragen inkl. Abholen der Zeilen (Hooks in db.py bzw. analytics.py)
+    render   Jinja-Template (render_template)
+    app      der Rest: Python im View (Summen, Pareto-Schleifen …), Flask, Login
+    total    ganze Anfrage
+
+Ausgabe:
+  • Header Server-Timing → im Browser unter Entwicklertools → Netzwerk → Timing sichtbar (nur für angemeldete Benutzer)
+  • Anfragen über SLOW_REQUEST_MS (Standard 500) → eine JSON-Zeile in SLOW_REQUEST_LOG
+    (Standard logs/slow_requests.jsonl) mit Pfad, Parametern, Benutzer, Phasen und den langsamsten Abfragen
+
+Einstellungen: SERVER_TIMING=angemeldet (Standard: Header nur für angemeldete Benutzer – Zeiten von
+Login-Seite oder /health verraten sonst Fremden etwas über Datenbank und Last), alle, 0 (nie).
+Einbinden: init_timing(app) in dashboard.py.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from flask_login import current_user
+
+from .db import add_timing_hook
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+SLOW_LOG = Path(os.getenv("SLOW_REQUEST_LOG") or Path(__file__).resolve().parents[1] / "logs" / "slow_requests.jsonl")
+SERVER_TIMING = (os.getenv("SERVER_TIMING") or "angemeldet").strip().lower()
+TOP_SQL = 3                 # so viele langsamste Abfragen im Log
+SQL_CHARS = 300             # Abfragen im Log kürzen
+MAX_STATEMENTS = 500        # mehr Abfragen pro Anfrage → nur noch in der Summe
+
+_log_lock = threading.Lock()
+
+
+class RequestTiming:
+    """Messwerte einer Anfrage (liegt in flask.g, nur der eigene Thread schreibt hinein)."""
+
+    __slots__ = ("start", "connect", "sql", "render", "queries", "_statements", "_render_start")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.connect = self.sql = self.render = 0.0
+        self.queries = 0
+        self._statements = []               # [[sekunden, sql], …] für die langsamsten Abfragen
+        self._render_start = None
+
+    def add(self, phase: str, seconds: float, sql=None) -> None:
+        if phase != "sql":                  # connect / connect_error
+            self.connect += seconds
+            return
+        self.sql += seconds
+        if sql is None:
+            # Abholen der Zeilen (SQLite/DuckDB rechnen dabei weiter) → zur letzten Abfrage zählen
+            if self._statements:
+                self._statements[-1][0] += seconds
+            return
+        self.queries += 1
+        if len(self._statements) < MAX_STATEMENTS:
+            self._statements.append([seconds, sql])
+
+    def slowest(self, n: int = TOP_SQL) -> list:
+        return sorted(self._statements, key=lambda x: -x[0])[:n]
+
+    def phases_ms(self) -> dict:
+        total = (time.perf_counter() - self.start) * 1000
+        phases = {"connect": self.connect * 1000, "sql": self.sql * 1000, "render": self.render * 1000}
+        phases["app"] = max(total - sum(phases.values()), 0.0)
+        phases["total"] = total
+        return {k: round(v, 1) for k, v in phases.items()}
+
+
+def _current():
+    return g.get("_timing") if has_request_context() else None
+
+
+def _on_db(phase: str, seconds: float, sql=None) -> None:
+    timing = _current()                     # Schreib-Thread, Generatoren … → keine Anfrage, nichts messen
+    if timing is not None:
+        timing.add(phase, seconds, sql)
+
+
+def _on_before_render(sender, template, context, **extra):
+    timing = _current()
+    if timing is not None:
+        timing._render_start = time.perf_counter()
+
+
+def _on_rendered(sender, template, context, **extra):
+    timing = _current()
+    if timing is not None and timing._render_start is not None:
+        timing.render += time.perf_counter() - timing._render_start
+        timing._render_start = None
+
+
+def server_timing_header(phases: dict, queries: int) -> str:
+    """Server-Timing: connect;dur=1.2, sql;dur=40.1;desc="7 Abfragen", …"""
+    parts = []
+    for name, ms in phases.items():
+        desc = f';desc="{queries} Abfragen"' if name == "sql" else ""
+        parts.append(f"{name};dur={ms}{desc}")
+    return ", ".join(parts)
+
+
+def _sql_text(sql) -> str:
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    return " ".join(str(sql).split())[:SQL_CHARS]
+
+
+def log_slow_request(record: dict) -> None:
+    """Eine JSON-Zeile anhängen (Lock: mehrere Threads schreiben in dieselbe Datei)."""
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _log_lock:
+        SLOW_LOG.parent.mkdir(parents=True, exist_ok=True)
+        with SLOW_LOG.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def _send_server_timing() -> bool:
+    if SERVER_TIMING in ("0", "off", "aus", "nie"):
+        return False
+    if SERVER_TIMING in ("1", "alle", "all"):
+        return True
+    return bool(current_user and current_user.is_authenticated)
+
+
+def _before_request():
+    g._timing = RequestTiming()
+
+
+def _after_request(response):
+    timing = _current()
+    if timing is None:
+        return response
+    phases = timing.phases_ms()
+    if _send_server_timing():
+        response.headers["Server-Timing"] = server_timing_header(phases, timing.queries)
+    if phases["total"] >= SLOW_REQUEST_MS:
+        log_slow_request({
+            "zeit": datetime.now().isoformat(" ", "seconds"),
+            "methode": request.method,
+            "pfad": request.path,
+            "parameter": request.args.to_dict(flat=False),
+            "status": response.status_code,
+            "benutzer": current_user.get_id() if current_user and current_user.is_authenticated else None,
+            "ms": phases,
+            "abfragen": timing.queries,
+            "langsamste_sql": [{"ms": round(s * 1000, 1), "sql": _sql_text(q)} for s, q in timing.slowest()],
+        })
+    return response
+
+
+def init_timing(app) -> None:
+    """Messung für alle Anfragen der App einschalten."""
+    add_timing_hook(_on_db)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_on_before_render, app, weak=False)
+    template_rendered.connect(_on_rendered, app, weak=False)
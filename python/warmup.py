@@ -0,0 +1,175 @@
+"""
+Aufwärmen eines Worker-Prozesses, bevor echte Anfragen kommen (gunicorn/waitress).
+
+Ohne Aufwärmen zahlt die erste Anfrage jedes Workers: erster Verbindungsaufbau (Host/Port suchen),
+Stammdaten-Cache laden, Jinja-Templates übersetzen, späte Importe, kalte Datenbank-Caches für die
+üblichen Zeiträume. warm_up(app) erledigt das einmal:
+    1) Verbindung zur Datenbank öffnen und prüfen
+    2) Stammdaten-Cache füllen (masterdata.py)
+    3) alle Templates übersetzen
+    4) jede Berichtsseite einmal mit den üblichen Zeiträumen aufrufen (WARMUP_PAGES, ohne Login)
+
+WARMUP (Umgebungsvariable bzw. create_app(warmup=…)):
+    background  Standard: im Hintergrund-Thread jedes Workers, Anfragen werden sofort angenommen
+    preload     sofort in create_app (gunicorn --preload: einmal im Master, die Worker erben das Ergebnis)
+    off         nicht aufwärmen (Entwicklung, Benchmarks); ebenso 0/false bzw. create_app(warmup=False)
+
+GET /ready → 200, sobald das Aufwärmen fertig ist (sonst 503) – für Load-Balancer/Kubernetes.
+/health bleibt unabhängig davon 200 („Prozess lebt“).
+"""
+
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Dict, Optional, Union
+
+from flask import jsonify
+
+from . import analytics
+from .db import get_conn
+from .masterdata import masterdata
+
+# (Endpunkt, URL-Parameter, Tage zurück) – die Zeiträume, die im Alltag am häufigsten aufgerufen werden;
+# Tage = None → Standardzeitraum der Seite
+WARMUP_PAGES = (
+    ("reports.report_daily", {}, None),                     # letzte 30 Tage, pro Tag
+    ("reports.report_daily", {"grp": "month"}, 365),        # letztes Jahr, pro Monat
+    ("reports.report_customers", {}, None),
+    ("reports.report_articles", {}, None),
+    ("reports.report_pareto", {}, None),
+    ("reports.report_turnover", {}, None),
+    ("reports.report_stock_low", {}, None),
+)
+
+_lock = threading.Lock()
+
+
+class WarmupState:
+    """Stand des Aufwärmens in diesem Prozess (nach fork gilt der Stand des Masters weiter)."""
+
+    def __init__(self):
+        self.ready = False
+        self.fehler: Optional[str] = None
+        self.schritte: Dict[str, float] = {}      # Schritt → Millisekunden
+        self.thread: Optional[threading.Thread] = None
+        self.pid: Optional[int] = None             # Prozess, in dem der Thread gestartet wurde
+
+
+MODES = ("background", "preload", "off")
+_OFF = ("0", "off", "no", "false", "aus")
+
+
+def mode(value: Union[str, bool, None] = None) -> str:
+    """
+    Modus aus create_app(warmup=…) bzw. WARMUP. False/0 → off, True → background (Standard);
+    andere Werte als MODES → ValueError (kein stilles background bei Tippfehlern).
+    """
+    if value is None:
+        value = os.getenv("WARMUP") or "background"
+    if isinstance(value, (bool, int)):
+        return "background" if value else "off"
+    value = value.strip().lower()
+    if value in _OFF:
+        return "off"
+    if value not in MODES:
+        raise ValueError(f"Unbekannter WARMUP-Modus: {value!r} – erlaubt: {', '.join(MODES)}")
+    return value
+
+
+def _step(state: WarmupState, name: str, fn) -> None:
+    t0 = time.perf_counter()
+    fn()
+    state.schritte[name] = round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _check_db() -> None:
+    conn = get_conn()
+    if not conn:
+        raise RuntimeError("Keine Verbindung zur Datenbank")
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            cur.fetchone()
+    finally:
+        conn.close()
+
+
+def _compile_templates(app) -> None:
+    for name in app.jinja_env.list_templates():
+        if name.endswith(".html"):
+            app.jinja_env.get_template(name)        # landet im Template-Cache der App
+
+
+def _render_pages(app) -> None:
+    """Berichtsseiten direkt aufrufen (ohne login_required-Hülle, kein HTTP, keine Sitzung)."""
+    urls = app.url_map.bind("localhost")
+    for endpoint, params, days in WARMUP_PAGES:
+        view = app.view_functions.get(endpoint)
+        if view is None:
+            continue
+        view = getattr(view, "__wrapped__", view)
+        if days is not None:
+            params = dict(params, von=(date.today() - timedelta(days=days)).isoformat())
+        with app.test_request_context(urls.build(endpoint), query_string=params):
+            try:
+                view()
+            except Exception as e:           # eine kaputte Seite soll die anderen nicht aufhalten
+                print(f"⚠️  Aufwärmen {endpoint}: {type(e).__name__}: {e}")
+
+
+def warm_up(app, state: WarmupState) -> None:
+    """Alle Schritte nacheinander; ohne Datenbank oder Stammdaten wird abgebrochen (/ready bleibt 503)."""
+    try:
+        _step(state, "db", _check_db)
+        _step(state, "stammdaten", masterdata.get)
+        _step(state, "templates", lambda: _compile_templates(app))
+        _step(state, "berichte", lambda: _render_pages(app))
+    except Exception as e:
+        state.fehler = f"{type(e).__name__}: {e}"
+        print(f"⚠️  Aufwärmen fehlgeschlagen: {state.fehler}")
+        return
+    state.fehler = None
+    state.ready = True
+    print(f"• Aufgewärmt: {state.schritte}")
+
+
+def start_background(app, state: WarmupState) -> None:
+    """Aufwärmen im Hintergrund starten (nur einmal gleichzeitig; nach fork neu, weil der Thread fehlt)."""
+    with _lock:
+        if state.ready or (state.thread is not None and state.thread.is_alive()):
+            return
+        state.pid = os.getpid()
+        state.thread = threading.Thread(target=warm_up, args=(app, state), name="newshop-warmup", daemon=True)
+        state.thread.start()
+
+
+def init_warmup(app, warmup: Union[str, bool, None] = None) -> WarmupState:
+    """GET /ready anlegen und je nach Modus aufwärmen."""
+    state = WarmupState()
+    app.extensions["newshop_warmup"] = state
+    selected = mode(warmup)
+
+    if selected == "off":
+        state.ready = True
+    elif selected == "preload":
+        warm_up(app, state)
+        analytics.close_database()           # DuckDB ist nicht fork-sicher → jeder Worker öffnet neu
+    else:
+        start_background(app, state)
+
+        @app.before_request
+        def _warmup_after_fork():
+            # gunicorn --preload mit background: der Thread des Masters fehlt im Worker
+            if not state.ready and state.pid != os.getpid():
+                start_background(app, state)
+
+    def ready():
+        if state.ready:
+            return jsonify({"status": "ready", "ms": state.schritte})
+        if selected != "off":
+            start_background(app, state)     # fehlgeschlagen oder nach fork → neuer Versuch
+        return jsonify({"status": "warming", "fehler": state.fehler, "ms": state.schritte}), 503
+
+    app.add_url_rule("/ready", "ready", ready, methods=["GET"])
+    return state
@@ -0,0 +1,20 @@
+USE newshopdb;
+
+-- Dispositionswerte pro Artikel (Meldebestand, Sicherheitsbestand, Bestellmenge)
+-- Wird nächtlich von python/generators/reorder_points.py neu berechnet.
+-- /reports/stock_low und purchase.py lesen nur diese Tabelle (kein Verkaufsverlauf zur Laufzeit).
+CREATE TABLE IF NOT EXISTS artikel_dispo (
+  artikelID INT PRIMARY KEY,
+  nachfrage_tag DECIMAL(12,3) NOT NULL,     -- mittlere Verkaufsmenge pro Tag im Fenster
+  nachfrage_std DECIMAL(12,3) NOT NULL,     -- Standardabweichung der Tagesmenge (Tage ohne Verkauf = 0)
+  fenster_tage INT NOT NULL,                -- Länge des Fensters (Tage)
+  lieferzeit_tage INT NOT NULL,             -- angenommene Wiederbeschaffungszeit
+  servicegrad DECIMAL(5,4) NOT NULL,        -- z. B. 0.9500
+  sicherheitsbestand INT NOT NULL,          -- z × std × √Lieferzeit
+  meldebestand INT NOT NULL,                -- Nachfrage in der Lieferzeit + Sicherheitsbestand
+  bestellmenge INT NOT NULL,                -- Vorschlag: Nachfrage für die Reichweite
+  berechnet_am DATETIME NOT NULL
+);
+-- Kein Fremdschlüssel: der Job ersetzt den ganzen Inhalt, scale.py darf Artikel löschen.
+
+SELECT * FROM artikel_dispo;
@@ -0,0 +1,47 @@
+USE newshopdb;
+
+-- OPTIONAL – Hot-Artikel: Lagerbestand auf mehrere Teilzähler (Streifen) verteilen.
+-- Ohne Eintrag hier sperrt trg_verkaufartikel_bi bei jedem Verkauf die artikel-Zeile (FOR UPDATE);
+-- bei sehr häufig verkauften Artikeln warten dann alle Kassen aufeinander.
+--
+-- Für Artikel in artikel_hot gilt:
+--   artikel.lagerbestand            = zentraler Bestand (Einkäufe, Stornos, Korrekturen landen hier)
+--   artikel_lager_stripe.menge      = kleine Puffer, aus denen Verkäufe abbuchen
+--   tatsächlicher Bestand           = lagerbestand + Σ Streifen  → Sicht v_artikel_bestand
+-- Jede Verbindung bucht von Streifen CONNECTION_ID() MOD stripes; ist der Puffer leer, wird er
+-- aus dem zentralen Bestand nachgefüllt (Fehlmenge + nachfuellmenge). Verwaltet mit
+-- python/generators/hot_stock.py (enable / disable / flush / status).
+-- Wirkt erst mit dem Trigger aus sql/trigger_hot.sql (NACH dieser Datei einspielen, Einschränkungen dort);
+-- der Standard-Trigger aus sql/trigger.sql braucht diese Tabellen nicht.
+CREATE TABLE IF NOT EXISTS artikel_hot (
+  artikelID INT PRIMARY KEY,
+  stripes INT NOT NULL,                     -- Anzahl Teilzähler (2 … 64)
+  nachfuellmenge INT NOT NULL,              -- so viel wird beim Nachfüllen zusätzlich in den Streifen gelegt
+  aktiviert_am DATETIME NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS artikel_lager_stripe (
+  artikelID INT NOT NULL,
+  stripe INT NOT NULL,                      -- 0 … stripes-1
+  menge INT NOT NULL DEFAULT 0,
+  PRIMARY KEY (artikelID, stripe)
+);
+-- Kein Fremdschlüssel (wie artikel_dispo): scale.py darf Artikel löschen.
+
+-- Konsolidierter Bestand für Berichte: zentral + Puffer der Streifen
+CREATE OR REPLACE VIEW v_artikel_bestand AS
+SELECT
+  a.artikelID,
+  a.produktname,
+  a.lagerbestand + COALESCE(s.menge, 0) AS lagerbestand,
+  a.lagerbestand                        AS lager_zentral,
+  COALESCE(s.menge, 0)                  AS lager_stripes,
+  a.durchschnittskosten
+FROM artikel a
+LEFT JOIN (
+  SELECT artikelID, SUM(menge) AS menge
+  FROM artikel_lager_stripe
+  GROUP BY artikelID
+) s ON s.artikelID = a.artikelID;
+
+SELECT * FROM artikel_hot;
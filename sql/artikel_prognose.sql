@@ -0,0 +1,17 @@
+USE newshopdb;
+
+-- Absatzprognose pro Artikel und Tag
+-- Wird von python/reports/forecast.py geschrieben (alle Artikel auf einmal), Bericht: /reports/forecast
+CREATE TABLE IF NOT EXISTS artikel_prognose (
+  artikelID INT NOT NULL,
+  datum DATE NOT NULL,                    -- prognostizierter Tag
+  menge DECIMAL(12,3) NOT NULL,           -- erwartete Verkaufsmenge
+  modell VARCHAR(20) NOT NULL,            -- 'ses' oder 'ses_week' (mit Wochentagsfaktoren)
+  alpha DECIMAL(4,3) NOT NULL,            -- Glättungsfaktor
+  stand DATE NOT NULL,                    -- letzter Tag mit Ist-Werten beim Berechnen
+  erstellt_am DATETIME NOT NULL,
+  PRIMARY KEY (artikelID, datum),
+  INDEX idx_artikel_prognose_datum (datum)
+);
+
+SELECT * FROM artikel_prognose ORDER BY datum, artikelID;
@@ -0,0 +1,294 @@
+USE newshopdb;
+
+-- Änderungsprotokoll (Outbox) für nachgelagerte Verarbeitung.
+-- Jede Einfüge-/Änderungs-/Löschoperation auf verkauf, verkaufartikel, einkauf, einkaufartikel,
+-- artikel und artikelpreis schreibt per Trigger eine Zeile in changelog – in DERSELBEN Transaktion:
+-- Rollback → auch kein Protokolleintrag. Konsumenten (python/changelog.py) lesen ab ihrem Stand in
+-- changelog_offset weiter und arbeiten nur die Änderungen ab, statt alles neu zu lesen.
+--
+-- op: I = insert, U = update, D = delete,
+--     R = "alles neu lesen": Bulk-Läufe (@newshop_bulk = 1, siehe sql/trigger.sql) protokollieren
+--         nicht zeilenweise, sondern tragen am Ende eine R-Zeile pro betroffener Tabelle ein.
+-- pk:        Primärschlüssel der geänderten Zeile
+-- artikelID: betroffener Artikel (verkaufartikel, einkaufartikel, artikel, artikelpreis)
+-- belegID:   verkaufID bzw. einkaufID (Köpfe und Positionen)
+--
+-- Mehrere Trigger pro Tabelle und Ereignis → MySQL ab 5.7.2 / MariaDB ab 10.2.3.
+-- Kein Fremdschlüssel (wie artikel_dispo): gelöschte Zeilen bleiben nachvollziehbar.
+CREATE TABLE IF NOT EXISTS changelog (
+  changeID BIGINT AUTO_INCREMENT PRIMARY KEY,
+  tabelle VARCHAR(32) NOT NULL,
+  op CHAR(1) NOT NULL,
+  pk INT NULL,
+  artikelID INT NULL,
+  belegID INT NULL,
+  geaendert_am TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+  KEY idx_changelog_zeit (geaendert_am)
+);
+
+-- Stand pro Konsument: alle Änderungen bis einschließlich letzte_id sind verarbeitet.
+CREATE TABLE IF NOT EXISTS changelog_offset (
+  consumer VARCHAR(64) PRIMARY KEY,
+  letzte_id BIGINT NOT NULL DEFAULT 0,
+  aktualisiert_am DATETIME NOT NULL
+);
+
+/*
+DROP TRIGGER IF EXISTS trg_cl_verkauf_ai;
+DROP TRIGGER IF EXISTS trg_cl_verkauf_au;
+DROP TRIGGER IF EXISTS trg_cl_verkauf_ad;
+DROP TRIGGER IF EXISTS trg_cl_verkaufartikel_ai;
+DROP TRIGGER IF EXISTS trg_cl_verkaufartikel_au;
+DROP TRIGGER IF EXISTS trg_cl_verkaufartikel_ad;
+DROP TRIGGER IF EXISTS trg_cl_einkauf_ai;
+DROP TRIGGER IF EXISTS trg_cl_einkauf_au;
+DROP TRIGGER IF EXISTS trg_cl_einkauf_ad;
+DROP TRIGGER IF EXISTS trg_cl_einkaufartikel_ai;
+DROP TRIGGER IF EXISTS trg_cl_einkaufartikel_au;
+DROP TRIGGER IF EXISTS trg_cl_einkaufartikel_ad;
+DROP TRIGGER IF EXISTS trg_cl_artikel_ai;
+DROP TRIGGER IF EXISTS trg_cl_artikel_au;
+DROP TRIGGER IF EXISTS trg_cl_artikel_ad;
+DROP TRIGGER IF EXISTS trg_cl_artikelpreis_ai;
+DROP TRIGGER IF EXISTS trg_cl_artikelpreis_au;
+DROP TRIGGER IF EXISTS trg_cl_artikelpreis_ad;
+*/
+
+DELIMITER $$
+
+-- verkauf
+
+CREATE TRIGGER trg_cl_verkauf_ai
+AFTER INSERT ON verkauf
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('verkauf', 'I', NEW.verkaufID, NULL, NEW.verkaufID);
+END $$
+
+CREATE TRIGGER trg_cl_verkauf_au
+AFTER UPDATE ON verkauf
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('verkauf', 'U', NEW.verkaufID, NULL, NEW.verkaufID);
+END $$
+
+CREATE TRIGGER trg_cl_verkauf_ad
+AFTER DELETE ON verkauf
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('verkauf', 'D', OLD.verkaufID, NULL, OLD.verkaufID);
+END $$
+
+-- verkaufartikel
+
+CREATE TRIGGER trg_cl_verkaufartikel_ai
+AFTER INSERT ON verkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('verkaufartikel', 'I', NEW.verkauf_artikelID, NEW.artikelID, NEW.verkaufID);
+END $$
+
+CREATE TRIGGER trg_cl_verkaufartikel_au
+AFTER UPDATE ON verkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('verkaufartikel', 'U', NEW.verkauf_artikelID, NEW.artikelID, NEW.verkaufID);
+  -- auf anderen Artikel/Beleg umgehängt → die alte Zuordnung ist auch betroffen
+  IF NOT (NEW.artikelID <=> OLD.artikelID AND NEW.verkaufID <=> OLD.verkaufID) THEN
+    INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+    VALUES ('verkaufartikel', 'U', OLD.verkauf_artikelID, OLD.artikelID, OLD.verkaufID);
+  END IF;
+END $$
+
+CREATE TRIGGER trg_cl_verkaufartikel_ad
+AFTER DELETE ON verkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('verkaufartikel', 'D', OLD.verkauf_artikelID, OLD.artikelID, OLD.verkaufID);
+END $$
+
+-- einkauf
+
+CREATE TRIGGER trg_cl_einkauf_ai
+AFTER INSERT ON einkauf
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('einkauf', 'I', NEW.einkaufID, NULL, NEW.einkaufID);
+END $$
+
+CREATE TRIGGER trg_cl_einkauf_au
+AFTER UPDATE ON einkauf
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('einkauf', 'U', NEW.einkaufID, NULL, NEW.einkaufID);
+END $$
+
+CREATE TRIGGER trg_cl_einkauf_ad
+AFTER DELETE ON einkauf
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('einkauf', 'D', OLD.einkaufID, NULL, OLD.einkaufID);
+END $$
+
+-- einkaufartikel
+
+CREATE TRIGGER trg_cl_einkaufartikel_ai
+AFTER INSERT ON einkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('einkaufartikel', 'I', NEW.einkauf_artikelID, NEW.artikelID, NEW.einkaufID);
+END $$
+
+CREATE TRIGGER trg_cl_einkaufartikel_au
+AFTER UPDATE ON einkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('einkaufartikel', 'U', NEW.einkauf_artikelID, NEW.artikelID, NEW.einkaufID);
+  -- auf anderen Artikel/Beleg umgehängt → die alte Zuordnung ist auch betroffen
+  IF NOT (NEW.artikelID <=> OLD.artikelID AND NEW.einkaufID <=> OLD.einkaufID) THEN
+    INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+    VALUES ('einkaufartikel', 'U', OLD.einkauf_artikelID, OLD.artikelID, OLD.einkaufID);
+  END IF;
+END $$
+
+CREATE TRIGGER trg_cl_einkaufartikel_ad
+AFTER DELETE ON einkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('einkaufartikel', 'D', OLD.einkauf_artikelID, OLD.artikelID, OLD.einkaufID);
+END $$
+
+-- artikel
+
+CREATE TRIGGER trg_cl_artikel_ai
+AFTER INSERT ON artikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('artikel', 'I', NEW.artikelID, NEW.artikelID, NULL);
+END $$
+
+CREATE TRIGGER trg_cl_artikel_au
+AFTER UPDATE ON artikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  -- nur echte Änderungen (UPDATE ohne geänderte Werte feuert den Trigger trotzdem)
+  IF NEW.produktname <=> OLD.produktname
+     AND NEW.lagerbestand <=> OLD.lagerbestand
+     AND NEW.durchschnittskosten <=> OLD.durchschnittskosten THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('artikel', 'U', NEW.artikelID, NEW.artikelID, NULL);
+END $$
+
+CREATE TRIGGER trg_cl_artikel_ad
+AFTER DELETE ON artikel
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('artikel', 'D', OLD.artikelID, OLD.artikelID, NULL);
+END $$
+
+-- artikelpreis
+
+CREATE TRIGGER trg_cl_artikelpreis_ai
+AFTER INSERT ON artikelpreis
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('artikelpreis', 'I', NEW.preisID, NEW.artikelID, NULL);
+END $$
+
+CREATE TRIGGER trg_cl_artikelpreis_au
+AFTER UPDATE ON artikelpreis
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('artikelpreis', 'U', NEW.preisID, NEW.artikelID, NULL);
+  -- auf anderen Artikel/Beleg umgehängt → die alte Zuordnung ist auch betroffen
+  IF NOT (NEW.artikelID <=> OLD.artikelID) THEN
+    INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+    VALUES ('artikelpreis', 'U', OLD.preisID, OLD.artikelID, NULL);
+  END IF;
+END $$
+
+CREATE TRIGGER trg_cl_artikelpreis_ad
+AFTER DELETE ON artikelpreis
+FOR EACH ROW
+trg: BEGIN
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+  INSERT INTO changelog (tabelle, op, pk, artikelID, belegID)
+  VALUES ('artikelpreis', 'D', OLD.preisID, OLD.artikelID, NULL);
+END $$
+
+DELIMITER ;
+
+SELECT tabelle, op, COUNT(*) AS anzahl, MAX(changeID) AS bis_id
+FROM changelog
+GROUP BY tabelle, op;
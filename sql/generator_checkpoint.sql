@@ -0,0 +1,15 @@
+USE newshopdb;
+
+-- Checkpoint für generate_history (--resume)
+-- Eine Zeile pro Job; wird zusammen mit jedem Verkaufstag in derselben Transaktion geschrieben.
+CREATE TABLE IF NOT EXISTS generator_checkpoint (
+  job VARCHAR(50) PRIMARY KEY,            -- z. B. 'generate_history'
+  letzter_tag DATE NOT NULL,              -- letzter vollständig gespeicherter Tag
+  tage_fertig INT NOT NULL,               -- Fortschritt: fertige Tage
+  tage_gesamt INT NOT NULL,               -- Fortschritt: alle Tage
+  rng_state LONGTEXT NOT NULL,            -- JSON: random.getstate()
+  zustand LONGTEXT NOT NULL,              -- JSON: Lauf-Optionen (seed, workers, …)
+  aktualisiert_am DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+SELECT * FROM generator_checkpoint;
@@ -0,0 +1,180 @@
+-- SQLite-Fassung von sql/create_tables.sql (+ index.sql, users.sql und den Zusatztabellen)
+-- für Tests und Benchmarks ohne MySQL-Server (DB_BACKEND=sqlite, siehe python/db.py).
+-- Anlegen: python -m python.db --init-sqlite
+--
+-- Unterschiede zu MySQL:
+--   INT AUTO_INCREMENT PRIMARY KEY → INTEGER PRIMARY KEY AUTOINCREMENT
+--   DECIMAL → REAL (sonst speichert SQLite 5.00 als ganze Zahl 5 und 5/100 ergibt 0);
+--     ROUND rundet dafür dezimal wie MySQL (python/db.py, _round_decimal) – mit dem eingebauten ROUND
+--     wird z. B. 3 × 0.95 = 2.8499999… zu 2.84 statt 2.85, v_sales weicht dann vom DECIMAL-Export ab
+--   ENUM → CHECK, DEFAULT CURRENT_TIMESTAMP → Ortszeit wie NOW() in MySQL
+-- Nicht enthalten: Hot-Artikel (artikel_hot.sql), changelog.sql – nur MySQL.
+
+CREATE TABLE kundentyp (
+  kundentypID INTEGER PRIMARY KEY AUTOINCREMENT,
+  bezeichnung VARCHAR(50) NOT NULL,
+  kundenrabatt REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE kunden (
+  kundenID INTEGER PRIMARY KEY AUTOINCREMENT,
+  vorname VARCHAR(50) NOT NULL,
+  nachname VARCHAR(50) NOT NULL,
+  email VARCHAR(100) UNIQUE,
+  telefon VARCHAR(20),
+  kundentypID INT,
+  FOREIGN KEY (kundentypID) REFERENCES kundentyp(kundentypID)
+);
+
+CREATE TABLE lieferanten (
+  lieferantID INTEGER PRIMARY KEY AUTOINCREMENT,
+  lieferant VARCHAR(100) NOT NULL,
+  kontaktperson VARCHAR(100),
+  telefon VARCHAR(20),
+  email VARCHAR(100)
+);
+
+CREATE TABLE artikel (
+  artikelID INTEGER PRIMARY KEY AUTOINCREMENT,
+  produktname VARCHAR(100) NOT NULL,
+  lagerbestand INT DEFAULT 0,
+  durchschnittskosten REAL NULL
+);
+
+CREATE TABLE artikellieferant (
+  lieferantID INT NOT NULL,
+  artikelID INT NOT NULL,
+  einkaufspreis REAL NOT NULL,
+  PRIMARY KEY (lieferantID, artikelID),
+  FOREIGN KEY (lieferantID) REFERENCES lieferanten(lieferantID),
+  FOREIGN KEY (artikelID) REFERENCES artikel(artikelID)
+);
+
+CREATE TABLE einkauf (
+  einkaufID INTEGER PRIMARY KEY AUTOINCREMENT,
+  lieferantID INT NOT NULL,
+  einkaufsdatum DATETIME DEFAULT (datetime('now', 'localtime')),
+  rechnung VARCHAR(50),
+  bemerkung VARCHAR(255),
+  FOREIGN KEY (lieferantID) REFERENCES lieferanten(lieferantID)
+);
+
+CREATE TABLE einkaufartikel (
+  einkauf_artikelID INTEGER PRIMARY KEY AUTOINCREMENT,
+  einkaufID INT NOT NULL,
+  artikelID INT NOT NULL,
+  einkaufsmenge INT CHECK (einkaufsmenge > 0),
+  einkaufspreis REAL NOT NULL,
+  FOREIGN KEY (einkaufID) REFERENCES einkauf(einkaufID),
+  FOREIGN KEY (artikelID) REFERENCES artikel(artikelID)
+);
+
+CREATE TABLE verkauf (
+  verkaufID INTEGER PRIMARY KEY AUTOINCREMENT,
+  kundenID INT NOT NULL,
+  verkaufsdatum DATETIME DEFAULT (datetime('now', 'localtime')),
+  FOREIGN KEY (kundenID) REFERENCES kunden(kundenID)
+);
+
+CREATE TABLE verkaufartikel (
+  verkauf_artikelID INTEGER PRIMARY KEY AUTOINCREMENT,
+  verkaufID INT NOT NULL,
+  artikelID INT NOT NULL,
+  verkaufsmenge INT CHECK (verkaufsmenge > 0),
+  verkaufspreis REAL NOT NULL,
+  rabatt REAL NOT NULL DEFAULT 0,
+  FOREIGN KEY (verkaufID) REFERENCES verkauf(verkaufID),
+  FOREIGN KEY (artikelID) REFERENCES artikel(artikelID)
+);
+
+CREATE TABLE artikelpreis (
+  preisID INTEGER PRIMARY KEY AUTOINCREMENT,
+  artikelID INT NOT NULL,
+  listenpreis REAL NOT NULL,
+  gueltig_ab DATE NOT NULL,
+  gueltig_bis DATE NULL,
+  FOREIGN KEY (artikelID) REFERENCES artikel(artikelID)
+);
+
+-- Indizes (sql/index.sql)
+CREATE INDEX idx_kunden_kundentypID ON kunden(kundentypID);
+CREATE INDEX idx_artikel_lieferantID ON artikellieferant(lieferantID);
+CREATE INDEX idx_artikellieferant_artikelID ON artikellieferant(artikelID);
+CREATE INDEX idx_einkauf_lieferantID ON einkauf(lieferantID);
+CREATE INDEX idx_einkaufartikel_einkaufID ON einkaufartikel(einkaufID);
+CREATE INDEX idx_einkaufartikel_artikelID ON einkaufartikel(artikelID);
+CREATE INDEX idx_verkauf_kundenID ON verkauf(kundenID);
+CREATE INDEX idx_verkaufartikel_verkaufID ON verkaufartikel(verkaufID);
+CREATE INDEX idx_verkaufartikel_artikelID ON verkaufartikel(artikelID);
+CREATE INDEX idx_artikelpreis_artikelID ON artikelpreis(artikelID);
+CREATE INDEX idx_kunden_name ON kunden(nachname, vorname);
+CREATE INDEX idx_lieferanten_name ON lieferanten(lieferant);
+CREATE INDEX idx_artikel_name ON artikel(produktname);
+CREATE INDEX idx_verkauf_datum ON verkauf(verkaufsdatum);
+
+-- Benutzer (sql/users.sql) mit demselben Admin-Konto
+CREATE TABLE users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  email VARCHAR(120) NOT NULL UNIQUE,
+  name VARCHAR(100) NOT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  role VARCHAR(10) NOT NULL DEFAULT 'viewer' CHECK (role IN ('admin', 'viewer')),
+  is_active TINYINT NOT NULL DEFAULT 1,
+  created_at DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+INSERT INTO users (email, name, password_hash, role, is_active)
+VALUES (
+  'admin@example.com',
+  'Admin',
+  'pbkdf2:sha256:1000000$bFMbwgkPsAeq2ykB$4bdc29121cbb6bdf9ea4bd87254172d4b79da9e5abb560703e113dd02689da6c',
+  'admin',
+  1
+);
+
+-- sql/generator_checkpoint.sql
+CREATE TABLE generator_checkpoint (
+  job VARCHAR(50) PRIMARY KEY,
+  letzter_tag DATE NOT NULL,
+  tage_fertig INT NOT NULL,
+  tage_gesamt INT NOT NULL,
+  rng_state TEXT NOT NULL,
+  zustand TEXT NOT NULL,
+  aktualisiert_am DATETIME NOT NULL DEFAULT (datetime('now', 'localtime'))
+);
+
+-- sql/artikel_dispo.sql
+CREATE TABLE artikel_dispo (
+  artikelID INT PRIMARY KEY,
+  nachfrage_tag REAL NOT NULL,
+  nachfrage_std REAL NOT NULL,
+  fenster_tage INT NOT NULL,
+  lieferzeit_tage INT NOT NULL,
+  servicegrad REAL NOT NULL,
+  sicherheitsbestand INT NOT NULL,
+  meldebestand INT NOT NULL,
+  bestellmenge INT NOT NULL,
+  berechnet_am DATETIME NOT NULL
+);
+
+-- sql/artikel_prognose.sql
+CREATE TABLE artikel_prognose (
+  artikelID INT NOT NULL,
+  datum DATE NOT NULL,
+  menge REAL NOT NULL,
+  modell VARCHAR(20) NOT NULL,
+  alpha REAL NOT NULL,
+  stand DATE NOT NULL,
+  erstellt_am DATETIME NOT NULL,
+  PRIMARY KEY (artikelID, datum)
+);
+CREATE INDEX idx_artikel_prognose_datum ON artikel_prognose(datum);
+
+-- sql/verkauf_import.sql
+CREATE TABLE verkauf_import (
+  beleg_key VARCHAR(100) PRIMARY KEY,
+  verkaufID INT NOT NULL,
+  quelle VARCHAR(255) NULL,
+  importiert_am DATETIME NOT NULL
+);
+CREATE INDEX idx_verkauf_import_verkauf ON verkauf_import(verkaufID);
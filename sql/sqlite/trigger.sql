@@ -0,0 +1,99 @@
+-- SQLite-Fassung von sql/trigger.sql (ohne Hot-Artikel-Streifen).
+-- @newshop_bulk gibt es in SQLite nicht → Funktion newshop_bulk() aus python/db.py
+-- (1, solange bulk_load.set_bulk_mode(cur, True) für diese Verbindung gilt).
+-- SIGNAL → RAISE(ABORT, …); db.py meldet das als MySQL-Fehler 1644.
+-- trg_update_avgcost (zweiter AFTER-INSERT-Trigger in MySQL) ist in trg_einkaufartikel_ai eingebaut,
+-- damit die Reihenfolge feststeht.
+
+-- Einkauf: Bestand erhöhen, gleitende Durchschnittskosten, danach gewichteter Durchschnitt aller Einkäufe
+CREATE TRIGGER trg_einkaufartikel_ai
+AFTER INSERT ON einkaufartikel
+FOR EACH ROW WHEN newshop_bulk() = 0
+BEGIN
+  UPDATE artikel
+     SET durchschnittskosten = CASE
+           WHEN COALESCE(lagerbestand,0) + NEW.einkaufsmenge > 0
+           THEN ROUND((COALESCE(lagerbestand,0) * COALESCE(durchschnittskosten,0)
+                       + NEW.einkaufsmenge * NEW.einkaufspreis)
+                      / (COALESCE(lagerbestand,0) + NEW.einkaufsmenge), 4)
+         END,
+         lagerbestand = COALESCE(lagerbestand,0) + NEW.einkaufsmenge
+   WHERE artikelID = NEW.artikelID;
+
+  UPDATE artikel
+     SET durchschnittskosten = (
+           SELECT ROUND(SUM(ea.einkaufsmenge * ea.einkaufspreis) / NULLIF(SUM(ea.einkaufsmenge), 0), 4)
+           FROM einkaufartikel ea
+           WHERE ea.artikelID = NEW.artikelID)
+   WHERE artikelID = NEW.artikelID;
+END;
+
+CREATE TRIGGER trg_einkaufartikel_au
+AFTER UPDATE ON einkaufartikel
+FOR EACH ROW WHEN newshop_bulk() = 0
+BEGIN
+  UPDATE artikel
+     SET durchschnittskosten = CASE
+           WHEN COALESCE(lagerbestand,0) - OLD.einkaufsmenge + NEW.einkaufsmenge > 0
+           THEN ROUND((COALESCE(lagerbestand,0) * COALESCE(durchschnittskosten,0)
+                       - OLD.einkaufsmenge * OLD.einkaufspreis
+                       + NEW.einkaufsmenge * NEW.einkaufspreis)
+                      / (COALESCE(lagerbestand,0) - OLD.einkaufsmenge + NEW.einkaufsmenge), 4)
+         END,
+         lagerbestand = COALESCE(lagerbestand,0) - OLD.einkaufsmenge + NEW.einkaufsmenge
+   WHERE artikelID = NEW.artikelID;
+END;
+
+CREATE TRIGGER trg_einkaufartikel_ad
+AFTER DELETE ON einkaufartikel
+FOR EACH ROW WHEN newshop_bulk() = 0
+BEGIN
+  UPDATE artikel
+     SET durchschnittskosten = CASE
+           WHEN COALESCE(lagerbestand,0) - OLD.einkaufsmenge > 0
+           THEN ROUND((COALESCE(lagerbestand,0) * COALESCE(durchschnittskosten,0)
+                       - OLD.einkaufsmenge * OLD.einkaufspreis)
+                      / (COALESCE(lagerbestand,0) - OLD.einkaufsmenge), 4)
+         END,
+         lagerbestand = COALESCE(lagerbestand,0) - OLD.einkaufsmenge
+   WHERE artikelID = OLD.artikelID;
+END;
+
+-- Verkauf: Bestand prüfen und abbuchen
+CREATE TRIGGER trg_verkaufartikel_bi
+BEFORE INSERT ON verkaufartikel
+FOR EACH ROW WHEN newshop_bulk() = 0
+BEGIN
+  SELECT RAISE(ABORT, 'verkaufsmenge must be > 0')
+   WHERE NEW.verkaufsmenge IS NULL OR NEW.verkaufsmenge <= 0;
+
+  SELECT RAISE(ABORT, 'Not enough stock for this sale')
+   WHERE (SELECT COALESCE(lagerbestand,0) FROM artikel WHERE artikelID = NEW.artikelID) < NEW.verkaufsmenge;
+
+  UPDATE artikel
+     SET lagerbestand = COALESCE(lagerbestand,0) - NEW.verkaufsmenge
+   WHERE artikelID = NEW.artikelID;
+END;
+
+CREATE TRIGGER trg_verkaufartikel_au
+AFTER UPDATE OF verkaufsmenge ON verkaufartikel
+FOR EACH ROW WHEN newshop_bulk() = 0 AND NEW.verkaufsmenge <> OLD.verkaufsmenge
+BEGIN
+  SELECT RAISE(ABORT, 'Not enough stock to increase sales quantity')
+   WHERE NEW.verkaufsmenge > OLD.verkaufsmenge
+     AND (SELECT COALESCE(lagerbestand,0) FROM artikel WHERE artikelID = NEW.artikelID)
+         < NEW.verkaufsmenge - OLD.verkaufsmenge;
+
+  UPDATE artikel
+     SET lagerbestand = COALESCE(lagerbestand,0) - (NEW.verkaufsmenge - OLD.verkaufsmenge)
+   WHERE artikelID = NEW.artikelID;
+END;
+
+CREATE TRIGGER trg_verkaufartikel_ad
+AFTER DELETE ON verkaufartikel
+FOR EACH ROW WHEN newshop_bulk() = 0
+BEGIN
+  UPDATE artikel
+     SET lagerbestand = lagerbestand + OLD.verkaufsmenge
+   WHERE artikelID = OLD.artikelID;
+END;
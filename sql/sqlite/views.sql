@@ -0,0 +1,88 @@
+-- SQLite-Fassung der Sichten, die Berichte und Jobs lesen
+-- (sql/v_sales.sql, sql/v_umschlag_90tage.sql, v_artikel_bestand aus sql/artikel_hot.sql).
+-- Geteilt wird durch 100.0 statt 100 (ganzzahlige Division in SQLite); CONCAT kommt aus python/db.py.
+
+CREATE VIEW v_sales AS
+SELECT
+    v.verkaufsdatum                                        AS verkaufsdatum,
+    k.kundenID                                             AS kundenID,
+    CONCAT(k.vorname, ' ', k.nachname)                     AS kunde,
+    kt.kundentypID                                         AS kundentypID,
+    kt.bezeichnung                                         AS kundentyp,
+    a.artikelID                                            AS artikelID,
+    a.produktname                                          AS artikel,
+    va.verkaufsmenge                                       AS menge,
+    va.verkaufspreis                                       AS vk_preis,
+    COALESCE(va.rabatt, 0)                                 AS rabatt_prozent,
+    COALESCE(a.durchschnittskosten, 0)                     AS ek_preis,
+    ROUND(va.verkaufsmenge * va.verkaufspreis * COALESCE(va.rabatt,0) / 100.0, 2)              AS rabatt_eur,
+    ROUND(va.verkaufsmenge * va.verkaufspreis * (1 - COALESCE(va.rabatt,0) / 100.0), 2)        AS umsatz,
+    ROUND(va.verkaufsmenge * va.verkaufspreis, 2)                                               AS umsatz_brutto,
+    ROUND(va.verkaufsmenge * COALESCE(a.durchschnittskosten, 0), 2)                             AS kosten,
+    ROUND( (va.verkaufsmenge * va.verkaufspreis * (1 - COALESCE(va.rabatt,0)/100.0))
+         - (va.verkaufsmenge * COALESCE(a.durchschnittskosten,0)), 2)                           AS marge,
+    ROUND( (va.verkaufsmenge * va.verkaufspreis)
+         - (va.verkaufsmenge * COALESCE(a.durchschnittskosten,0)), 2)                           AS marge_brutto,
+    ROUND(100.0 * ((va.verkaufsmenge * va.verkaufspreis * (1 - COALESCE(va.rabatt,0)/100.0)) - (va.verkaufsmenge * COALESCE(a.durchschnittskosten,0)))
+          / NULLIF(va.verkaufsmenge * va.verkaufspreis * (1 - COALESCE(va.rabatt,0)/100.0), 0), 2) AS marge_prozent,
+    ROUND(100.0 * ((va.verkaufsmenge * va.verkaufspreis) - (va.verkaufsmenge * COALESCE(a.durchschnittskosten,0)))
+          / NULLIF(va.verkaufsmenge * va.verkaufspreis, 0), 2)                                  AS marge_brutto_prozent
+FROM verkauf v
+JOIN verkaufartikel  va ON v.verkaufID   = va.verkaufID
+JOIN artikel         a  ON a.artikelID   = va.artikelID
+JOIN kunden          k  ON k.kundenID    = v.kundenID
+JOIN kundentyp       kt ON kt.kundentypID = k.kundentypID;
+
+CREATE VIEW v_umschlag_90tage AS
+SELECT
+    a.artikelID,
+    a.produktname,
+    a.lagerbestand,
+    ROUND(COALESCE(a.durchschnittskosten,0), 2)                           AS durchschnittskosten,
+    ROUND(a.lagerbestand * COALESCE(a.durchschnittskosten,0), 2)          AS lagerwert_now,
+    COALESCE(s.qty_90, 0)                                                 AS verkaufsmenge_90,
+    ROUND(COALESCE(s.qty_90,0) * COALESCE(a.durchschnittskosten,0), 2)    AS cogs_90,
+    ROUND(COALESCE(al.min_einkaufspreis, 0), 2)                           AS min_einkaufspreis,
+    ROUND(COALESCE(al.max_einkaufspreis, 0), 2)                           AS max_einkaufspreis,
+    ROUND(
+      (COALESCE(s.qty_90,0) * COALESCE(a.durchschnittskosten,0))
+      / NULLIF(a.lagerbestand * COALESCE(a.durchschnittskosten,0), 0)
+    , 2)                                                                  AS umschlag_90_approx,
+    ROUND(
+      CASE
+        WHEN COALESCE(s.qty_90,0) = 0
+          OR a.lagerbestand * COALESCE(a.durchschnittskosten,0) = 0
+        THEN NULL
+        ELSE 90.0 /
+          (
+            (COALESCE(s.qty_90,0) * COALESCE(a.durchschnittskosten,0))
+            / (a.lagerbestand * COALESCE(a.durchschnittskosten,0))
+          )
+      END
+    , 1)                                                                  AS lagerdauer_tage
+FROM artikel a
+LEFT JOIN (
+    SELECT va.artikelID, SUM(va.verkaufsmenge) AS qty_90
+    FROM verkauf v
+    JOIN verkaufartikel va ON va.verkaufID = v.verkaufID
+    WHERE v.verkaufsdatum >= datetime('now', 'localtime', '-90 days')
+    GROUP BY va.artikelID
+) s ON s.artikelID = a.artikelID
+LEFT JOIN (
+    SELECT ea.artikelID,
+           MIN(ea.einkaufspreis) AS min_einkaufspreis,
+           MAX(ea.einkaufspreis) AS max_einkaufspreis
+    FROM einkaufartikel ea
+    GROUP BY ea.artikelID
+) al ON al.artikelID = a.artikelID;
+
+-- ohne Hot-Artikel (nur MySQL) ist der Bestand einfach artikel.lagerbestand
+CREATE VIEW v_artikel_bestand AS
+SELECT
+  a.artikelID,
+  a.produktname,
+  a.lagerbestand,
+  a.lagerbestand AS lager_zentral,
+  0              AS lager_stripes,
+  a.durchschnittskosten
+FROM artikel a;
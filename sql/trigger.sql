@@ -9,6 +9,9 @@ DROP TRIGGER IF EXISTS trg_verkaufartikel_bi;
 DROP TRIGGER IF EXISTS trg_verkaufartikel_au;
 DROP TRIGGER IF EXISTS trg_verkaufartikel_ad;
 */
+-- Alle Trigger prüfen die Session-Variable @newshop_bulk: ist sie 1, tun sie nichts.
+-- Damit können bulk_import.py / bulk_load.py / generate_history große Mengen laden und
+-- lagerbestand + durchschnittskosten danach in einem Schritt berechnen.
 DELIMITER $$
 
 -- ЗАКУПІВЛІ (einkaufartikel)
@@ -17,13 +20,18 @@ DELIMITER $$
 CREATE TRIGGER trg_einkaufartikel_ai
 AFTER INSERT ON einkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
   DECLARE v_old_qty INT;
   DECLARE v_old_avg DECIMAL(10,4);
   DECLARE v_new_qty INT;
   DECLARE v_new_avg DECIMAL(10,4);
   DECLARE v_total_value DECIMAL(18,6);
 
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   SELECT COALESCE(lagerbestand,0), COALESCE(durchschnittskosten,0)
     INTO v_old_qty, v_old_avg
   FROM artikel
@@ -47,13 +55,18 @@ END $$
 CREATE TRIGGER trg_einkaufartikel_au
 AFTER UPDATE ON einkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
   DECLARE v_cur_qty INT;
   DECLARE v_cur_avg DECIMAL(10,4);
   DECLARE v_new_qty INT;
   DECLARE v_new_total DECIMAL(18,6);
   DECLARE v_new_avg DECIMAL(10,4);
 
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   SELECT COALESCE(lagerbestand,0), COALESCE(durchschnittskosten,0)
     INTO v_cur_qty, v_cur_avg
   FROM artikel
@@ -79,13 +92,18 @@ END $$
 CREATE TRIGGER trg_einkaufartikel_ad
 AFTER DELETE ON einkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
   DECLARE v_cur_qty INT;
   DECLARE v_cur_avg DECIMAL(10,4);
   DECLARE v_new_qty INT;
   DECLARE v_new_total DECIMAL(18,6);
   DECLARE v_new_avg DECIMAL(10,4);
 
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   SELECT COALESCE(lagerbestand,0), COALESCE(durchschnittskosten,0)
     INTO v_cur_qty, v_cur_avg
   FROM artikel
@@ -112,9 +130,14 @@ END $$
 CREATE TRIGGER trg_verkaufartikel_bi
 BEFORE INSERT ON verkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
   DECLARE v_stock INT;
 
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   SELECT COALESCE(lagerbestand,0) INTO v_stock
   FROM artikel
   WHERE artikelID = NEW.artikelID
@@ -139,10 +162,15 @@ END $$
 CREATE TRIGGER trg_verkaufartikel_au
 AFTER UPDATE ON verkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
   DECLARE v_cur_stock INT;
   DECLARE v_delta INT;
 
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   SET v_delta = NEW.verkaufsmenge - OLD.verkaufsmenge; -- >0 треба додатково списати; <0 повернути
 
   IF v_delta <> 0 THEN
@@ -166,7 +194,12 @@ END $$
 CREATE TRIGGER trg_verkaufartikel_ad
 AFTER DELETE ON verkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   UPDATE artikel
      SET lagerbestand = lagerbestand + OLD.verkaufsmenge
    WHERE artikelID = OLD.artikelID;
@@ -178,9 +211,14 @@ DELIMITER $$
 CREATE TRIGGER trg_update_avgcost
 AFTER INSERT ON einkaufartikel
 FOR EACH ROW
-BEGIN
+trg: BEGIN
   DECLARE avgcost DECIMAL(10,4);
 
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
   SELECT ROUND(SUM(ea.einkaufsmenge * ea.einkaufspreis) / NULLIF(SUM(ea.einkaufsmenge),0),4)
     INTO avgcost
   FROM einkaufartikel ea
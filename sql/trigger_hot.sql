@@ -0,0 +1,164 @@
+USE newshopdb;
+
+-- OPTIONAL: Hot-Artikel mit aufgeteiltem Lagerzähler (Streifen).
+-- Ersetzt trg_verkaufartikel_bi und trg_verkaufartikel_au aus sql/trigger.sql durch Fassungen, die den
+-- Bestand als zentral + Puffer (artikel_lager_stripe) behandeln. Artikel ohne Eintrag in artikel_hot laufen
+-- wie bisher (ihre Puffer sind leer).
+--
+-- Reihenfolge: sql/trigger.sql → sql/artikel_hot.sql → diese Datei.
+-- Zurück zum Standard: hot_stock.py disable --all, dann sql/drop_trigger.sql und sql/trigger.sql.
+--
+-- Bestand, solange Artikel in artikel_hot eingetragen sind:
+--   • artikel.lagerbestand = nur zentraler Bestand; Gesamtbestand = v_artikel_bestand. Diese Sicht bzw. die
+--     Puffer lesen /reports/stock_low, purchase.py, reconcile.py, sale.py (Artikelauswahl) und
+--     reservation.py (Bestandsprüfung); eigene Abfragen auf artikel.lagerbestand sehen zu wenig.
+--   • trg_verkaufartikel_au: reicht der zentrale Bestand für eine Mengenerhöhung nicht, werden die Puffer
+--     eingesammelt (wie beim Nachfüllen unten).
+--   • trg_einkaufartikel_ai gewichtet mit dem zentralen Bestand; trg_update_avgcost (feuert danach)
+--     überschreibt die Durchschnittskosten aber ohnehin mit dem Durchschnitt aller Einkäufe.
+--   • Fast leerer Bestand: der Trigger sammelt die anderen Streifen ein und sperrt sie dabei nach der
+--     artikel-Zeile – gegen die Reihenfolge der anderen Verkäufe. Das kann deadlocken (1213);
+--     reservation.run_with_retry wiederholt den Beleg dann.
+--   • Nutzen erst mit echter Konkurrenz messen (pos_load --hot 64,16,4,1 --stripes 0,8), README.
+
+DROP TRIGGER IF EXISTS trg_verkaufartikel_bi;
+DROP TRIGGER IF EXISTS trg_verkaufartikel_au;
+
+DELIMITER $$
+
+-- BEFORE INSERT: Hot-Artikel buchen vom Streifen der Verbindung, alle anderen wie in sql/trigger.sql
+CREATE TRIGGER trg_verkaufartikel_bi
+BEFORE INSERT ON verkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  DECLARE v_stock INT;
+  DECLARE v_stripes INT;
+  DECLARE v_chunk INT;
+  DECLARE v_stripe INT;
+  DECLARE v_have INT;
+  DECLARE v_rest INT;
+  DECLARE v_take INT;
+
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
+  IF NEW.verkaufsmenge IS NULL OR NEW.verkaufsmenge <= 0 THEN
+    SIGNAL SQLSTATE '45000'
+      SET MESSAGE_TEXT = 'verkaufsmenge must be > 0';
+  END IF;
+
+  -- MAX(): liefert immer eine Zeile (NULL = kein Hot-Artikel)
+  SELECT MAX(stripes), MAX(nachfuellmenge) INTO v_stripes, v_chunk
+  FROM artikel_hot
+  WHERE artikelID = NEW.artikelID;
+
+  IF v_stripes > 0 THEN
+    SET v_stripe = CONNECTION_ID() MOD v_stripes;
+
+    SELECT COALESCE(MAX(menge),0) INTO v_have
+    FROM artikel_lager_stripe
+    WHERE artikelID = NEW.artikelID AND stripe = v_stripe
+    FOR UPDATE;
+
+    IF v_have < NEW.verkaufsmenge THEN
+      -- Puffer reicht nicht: aus dem zentralen Bestand nachfüllen (Fehlmenge + Nachfüllmenge)
+      SELECT COALESCE(lagerbestand,0) INTO v_stock
+      FROM artikel
+      WHERE artikelID = NEW.artikelID
+      FOR UPDATE;
+
+      IF v_have + v_stock < NEW.verkaufsmenge THEN
+        -- fast leer: Reste der anderen Streifen einsammeln (selten; kann mit Nachbarn deadlocken → 1213)
+        SELECT COALESCE(SUM(menge),0) INTO v_rest
+        FROM artikel_lager_stripe
+        WHERE artikelID = NEW.artikelID AND stripe <> v_stripe
+        FOR UPDATE;
+
+        IF v_have + v_stock + v_rest < NEW.verkaufsmenge THEN
+          SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Not enough stock for this sale';
+        END IF;
+
+        UPDATE artikel_lager_stripe
+           SET menge = 0
+         WHERE artikelID = NEW.artikelID AND stripe <> v_stripe;
+        SET v_stock = v_stock + v_rest;
+      END IF;
+
+      SET v_take = LEAST(v_stock, NEW.verkaufsmenge - v_have + v_chunk);
+      UPDATE artikel
+         SET lagerbestand = v_stock - v_take
+       WHERE artikelID = NEW.artikelID;
+      SET v_have = v_have + v_take;
+    END IF;
+
+    INSERT INTO artikel_lager_stripe (artikelID, stripe, menge)
+    VALUES (NEW.artikelID, v_stripe, v_have - NEW.verkaufsmenge)
+    ON DUPLICATE KEY UPDATE menge = VALUES(menge);
+    LEAVE trg;
+  END IF;
+
+  SELECT COALESCE(lagerbestand,0) INTO v_stock
+  FROM artikel
+  WHERE artikelID = NEW.artikelID
+  FOR UPDATE;
+
+  IF v_stock < NEW.verkaufsmenge THEN
+    SIGNAL SQLSTATE '45000'
+      SET MESSAGE_TEXT = 'Not enough stock for this sale';
+  END IF;
+
+  UPDATE artikel
+     SET lagerbestand = v_stock - NEW.verkaufsmenge
+   WHERE artikelID = NEW.artikelID;
+END $$
+
+-- AFTER UPDATE: wie in sql/trigger.sql, aber eine Mengenerhöhung darf auch die Puffer verbrauchen
+CREATE TRIGGER trg_verkaufartikel_au
+AFTER UPDATE ON verkaufartikel
+FOR EACH ROW
+trg: BEGIN
+  DECLARE v_cur_stock INT;
+  DECLARE v_rest INT;
+  DECLARE v_delta INT;
+
+  -- Bulk-Import (SET @newshop_bulk = 1): Lager wird danach mengenbasiert neu berechnet
+  IF @newshop_bulk = 1 THEN
+    LEAVE trg;
+  END IF;
+
+  SET v_delta = NEW.verkaufsmenge - OLD.verkaufsmenge;  -- >0 zusätzlich abbuchen, <0 zurück in den zentralen Bestand
+
+  IF v_delta <> 0 THEN
+    SELECT COALESCE(lagerbestand,0) INTO v_cur_stock
+    FROM artikel
+    WHERE artikelID = NEW.artikelID
+    FOR UPDATE;
+
+    IF v_delta > 0 AND v_cur_stock < v_delta THEN
+      -- zentraler Bestand reicht nicht: Puffer aller Streifen einsammeln (ohne Hot-Eintrag: keine Zeilen)
+      SELECT COALESCE(SUM(menge),0) INTO v_rest
+      FROM artikel_lager_stripe
+      WHERE artikelID = NEW.artikelID
+      FOR UPDATE;
+
+      IF v_cur_stock + v_rest < v_delta THEN
+        SIGNAL SQLSTATE '45000'
+          SET MESSAGE_TEXT = 'Not enough stock to increase sales quantity';
+      END IF;
+
+      UPDATE artikel_lager_stripe
+         SET menge = 0
+       WHERE artikelID = NEW.artikelID AND menge <> 0;
+      SET v_cur_stock = v_cur_stock + v_rest;
+    END IF;
+
+    UPDATE artikel
+       SET lagerbestand = v_cur_stock - v_delta
+     WHERE artikelID = NEW.artikelID;
+  END IF;
+END $$
+
+DELIMITER ;
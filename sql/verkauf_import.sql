@@ -0,0 +1,16 @@
+USE newshopdb;
+
+-- Importierte Kassenbelege (Tagesabschluss-Dateien) mit Idempotenz-Schlüssel.
+-- beleg_key kommt aus der Datei (z. B. "F03-K2-2025-10-31-000123"); ist er schon hier,
+-- wird der Beleg beim erneuten Hochladen übersprungen statt doppelt gebucht.
+-- Geschrieben von python/api/pos_import.py in derselben Transaktion wie verkauf/verkaufartikel.
+CREATE TABLE IF NOT EXISTS verkauf_import (
+  beleg_key VARCHAR(100) PRIMARY KEY,
+  verkaufID INT NOT NULL,
+  quelle VARCHAR(255) NULL,                 -- Dateiname / Filiale
+  importiert_am DATETIME NOT NULL,
+  KEY idx_verkauf_import_verkauf (verkaufID)
+);
+-- Kein Fremdschlüssel (wie artikel_dispo): generate_history darf verkauf leeren.
+
+SELECT * FROM verkauf_import ORDER BY importiert_am DESC LIMIT 20;